@@ -99,6 +99,21 @@ class RandomCharacterPromptNode:
                 "lock_view_angle": ("STRING", {"default": "", "tooltip": "Lock view angle (e.g., 'from above', 'from side')"}),
                 # Background
                 "lock_background": ("STRING", {"default": "", "tooltip": "Lock background (e.g., 'outdoor', 'bedroom')"}),
+                # Token budget
+                "token_budget": ("INT", {
+                    "default": 0,
+                    "min": 0,
+                    "max": 750,
+                    "tooltip": "Max CLIP tokens including prefix (75 = one chunk). 0 = unlimited"
+                }),
+                "budget_strategy": (["drop", "reorder", "break"], {
+                    "default": "drop",
+                    "tooltip": "When over budget: drop low-priority slots, move them last, or insert BREAK between chunks"
+                }),
+                "prompt_syntax": (["a1111", "novelai", "plain"], {
+                    "default": "a1111",
+                    "tooltip": "Weight syntax: A1111 (x:1.2), NovelAI {x} emphasis, or plain tags"
+                }),
             }
         }
 
@@ -118,7 +133,8 @@ class RandomCharacterPromptNode:
                  lock_head="", lock_neck="", lock_upper_body="", lock_waist="", lock_lower_body="",
                  lock_full_body="", lock_outerwear="", lock_hands="", lock_legs="", lock_feet="", lock_accessory="",
                  lock_pose="", lock_gesture="", lock_view_angle="",
-                 lock_background=""):
+                 lock_background="",
+                 token_budget=0, budget_strategy="drop", prompt_syntax="a1111"):
         """Generate a random character prompt and encode it with CLIP."""
         self._ensure_generator()
 
@@ -190,8 +206,13 @@ class RandomCharacterPromptNode:
                     config.slots[slot_name].value = locked_value.strip()
                     config.slots[slot_name].value_id = locked_value.strip()
 
+        # Reserve prefix tokens (plus its separator) from the budget
+        if token_budget and prefix and prefix.strip():
+            prefix_tokens = self.gen.get_token_counter().count(prefix.strip()) + 1
+            token_budget = max(1, token_budget - prefix_tokens)
+
         # Build the prompt with localization
-        prompt = self._build_prompt_localized(config, language)
+        prompt = self._build_prompt_localized(config, language, token_budget, budget_strategy, prompt_syntax)
 
         # Add prefix if provided
         if prefix and prefix.strip():
@@ -200,64 +221,15 @@ class RandomCharacterPromptNode:
         # Return prompt and display it on the node
         return {"ui": {"text": [prompt]}, "result": (prompt,)}
 
-    def _build_prompt_localized(self, config, language: str) -> str:
-        """Build prompt with localized item names."""
-        parts = ["1girl"]
-
-        slot_order = [
-            "hair_color", "hair_length", "hair_style", "hair_texture",
-            "eye_color", "eye_expression_quality", "eye_shape", "eye_pupil_state",
-            "eye_state", "eye_accessories",
-            "body_type", "height", "skin", "age_appearance", "special_features",
-            "expression",
-            "full_body", "head", "neck", "upper_body", "waist", "lower_body",
-            "outerwear", "hands", "legs", "feet", "accessory",
-            "view_angle", "pose", "gesture",
-            "background"
-        ]
-
-        # Check if lower body covers legs
-        lower_body_covers_legs = False
-        lower_slot = config.slots.get("lower_body")
-        if lower_slot and lower_slot.enabled and lower_slot.value_id:
-            lower_body_covers_legs = self.gen.lower_body_id_covers_legs(lower_slot.value_id)
-
-        for slot_name in slot_order:
-            if slot_name not in config.slots:
-                continue
-
-            slot = config.slots[slot_name]
-            if not slot.enabled or not slot.value_id:
-                continue
-
-            # Full body mode logic
-            if config.full_body_mode and slot_name in ["upper_body", "lower_body"]:
-                full_body_slot = config.slots.get("full_body")
-                if full_body_slot and full_body_slot.enabled and full_body_slot.value_id:
-                    continue
-
-            # Skip legs if lower body covers them
-            if slot_name == "legs" and lower_body_covers_legs:
-                continue
-
-            # Get localized name
-            localized_name = self.gen.resolve_slot_value_name(
-                slot_name, slot.value_id, slot.value, language
-            )
-            if not localized_name:
-                localized_name = slot.value or slot.value_id
-
-            # Build prompt part with optional color
-            if slot.color_enabled and slot.color:
-                color_text = self.gen.localize_color_token(slot.color, language) or slot.color
-                prompt_part = f"{color_text} {localized_name}"
-            else:
-                prompt_part = localized_name
-
-            # Apply weight
-            if slot.weight != 1.0:
-                prompt_part = f"({prompt_part}:{slot.weight:.1f})"
-
-            parts.append(prompt_part)
-
-        return ", ".join(parts)
+    def _build_prompt_localized(self, config, language: str, token_budget: int = 0,
+                                budget_strategy: str = "drop", prompt_syntax: str = "a1111") -> str:
+        """Build prompt with localized item names, fitted to token_budget if set."""
+        parts = self.gen.get_renderer().render_parts(
+            config.slots,
+            language=language,
+            full_body_mode=config.full_body_mode,
+            dialect=prompt_syntax,
+            require_color_enabled=True,
+            raw_fallback=True,
+        )
+        return ", ".join(self.gen.fit_to_token_budget(parts, token_budget, budget_strategy))
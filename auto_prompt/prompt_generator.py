@@ -13,6 +13,9 @@ from dataclasses import dataclass, field
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 
+from .render import PromptRenderer
+from .tokens import ClipTokenCounter, fit_prompt_to_budget
+
 
 @dataclass
 class SlotConfig:
@@ -136,6 +139,17 @@ class PromptGenerator:
     # Categories for section-based randomization
     CATEGORIES = ["appearance", "body", "expression", "clothing", "pose", "background"]
 
+    # Keep-priority when a prompt exceeds its token budget (higher survives longer).
+    SLOT_PRIORITY = {
+        "hair_color": 9, "eye_color": 9, "full_body": 9, "upper_body": 9, "lower_body": 9,
+        "hair_length": 8, "hair_style": 8, "expression": 8, "background": 8,
+        "pose": 7, "outerwear": 7, "view_angle": 6, "head": 6, "legs": 6, "feet": 6,
+        "body_type": 5, "skin": 5, "gesture": 5, "special_features": 5,
+        "neck": 4, "hands": 4, "accessory": 4, "eye_accessories": 4,
+        "hair_texture": 3, "eye_expression_quality": 3, "age_appearance": 3, "height": 3,
+        "waist": 2, "eye_shape": 2, "eye_state": 2, "eye_pupil_state": 1,
+    }
+
     def __init__(self, data_dir: Optional[Path] = None):
         """Initialize the generator with data directory."""
         if data_dir is None:
@@ -157,6 +171,9 @@ class PromptGenerator:
         # Color token localization map (color -> {lang: localized_text})
         self.color_i18n: Dict[str, Dict[str, str]] = {}
 
+        self._token_counter: Optional[ClipTokenCounter] = None
+        self._renderer: Optional[PromptRenderer] = None
+
         # Load all data
         self._load_catalogs()
 
@@ -199,6 +216,38 @@ class PromptGenerator:
                         self.individual_colors = data.get("individual_colors", [])
                         self.color_i18n = data.get("individual_colors_i18n", {})
 
+    def get_token_counter(self) -> ClipTokenCounter:
+        """Return the CLIP token counter, precomputing counts for catalog names."""
+        if self._token_counter is None:
+            counter = ClipTokenCounter()
+            for items in self.items_by_id.values():
+                for item in items.values():
+                    counter.warm([item.get("name", "")])
+                    names = item.get("name_i18n")
+                    if isinstance(names, dict):
+                        counter.warm(n for n in names.values() if isinstance(n, str))
+            for color, names in self.color_i18n.items():
+                counter.warm([color])
+                if isinstance(names, dict):
+                    counter.warm(n for n in names.values() if isinstance(n, str))
+            self._token_counter = counter
+        return self._token_counter
+
+    def get_renderer(self) -> PromptRenderer:
+        """Return the shared prompt render pipeline for these catalogs."""
+        if self._renderer is None:
+            self._renderer = PromptRenderer(self)
+        return self._renderer
+
+    def fit_to_token_budget(self, parts: List[tuple], token_budget: Optional[int],
+                            budget_strategy: str = "drop") -> List[str]:
+        """Fit (slot_name, text) prompt parts into token_budget; no-op when unset."""
+        if not token_budget:
+            return [text for _, text in parts]
+        return fit_prompt_to_budget(
+            parts, token_budget, self.get_token_counter(), self.SLOT_PRIORITY, budget_strategy
+        )
+
     @classmethod
     def normalize_language(cls, language: Optional[str]) -> str:
         """Normalize incoming locale code to supported language."""
@@ -0,0 +1,296 @@
+"""
+Single prompt render pipeline shared by every prompt builder.
+
+This is a self-contained copy for ComfyUI node usage.
+
+The pipeline is compiled once from the slot registry (SLOT_DEFINITIONS plus
+PROMPT_SLOT_ORDER) and applies the full_body / covers_legs skip rules, item
+and color localization, and weight syntax for a pluggable output dialect.
+"""
+
+import math
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# Canonical slot order for prompt output.
+PROMPT_SLOT_ORDER = (
+    # Appearance first
+    "hair_color", "hair_length", "hair_style", "hair_texture",
+    "eye_color", "eye_expression_quality", "eye_shape", "eye_pupil_state",
+    "eye_state", "eye_accessories",
+    # Body features
+    "body_type", "height", "skin", "age_appearance", "special_features",
+    # Expression
+    "expression",
+    # Clothing (specific order)
+    "full_body", "head", "neck", "upper_body", "waist", "lower_body",
+    "outerwear", "hands", "legs", "feet", "accessory",
+    # Pose
+    "view_angle", "pose", "gesture",
+    # Background
+    "background",
+)
+
+# NovelAI multiplies attention by 1.05 per {} (or divides per []).
+NOVELAI_EMPHASIS_STEP = 1.05
+
+
+def _weight_a1111(text: str, weight: float) -> str:
+    return f"({text}:{weight:.1f})"
+
+
+def _weight_novelai(text: str, weight: float) -> str:
+    if weight <= 0:
+        return text
+    depth = round(math.log(weight) / math.log(NOVELAI_EMPHASIS_STEP))
+    if depth > 0:
+        return "{" * depth + text + "}" * depth
+    if depth < 0:
+        return "[" * -depth + text + "]" * -depth
+    return text
+
+
+def _weight_plain(text: str, weight: float) -> str:
+    return text
+
+
+# Dialect name -> function(text, weight) applied when weight != 1.0.
+DIALECTS: Dict[str, Callable[[str, float], str]] = {
+    "a1111": _weight_a1111,
+    "novelai": _weight_novelai,
+    "plain": _weight_plain,
+}
+
+
+# Prompt-relevant slot fields, in memo-key order.
+STATE_FIELDS = ("enabled", "value_id", "value", "color", "weight")
+
+# Slots dropped by the skip rules.
+BODY_PAIR_SLOTS = ("upper_body", "lower_body")
+LEGS_SLOT = "legs"
+
+_object_state = attrgetter(*STATE_FIELDS)
+
+
+def _slot_state(slot: Any, require_color_enabled: bool = False) -> tuple:
+    """
+    Return the STATE_FIELDS tuple for a dict, dataclass or pydantic model slot.
+    With require_color_enabled, color is None unless slot.color_enabled.
+    A tuple is taken to already be a state (e.g. from batch sampling).
+    """
+    if type(slot) is tuple:
+        return slot
+    if type(slot) is dict:
+        get = slot.get
+        color = get("color")
+        if require_color_enabled and not get("color_enabled", False):
+            color = None
+        return (get("enabled", True), get("value_id"), get("value"), color, get("weight", 1.0))
+    state = _object_state(slot)
+    if require_color_enabled and state[3] and not getattr(slot, "color_enabled", False):
+        return state[:3] + (None, state[4])
+    return state
+
+
+class _Program:
+    """
+    Render program for one (language, dialect, color mode, fallback, output
+    shape) mode.
+
+    Holds the slot order pre-filtered for each skip-rule outcome and a
+    per-slot {state tuple: output part, or False to skip} memo shared by them.
+    """
+
+    __slots__ = ("format_weight", "all_steps", "without_body_pair", "without_legs", "entries")
+
+    def __init__(self, slot_names: Tuple[str, ...], format_weight: Callable[[str, float], str]):
+        self.format_weight = format_weight
+        steps = tuple((name, {}) for name in slot_names)
+        self.all_steps = steps
+        self.without_body_pair = tuple(s for s in steps if s[0] not in BODY_PAIR_SLOTS)
+        self.without_legs = tuple(s for s in steps if s[0] != LEGS_SLOT)
+        self.entries = 0
+
+
+class PromptRenderer:
+    """
+    Renders slot state to prompt parts for one generator's catalogs.
+
+    The slot registry is compiled into per-mode programs whose finished
+    fragments are memoized by slot state and dropped when the catalog version
+    changes, so steady-state rendering is one dict lookup per slot.
+    """
+
+    MAX_CACHE_ENTRIES = 65536
+
+    def __init__(self, generator):
+        self.generator = generator
+        slot_definitions = generator.SLOT_DEFINITIONS
+        self.slot_names: Tuple[str, ...] = tuple(
+            name for name in PROMPT_SLOT_ORDER if name in slot_definitions
+        )
+        self._catalog_version: Optional[int] = None
+        self._item_cache: Dict[tuple, Tuple[Optional[str], Optional[str], bool]] = {}
+        self._programs: Dict[tuple, _Program] = {}
+
+    def _program(self, key: tuple) -> _Program:
+        """Compile (or recompile) the program for a mode key, dropping stale memos."""
+        version = getattr(self.generator, "catalog_version", 0)
+        if version != self._catalog_version:
+            self._item_cache.clear()
+            self._programs.clear()
+            self._catalog_version = version
+        dialect = key[1]
+        format_weight = DIALECTS.get(dialect)
+        if format_weight is None:
+            raise ValueError(f"Unknown prompt dialect '{dialect}'")
+        program = self._programs[key] = _Program(self.slot_names, format_weight)
+        return program
+
+    def _resolve(self, slot_name: str, value_id: Optional[str], value: Optional[str],
+                 language: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """Return (localized_text, item_id, covers_legs) for a slot value."""
+        key = (slot_name, value_id, value, language)
+        cached = self._item_cache.get(key)
+        if cached is not None:
+            return cached
+        item = self.generator.resolve_slot_item(slot_name, value_id, value)
+        if item:
+            resolved = (
+                self.generator.get_item_localized_name(item, language),
+                item.get("id"),
+                bool(item.get("covers_legs", False)),
+            )
+        else:
+            resolved = (None, None, False)
+        if len(self._item_cache) >= self.MAX_CACHE_ENTRIES:
+            self._item_cache.clear()
+        self._item_cache[key] = resolved
+        return resolved
+
+    def _fragment(self, name: str, state: tuple, language: str,
+                  format_weight: Callable[[str, float], str], raw_fallback: bool) -> Optional[str]:
+        """Build fragment text for one slot's STATE_FIELDS tuple; None = skip."""
+        enabled, value_id, value, color, weight = state
+        if not enabled or not (value_id or value):
+            return None
+        text = self._resolve(name, value_id, value, language)[0]
+        if not text:
+            if not raw_fallback:
+                return None
+            text = value or value_id
+        if color:
+            text = f"{self.generator.localize_color_token(color, language) or color} {text}"
+        if weight != 1.0:
+            text = format_weight(text, weight)
+        return text
+
+    def render_parts(
+        self,
+        slots: Mapping[str, Any],
+        language: str = "en",
+        full_body_mode: bool = False,
+        dialect: str = "a1111",
+        require_color_enabled: bool = False,
+        raw_fallback: bool = False,
+        lead: Optional[str] = "1girl",
+    ) -> List[Tuple[str, str]]:
+        """
+        Render slot state to ordered (slot_name, text) parts.
+
+        Args:
+            slots: slot name -> SlotConfig / SlotState / dict, or a
+                STATE_FIELDS tuple.
+            language: output language for item and color names.
+            full_body_mode: skip upper/lower body when full_body is set.
+            dialect: weight syntax, one of DIALECTS.
+            require_color_enabled: only emit colors when slot.color_enabled
+                (SlotConfig semantics); otherwise any set color is emitted.
+            raw_fallback: emit the raw value/value_id for values missing from
+                the catalogs instead of skipping the slot.
+            lead: leading subject tag (slot name ""), or None.
+        """
+        return self._run(slots, language, full_body_mode, dialect,
+                         require_color_enabled, raw_fallback, ("", lead) if lead else None, True)
+
+    def render(
+        self,
+        slots: Mapping[str, Any],
+        language: str = "en",
+        full_body_mode: bool = False,
+        dialect: str = "a1111",
+        require_color_enabled: bool = False,
+        raw_fallback: bool = False,
+        lead: Optional[str] = "1girl",
+    ) -> str:
+        """Render slot state straight to a prompt string (see render_parts)."""
+        return ", ".join(self._run(slots, language, full_body_mode, dialect,
+                                   require_color_enabled, raw_fallback, lead, False))
+
+    def _run(self, slots: Mapping[str, Any], language: str, full_body_mode: bool,
+             dialect: str, require_color_enabled: bool, raw_fallback: bool,
+             lead: Any, with_names: bool) -> list:
+        """Execute the program; emits (name, text) parts or bare texts."""
+        if language != "en" and language != "zh":
+            language = self.generator.normalize_language(language)
+        key = (language, dialect, require_color_enabled, raw_fallback, with_names)
+        program = self._programs.get(key)
+        if (program is None or program.entries >= self.MAX_CACHE_ENTRIES
+                or self._catalog_version != getattr(self.generator, "catalog_version", 0)):
+            program = self._program(key)
+        format_weight = program.format_weight
+
+        skip_body_pair = False
+        fb = slots.get("full_body")
+        if full_body_mode and fb is not None:
+            enabled, fb_id, fb_value = _slot_state(fb)[:3]
+            if enabled:
+                if fb_id:
+                    skip_body_pair = True
+                elif fb_value:
+                    skip_body_pair = bool(
+                        raw_fallback or self._resolve("full_body", None, fb_value, language)[1]
+                    )
+
+        covers_legs = False
+        lower = slots.get("lower_body")
+        if lower is not None and not skip_body_pair:
+            enabled, lower_id, lower_value = _slot_state(lower)[:3]
+            if enabled and (lower_id or lower_value):
+                covers_legs = self._resolve("lower_body", lower_id, lower_value, language)[2]
+
+        if skip_body_pair:
+            steps = program.without_body_pair
+        elif covers_legs:
+            steps = program.without_legs
+        else:
+            steps = program.all_steps
+
+        parts = [lead] if lead else []
+        append = parts.append
+        get_slot = slots.get
+        for name, memo in steps:
+            slot = get_slot(name)
+            if slot is None:
+                continue
+            # Inlined _slot_state for the common model/dataclass case.
+            if type(slot) is tuple:
+                state = slot
+            elif type(slot) is dict:
+                state = _slot_state(slot, require_color_enabled)
+            elif require_color_enabled:
+                state = (slot.enabled, slot.value_id, slot.value,
+                         slot.color if slot.color_enabled else None, slot.weight)
+            else:
+                state = (slot.enabled, slot.value_id, slot.value, slot.color, slot.weight)
+            part = memo.get(state)
+            if part:
+                append(part)
+            elif part is None:
+                text = self._fragment(name, state, language, format_weight, raw_fallback)
+                # False marks a memoized skip.
+                part = memo[state] = ((name, text) if with_names else text) if text else False
+                program.entries += 1
+                if part:
+                    append(part)
+        return parts
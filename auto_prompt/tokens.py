@@ -0,0 +1,256 @@
+"""
+CLIP token counting and token-budget fitting for prompt fragments.
+
+This is a self-contained copy for ComfyUI node usage. The merge table is
+looked up next to this file first, then in ComfyUI's bundled SD1 tokenizer
+(comfy/sd1_tokenizer/merges.txt); without either, counts are estimated.
+"""
+
+import gzip
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 77-token CLIP context minus the BOS/EOS tokens.
+CLIP_CHUNK_TOKENS = 75
+
+# Fragment separator ", " tokenizes to a single "," token.
+SEPARATOR_TOKENS = 1
+
+BREAK_KEYWORD = "BREAK"
+
+BUDGET_STRATEGIES = ("drop", "reorder", "break")
+
+DEFAULT_MERGES_PATH = Path(__file__).parent / "clip_bpe_merges.txt.gz"
+
+
+def find_merges_file() -> Optional[Path]:
+    """Locate a CLIP merges file bundled with the node or with ComfyUI."""
+    if DEFAULT_MERGES_PATH.exists():
+        return DEFAULT_MERGES_PATH
+    try:
+        import comfy  # type: ignore
+    except ImportError:
+        return None
+    comfy_merges = Path(comfy.__file__).parent / "sd1_tokenizer" / "merges.txt"
+    return comfy_merges if comfy_merges.exists() else None
+
+# Number of merges CLIP actually uses (49152 vocab - 256 bytes - 2 specials).
+_CLIP_MERGE_COUNT = 49152 - 256 - 2
+
+# CLIP pre-tokenizer pattern, translated from \p{L}/\p{N} classes to stdlib re.
+_PRETOKENIZE_RE = re.compile(
+    r"""'s|'t|'re|'ve|'m|'ll|'d|[^\W\d_]+|\d|(?:[^\s\w]|_)+""",
+    re.IGNORECASE,
+)
+
+
+def _bytes_to_unicode() -> Dict[int, str]:
+    """Map utf-8 bytes to printable unicode symbols (same table as CLIP)."""
+    bs = (
+        list(range(ord("!"), ord("~") + 1))
+        + list(range(ord("\xa1"), ord("\xac") + 1))
+        + list(range(ord("\xae"), ord("\xff") + 1))
+    )
+    cs = bs[:]
+    n = 0
+    for b in range(2 ** 8):
+        if b not in bs:
+            bs.append(b)
+            cs.append(2 ** 8 + n)
+            n += 1
+    return dict(zip(bs, [chr(c) for c in cs]))
+
+
+class ClipTokenCounter:
+    """
+    Counts CLIP tokens for prompt fragments.
+    Falls back to a length-based estimate when no merge table is available.
+    """
+
+    MAX_FRAGMENT_CACHE = 65536
+
+    def __init__(self, merges_path: Optional[Path] = None):
+        path = Path(merges_path) if merges_path else find_merges_file()
+        self.byte_encoder = _bytes_to_unicode()
+        self.bpe_ranks: Dict[Tuple[str, str], int] = {}
+        if path is not None and path.exists():
+            self.bpe_ranks = self._load_merges(path)
+        self.exact = bool(self.bpe_ranks)
+
+        self._word_cache: Dict[str, int] = {}
+        self._fragment_cache: Dict[str, int] = {}
+
+    @staticmethod
+    def _load_merges(path: Path) -> Dict[Tuple[str, str], int]:
+        """Load a CLIP merges file (gzipped or plain, header line first)."""
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+        merges = []
+        for line in lines[1:_CLIP_MERGE_COUNT + 1]:
+            pair = line.split()
+            if len(pair) == 2:
+                merges.append((pair[0], pair[1]))
+        return {pair: rank for rank, pair in enumerate(merges)}
+
+    def _bpe_length(self, word: str) -> int:
+        """Return the number of BPE symbols a pre-tokenized word encodes to."""
+        symbols = list(word[:-1]) + [word[-1] + "</w>"]
+        while len(symbols) > 1:
+            best_rank = None
+            best_index = -1
+            for i in range(len(symbols) - 1):
+                rank = self.bpe_ranks.get((symbols[i], symbols[i + 1]))
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank = rank
+                    best_index = i
+            if best_rank is None:
+                break
+            first, second = symbols[best_index], symbols[best_index + 1]
+            merged: List[str] = []
+            i = 0
+            while i < len(symbols):
+                if i < len(symbols) - 1 and symbols[i] == first and symbols[i + 1] == second:
+                    merged.append(first + second)
+                    i += 2
+                else:
+                    merged.append(symbols[i])
+                    i += 1
+            symbols = merged
+        return len(symbols)
+
+    def _estimate_length(self, word: str) -> int:
+        """Approximate token count when no merge table is loaded."""
+        if word.isascii():
+            return max(1, math.ceil(len(word) / 6))
+        # Non-Latin scripts are byte-level in CLIP; most CJK characters cost ~2.
+        return max(1, 2 * len(word))
+
+    def count_word(self, word: str) -> int:
+        """Return the token count of one pre-tokenized word."""
+        cached = self._word_cache.get(word)
+        if cached is not None:
+            return cached
+        if self.exact:
+            encoded = "".join(self.byte_encoder[b] for b in word.encode("utf-8"))
+            count = self._bpe_length(encoded)
+        else:
+            count = self._estimate_length(word)
+        self._word_cache[word] = count
+        return count
+
+    def count(self, text: str) -> int:
+        """Return the CLIP token count of a prompt fragment (no BOS/EOS)."""
+        cached = self._fragment_cache.get(text)
+        if cached is not None:
+            return cached
+        cleaned = " ".join(text.lower().split())
+        count = sum(self.count_word(w) for w in _PRETOKENIZE_RE.findall(cleaned))
+        if len(self._fragment_cache) >= self.MAX_FRAGMENT_CACHE:
+            self._fragment_cache.clear()
+        self._fragment_cache[text] = count
+        return count
+
+    def warm(self, texts: Iterable[str]) -> None:
+        """Precompute counts for a batch of fragments (e.g. catalog names)."""
+        for text in texts:
+            if text:
+                self.count(text)
+
+
+def count_prompt_tokens(fragments: Sequence[str], counter: ClipTokenCounter) -> int:
+    """Return total tokens of fragments joined with ", "."""
+    if not fragments:
+        return 0
+    return sum(counter.count(f) for f in fragments) + SEPARATOR_TOKENS * (len(fragments) - 1)
+
+
+def fit_prompt_to_budget(
+    fragments: Sequence[Tuple[str, str]],
+    token_budget: Optional[int],
+    counter: ClipTokenCounter,
+    priorities: Dict[str, int],
+    strategy: str = "drop",
+) -> List[str]:
+    """
+    Fit (slot_name, text) fragments into token_budget.
+
+    Strategies:
+        drop:    remove lowest-priority fragments until the prompt fits.
+        reorder: keep everything, but move high-priority fragments first so
+                 downstream truncation only loses low-priority slots.
+        break:   pack fragments into 75-token chunks separated by BREAK so no
+                 fragment straddles a chunk, dropping low-priority fragments
+                 if the chunks exceed the budget.
+
+    Fragments with no priority entry (e.g. the leading "1girl") are never
+    dropped. Returns the ordered list of prompt parts.
+    """
+    if strategy not in BUDGET_STRATEGIES:
+        raise ValueError(f"Unknown budget strategy '{strategy}'")
+
+    texts = [text for _, text in fragments]
+    if not token_budget or token_budget <= 0:
+        return texts
+
+    counts = [counter.count(text) for text in texts]
+    total = sum(counts) + SEPARATOR_TOKENS * (len(counts) - 1)
+    limit = min(token_budget, CLIP_CHUNK_TOKENS) if strategy == "break" else token_budget
+    if total <= limit:
+        return texts
+
+    if strategy == "reorder":
+        order = sorted(
+            range(len(fragments)),
+            key=lambda i: -priorities.get(fragments[i][0], math.inf),
+        )
+        return [texts[i] for i in order]
+
+    kept = list(range(len(fragments)))
+    # Lowest priority first; among equals, drop later fragments first.
+    drop_order = sorted(
+        (i for i in kept if fragments[i][0] in priorities),
+        key=lambda i: (priorities[fragments[i][0]], -i),
+    )
+
+    if strategy == "break":
+        max_chunks = max(1, token_budget // CLIP_CHUNK_TOKENS)
+        chunks = _pack_chunks(kept, counts)
+        while len(chunks) > max_chunks and drop_order:
+            kept.remove(drop_order.pop(0))
+            chunks = _pack_chunks(kept, counts)
+        parts: List[str] = []
+        for chunk in chunks:
+            if parts:
+                parts.append(BREAK_KEYWORD)
+            parts.extend(texts[i] for i in chunk)
+        return parts
+
+    while total > token_budget and drop_order:
+        index = drop_order.pop(0)
+        kept.remove(index)
+        total -= counts[index] + SEPARATOR_TOKENS
+    return [texts[i] for i in kept]
+
+
+def _pack_chunks(indices: List[int], counts: List[int]) -> List[List[int]]:
+    """Greedily pack fragment indices into CLIP chunks without splitting any."""
+    # Parts are joined with ", ", so each chunk may carry a separator on
+    # either side of the BREAK keyword.
+    capacity = CLIP_CHUNK_TOKENS - 2 * SEPARATOR_TOKENS
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for i in indices:
+        cost = counts[i] + (SEPARATOR_TOKENS if current else 0)
+        if current and used + cost > capacity:
+            chunks.append(current)
+            current, used = [], 0
+            cost = counts[i]
+        current.append(i)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,119 @@
+"""
+Command-line entry point for the generator package.
+
+Usage:
+    python -m generator batch --count 10000000 --seed 42 --workers 8 --out prompts.txt
+    python -m generator batch --count 10000000 --seed 42 --workers 8 --out prompts.txt --resume
+    python -m generator batch --count 10000000 --seed 42 --format parquet --out prompts_parquet/
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from .batch import BLOCK_SIZE, DEFAULT_SHARD_SIZE, BatchJob, run_batch
+from .export import EXPORT_FORMATS, ExportError
+
+
+def _print_progress(stats: dict) -> None:
+    print(
+        f"\r  shard {stats['shards_done']}/{stats['shards']}"
+        f"  {stats['prompts']:,} prompts"
+        f"  {stats['prompts_per_second']:,.0f} prompts/s",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    if args.count < 1:
+        print("ERROR: --count must be at least 1", file=sys.stderr)
+        return 2
+    if args.shard_size < 1 or args.shard_size % BLOCK_SIZE:
+        print(f"ERROR: --shard-size must be a positive multiple of {BLOCK_SIZE}", file=sys.stderr)
+        return 2
+
+    job = BatchJob(
+        count=args.count,
+        seed=args.seed,
+        shard_size=args.shard_size,
+        data_dir=str(args.data_dir) if args.data_dir else None,
+        palette_id=args.palette,
+        locked={name: True for name in args.lock},
+        slots={name: {"value_id": value_id} for name, value_id in args.lock.items()},
+        disabled_groups=args.disabled_groups,
+        full_body_mode=args.full_body_mode,
+        language=args.language,
+        dialect=args.syntax,
+        token_budget=args.token_budget,
+        budget_strategy=args.budget_strategy,
+        output_format=args.format,
+    )
+    try:
+        stats = run_batch(
+            job, args.out,
+            workers=args.workers,
+            resume=args.resume,
+            keep_shards=args.keep_shards,
+            progress=_print_progress,
+        )
+    except (ValueError, ExportError) as exc:
+        print(f"\nERROR: {exc}", file=sys.stderr)
+        return 1
+
+    print(file=sys.stderr)
+    print(
+        f"Wrote {args.count:,} prompts to {args.out} "
+        f"({stats['prompts']:,} generated in {stats['elapsed']:.1f}s, "
+        f"{stats['prompts_per_second']:,.0f} prompts/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _json_arg(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise argparse.ArgumentTypeError(f"invalid JSON: {exc}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m generator", description="Random character prompt generator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    batch = commands.add_parser("batch", help="Generate a seeded batch of prompts")
+    batch.add_argument("--count", type=int, required=True, help="Number of prompts")
+    batch.add_argument("--seed", type=int, default=0, help="Batch seed (default 0)")
+    batch.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    batch.add_argument("--out", type=Path, required=True,
+                       help="Output file for text, or output directory for columnar formats")
+    batch.add_argument("--format", default="text", choices=["text", *EXPORT_FORMATS],
+                       help="text (one prompt per line) or a columnar export format")
+    batch.add_argument("--resume", action="store_true", help="Reuse shards completed by an earlier run")
+    batch.add_argument("--keep-shards", action="store_true", help="Keep <out>.shards/ after merging")
+    batch.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                       help=f"Prompts per shard (multiple of {BLOCK_SIZE})")
+    batch.add_argument("--data-dir", type=Path, default=None, help="Catalog directory")
+    batch.add_argument("--palette", default=None, help="Palette id for clothing colors")
+    batch.add_argument("--lock", type=_json_arg, default={},
+                       help='Fixed slot values as JSON, e.g. \'{"hair_color": "black_hair"}\'')
+    batch.add_argument("--disabled-groups", type=_json_arg, default={},
+                       help='Excluded option groups as JSON, e.g. \'{"pose": ["sitting"]}\'')
+    batch.add_argument("--full-body-mode", action="store_true", help="full_body replaces upper/lower body")
+    batch.add_argument("--language", default="en", help="Output language (en, zh)")
+    batch.add_argument("--syntax", default="a1111", choices=["a1111", "novelai", "plain"],
+                       help="Weight syntax")
+    batch.add_argument("--token-budget", type=int, default=None, help="CLIP token budget per prompt")
+    batch.add_argument("--budget-strategy", default="drop", choices=["drop", "reorder", "break"])
+    batch.set_defaults(func=cmd_batch)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
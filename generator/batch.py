@@ -0,0 +1,340 @@
+"""
+Seeded batch generation of random characters.
+
+Record i of a batch is drawn from the random stream of block i // BLOCK_SIZE,
+seeded from (seed, block). Any block range can therefore be regenerated on
+its own, which is what lets streamed, sharded and resumed runs emit exactly
+the same records for the same seed.
+
+run_batch() drives the offline CLI (python -m generator batch): shards of
+whole blocks are written by a process pool and merged in order.
+"""
+
+import json
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .export import EXPORT_FORMATS, ColumnCoder, write_columns, write_dictionary
+
+# Records per independently seeded random stream.
+BLOCK_SIZE = 1024
+
+
+def block_rng(seed: int, block: int) -> random.Random:
+    """Return the random stream for one block of a seeded batch."""
+    return random.Random(f"{seed}:{block}")
+
+
+def _field(slot: Any, name: str, default: Any = None) -> Any:
+    """Read a slot field from a dict, dataclass or pydantic model."""
+    if isinstance(slot, dict):
+        return slot.get(name, default)
+    return getattr(slot, name, default)
+
+
+class CharacterSampler:
+    """
+    Samples whole characters the way /api/randomize-all does, with the
+    option and palette tables resolved once up front.
+
+    Locked slots keep the value given in slots; every other slot draws an
+    item (honoring disabled_groups) and, for colorable slots, a palette color.
+    In full_body_mode a freshly drawn full_body clears upper_body/lower_body
+    unless those are locked. Characters are {slot_name: state} where state is the
+    render pipeline's (enabled, value_id, value, color, weight) tuple.
+    """
+
+    def __init__(
+        self,
+        generator,
+        locked: Optional[Dict[str, bool]] = None,
+        slots: Optional[Dict[str, Any]] = None,
+        palette_id: Optional[str] = None,
+        disabled_groups: Optional[Dict[str, List[str]]] = None,
+        full_body_mode: bool = False,
+    ):
+        self.generator = generator
+        self.full_body_mode = full_body_mode
+        locked = locked or {}
+        slots = slots or {}
+        disabled_groups = disabled_groups or {}
+        palette = generator.palettes.get(palette_id) if palette_id else None
+        palette_colors = tuple(palette.get("colors", [])) if palette else ()
+
+        # (slot_name, fixed_state or None, enabled, weight, items, colors)
+        self._plan: List[Tuple[str, Optional[tuple], bool, float, tuple, tuple]] = []
+        self._clearable = set()
+        self._full_body_drawn = not locked.get("full_body", False)
+        for name, definition in generator.SLOT_DEFINITIONS.items():
+            slot = slots.get(name)
+            enabled = bool(_field(slot, "enabled", True))
+            weight = float(_field(slot, "weight", 1.0) or 1.0)
+            if locked.get(name, False):
+                fixed = (enabled, _field(slot, "value_id"), _field(slot, "value"),
+                         _field(slot, "color"), weight)
+                self._plan.append((name, fixed, enabled, weight, (), ()))
+                continue
+            items = tuple(
+                (opt.get("id"), opt.get("name"))
+                for opt in generator.get_sampling_options(name, disabled_groups.get(name, []))
+            )
+            colors = palette_colors if definition.get("has_color", False) else ()
+            self._plan.append((name, None, enabled, weight, items, colors))
+            if name in ("upper_body", "lower_body"):
+                self._clearable.add(name)
+
+    def sample(self, rng: random.Random) -> Dict[str, tuple]:
+        """Return {slot_name: (enabled, value_id, value, color, weight)} for one character."""
+        draw = rng.random
+        character: Dict[str, tuple] = {}
+        for name, fixed, enabled, weight, items, colors in self._plan:
+            if fixed is not None:
+                character[name] = fixed
+                continue
+            value_id, value = items[int(draw() * len(items))] if items else (None, None)
+            color = colors[int(draw() * len(colors))] if colors else None
+            character[name] = (enabled, value_id, value, color, weight)
+
+        if self.full_body_mode and self._full_body_drawn:
+            full_body = character.get("full_body")
+            if full_body and full_body[1]:
+                for name in self._clearable:
+                    enabled, _, _, color, weight = character[name]
+                    character[name] = (enabled, None, None, color, weight)
+        return character
+
+
+def generate_batch(
+    generator,
+    sampler: CharacterSampler,
+    count: int,
+    seed: int,
+    start: int = 0,
+    language: str = "en",
+    dialect: str = "a1111",
+    token_budget: Optional[int] = None,
+    budget_strategy: str = "drop",
+) -> Iterator[dict]:
+    """
+    Lazily yield records start .. count-1 of the batch for seed.
+
+    Each record is {"index", "prompt", "slots": {slot: value_id},
+    "colors": {slot: color}}; unset slots and colors are omitted.
+    Memory use is constant in count.
+    """
+    renderer = generator.get_renderer()
+    full_body_mode = sampler.full_body_mode
+    rng = None
+    for index in range(start, count):
+        if rng is None or index % BLOCK_SIZE == 0:
+            rng = block_rng(seed, index // BLOCK_SIZE)
+            # Advance to index when starting mid-block.
+            for _ in range(index % BLOCK_SIZE):
+                sampler.sample(rng)
+        character = sampler.sample(rng)
+        if token_budget:
+            parts = renderer.render_parts(character, language, full_body_mode, dialect)
+            prompt = ", ".join(generator.fit_to_token_budget(parts, token_budget, budget_strategy))
+        else:
+            prompt = renderer.render(character, language, full_body_mode, dialect)
+        yield {
+            "index": index,
+            "prompt": prompt,
+            "slots": {name: state[1] for name, state in character.items() if state[1]},
+            "colors": {name: state[3] for name, state in character.items() if state[3]},
+        }
+
+
+# Default records per shard file (a whole number of blocks).
+DEFAULT_SHARD_SIZE = 64 * BLOCK_SIZE
+
+# Leading "_" keeps it out of pyarrow.dataset discovery for columnar output.
+MANIFEST_NAME = "_manifest.json"
+
+
+@dataclass
+class BatchJob:
+    """Everything that determines the records of a batch run."""
+    count: int
+    seed: int
+    shard_size: int = DEFAULT_SHARD_SIZE
+    data_dir: Optional[str] = None
+    palette_id: Optional[str] = None
+    locked: Dict[str, bool] = field(default_factory=dict)
+    slots: Dict[str, dict] = field(default_factory=dict)
+    disabled_groups: Dict[str, List[str]] = field(default_factory=dict)
+    full_body_mode: bool = False
+    language: str = "en"
+    dialect: str = "a1111"
+    token_budget: Optional[int] = None
+    budget_strategy: str = "drop"
+    output_format: str = "text"  # "text" or an export.EXPORT_FORMATS key
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    def shard_ranges(self) -> List[Tuple[int, int]]:
+        """Return [start, stop) record ranges, one per shard."""
+        return [
+            (start, min(start + self.shard_size, self.count))
+            for start in range(0, self.count, self.shard_size)
+        ]
+
+    def make_generator(self):
+        from .prompt_generator import PromptGenerator
+        return PromptGenerator(data_dir=Path(self.data_dir) if self.data_dir else None)
+
+    def make_sampler(self, generator) -> CharacterSampler:
+        return CharacterSampler(
+            generator,
+            locked=self.locked,
+            slots=self.slots,
+            palette_id=self.palette_id,
+            disabled_groups=self.disabled_groups,
+            full_body_mode=self.full_body_mode,
+        )
+
+    def records(self, generator, sampler: CharacterSampler, start: int, stop: int) -> Iterator[dict]:
+        return generate_batch(
+            generator, sampler, stop, self.seed,
+            start=start,
+            language=self.language,
+            dialect=self.dialect,
+            token_budget=self.token_budget,
+            budget_strategy=self.budget_strategy,
+        )
+
+
+def shard_path(shard_dir: Path, index: int, output_format: str = "text") -> Path:
+    if output_format == "text":
+        return shard_dir / f"shard-{index:06d}.txt"
+    return shard_dir / f"part-{index:06d}{EXPORT_FORMATS[output_format]}"
+
+
+def write_shard(job: BatchJob, generator, sampler: CharacterSampler,
+                index: int, shard_dir: Path) -> int:
+    """
+    Write one shard (prompt lines, or a columnar file) and return its record
+    count. The file only appears under its final name once complete.
+    """
+    start, stop = job.shard_ranges()[index]
+    final = shard_path(shard_dir, index, job.output_format)
+    partial = final.with_name(final.name + ".part")
+    records = job.records(generator, sampler, start, stop)
+    if job.output_format == "text":
+        with open(partial, "w", encoding="utf-8", newline="\n") as f:
+            f.writelines(record["prompt"] + "\n" for record in records)
+    else:
+        write_columns(partial, job.output_format, ColumnCoder(generator), records, job.seed)
+    os.replace(partial, final)
+    return stop - start
+
+
+# Per-process generator/sampler for pool workers (built once per worker).
+_worker_state: Optional[Tuple[BatchJob, Any, CharacterSampler, Path]] = None
+
+
+def _init_worker(job: BatchJob, shard_dir: Path) -> None:
+    global _worker_state
+    generator = job.make_generator()
+    _worker_state = (job, generator, job.make_sampler(generator), shard_dir)
+
+
+def _run_shard(index: int) -> Tuple[int, int]:
+    job, generator, sampler, shard_dir = _worker_state
+    return index, write_shard(job, generator, sampler, index, shard_dir)
+
+
+def run_batch(
+    job: BatchJob,
+    out: Path,
+    workers: int = 1,
+    resume: bool = False,
+    keep_shards: bool = False,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Generate job into out, sharding records across worker processes.
+
+    Text shards are written to "<out>.shards/" and merged in order, so the
+    output is byte-identical for any worker count. Columnar formats write
+    part-NNNNNN files plus a dictionary table into the directory out. With
+    resume, shards completed by an earlier run with the same job are reused.
+    progress, if given, is called with a stats dict after each shard.
+    Returns the final stats.
+    """
+    out = Path(out)
+    columnar = job.output_format != "text"
+    if columnar and job.output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown output format '{job.output_format}'")
+    shard_dir = out if columnar else Path(f"{out}.shards")
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = shard_dir / MANIFEST_NAME
+    manifest = job.to_dict()
+
+    if resume and manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != manifest:
+            raise ValueError(f"Shards in {shard_dir} were built for a different job; cannot resume")
+    else:
+        for stale in [*shard_dir.glob("shard-*"), *shard_dir.glob("part-*")]:
+            stale.unlink()
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    ranges = job.shard_ranges()
+    pending = [
+        i for i in range(len(ranges))
+        if not shard_path(shard_dir, i, job.output_format).exists()
+    ]
+    stats = {
+        "shards": len(ranges),
+        "shards_done": len(ranges) - len(pending),
+        "prompts": 0,
+        "prompts_per_second": 0.0,
+        "elapsed": 0.0,
+    }
+    started = time.perf_counter()
+
+    def _done(count: int) -> None:
+        stats["shards_done"] += 1
+        stats["prompts"] += count
+        stats["elapsed"] = time.perf_counter() - started
+        stats["prompts_per_second"] = stats["prompts"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        if progress:
+            progress(dict(stats))
+
+    if columnar:
+        write_dictionary(shard_dir, job.output_format, ColumnCoder(job.make_generator()))
+
+    if workers <= 1:
+        generator = job.make_generator()
+        sampler = job.make_sampler(generator)
+        for index in pending:
+            _done(write_shard(job, generator, sampler, index, shard_dir))
+    elif pending:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(job, shard_dir)
+        ) as pool:
+            for future in as_completed([pool.submit(_run_shard, i) for i in pending]):
+                _done(future.result()[1])
+
+    if not columnar:
+        partial = out.with_name(out.name + ".part")
+        with open(partial, "wb") as merged:
+            for index in range(len(ranges)):
+                with open(shard_path(shard_dir, index), "rb") as shard:
+                    shutil.copyfileobj(shard, merged)
+        os.replace(partial, out)
+        if not keep_shards:
+            shutil.rmtree(shard_dir)
+
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
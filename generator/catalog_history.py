@@ -0,0 +1,120 @@
+"""
+Per-version diffs of slot options, so clients holding an older catalog can
+catch up with a small patch instead of re-downloading every option.
+
+CatalogHistory snapshots {slot: ordered item ids + per-item fingerprint}
+whenever it notices a new generator.catalog_version, and keeps the diff
+from the previous snapshot in a bounded ring. changes_since(version)
+composes the diffs after version, or returns None when version has
+already dropped out of the ring (the caller then sends everything).
+"""
+
+import hashlib
+import json
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+# Diffs retained; older clients get the full payload.
+DEFAULT_MAX_VERSIONS = 32
+
+# slot -> (item ids in option order, {item id: fingerprint})
+Snapshot = Dict[str, Tuple[Tuple[str, ...], Dict[str, bytes]]]
+
+
+class SlotChanges:
+    """Composed changes to one slot's options."""
+
+    __slots__ = ("changed", "removed", "reordered")
+
+    def __init__(self):
+        self.changed: Set[str] = set()  # Added or modified item ids
+        self.removed: Set[str] = set()
+        self.reordered = False  # Option order differs (always true when items are added or removed)
+
+    def apply(self, other: "SlotChanges") -> None:
+        """Fold a later diff into this one."""
+        for item_id in other.changed:
+            self.removed.discard(item_id)
+            self.changed.add(item_id)
+        for item_id in other.removed:
+            self.changed.discard(item_id)
+            self.removed.add(item_id)
+        self.reordered = self.reordered or other.reordered
+
+
+def _fingerprint(option: dict) -> bytes:
+    encoded = json.dumps(option, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=12).digest()
+
+
+def _diff(old: Snapshot, new: Snapshot) -> Dict[str, SlotChanges]:
+    changes: Dict[str, SlotChanges] = {}
+    for slot in old.keys() | new.keys():
+        old_order, old_prints = old.get(slot, ((), {}))
+        new_order, new_prints = new.get(slot, ((), {}))
+        slot_changes = SlotChanges()
+        slot_changes.removed = old_prints.keys() - new_prints.keys()
+        slot_changes.changed = {
+            item_id for item_id, fingerprint in new_prints.items()
+            if old_prints.get(item_id) != fingerprint
+        }
+        slot_changes.reordered = old_order != new_order
+        if slot_changes.changed or slot_changes.removed or slot_changes.reordered:
+            changes[slot] = slot_changes
+    return changes
+
+
+class CatalogHistory:
+    """Ring buffer of slot-option diffs keyed by catalog_version."""
+
+    def __init__(self, generator, max_versions: int = DEFAULT_MAX_VERSIONS):
+        self.generator = generator
+        self._lock = threading.Lock()
+        # (from_version, to_version, {slot: SlotChanges})
+        self._diffs: Deque[Tuple[int, int, Dict[str, SlotChanges]]] = deque(maxlen=max_versions)
+        self._version = generator.catalog_version
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Snapshot:
+        snapshot: Snapshot = {}
+        for slot in self.generator.SLOT_DEFINITIONS:
+            # The "en" view carries every language's names in its *_i18n maps.
+            options = self.generator.get_slot_options_localized(slot, "en")
+            order = tuple(opt["id"] for opt in options)
+            snapshot[slot] = (order, {opt["id"]: _fingerprint(opt) for opt in options})
+        return snapshot
+
+    def sync(self) -> int:
+        """Record a diff if the catalogs were reloaded; returns the current version."""
+        with self._lock:
+            version = self.generator.catalog_version
+            if version != self._version:
+                snapshot = self._take_snapshot()
+                self._diffs.append((self._version, version, _diff(self._snapshot, snapshot)))
+                self._snapshot = snapshot
+                self._version = version
+            return self._version
+
+    def changes_since(self, version: int) -> Optional[Dict[str, SlotChanges]]:
+        """
+        Return {slot: SlotChanges} between version and now ({} when current),
+        or None if version is unknown or older than the retained diffs.
+        """
+        current = self.sync()
+        if version == current:
+            return {}
+        with self._lock:
+            diffs: List[Dict[str, SlotChanges]] = []
+            found = False
+            for from_version, _, changes in self._diffs:
+                found = found or from_version == version
+                if found:
+                    diffs.append(changes)
+        if not found:
+            return None
+        composed: Dict[str, SlotChanges] = {}
+        for changes in diffs:
+            for slot, slot_changes in changes.items():
+                composed.setdefault(slot, SlotChanges()).apply(slot_changes)
+        return composed
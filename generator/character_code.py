@@ -0,0 +1,228 @@
+"""
+Compact character codes: a whole slot state packed into a short base64url string.
+
+Layout (all integers are unsigned LEB128 varints unless noted):
+    version (1 byte) | catalog fingerprint (2 bytes) | mode flags (1 byte)
+    | presence bitmap (1 bit per slot, SLOT_DEFINITIONS order)
+    | per present slot: flags (1 byte), item ordinal, color ordinal,
+      weight (1 byte, tenths) if FLAG_WEIGHT
+
+Ordinals are 1-based positions in get_slot_options()/individual_colors, with
+0 meaning "none". The fingerprint covers those tables, so a code created
+against a different catalog is rejected instead of decoding to wrong items.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+CODE_VERSION = 1
+
+FLAG_ENABLED = 0x01
+FLAG_LOCKED = 0x02
+FLAG_WEIGHT = 0x04
+
+MODE_FULL_BODY = 0x01
+MODE_UPPER_BODY = 0x02
+
+
+class CharacterCodeError(ValueError):
+    """Raised when a character code cannot be encoded or decoded."""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise CharacterCodeError("Character code is truncated")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _field(slot: Any, name: str, default: Any = None) -> Any:
+    """Read a slot field from a dict, dataclass or pydantic model."""
+    if isinstance(slot, dict):
+        return slot.get(name, default)
+    return getattr(slot, name, default)
+
+
+class CharacterCodec:
+    """Encodes/decodes character codes against one generator's catalogs."""
+
+    def __init__(self, generator):
+        self.generator = generator
+        self._catalog_version: Optional[int] = None
+        self._slot_names: List[str] = list(generator.SLOT_DEFINITIONS)
+        self._item_ids: Dict[str, List[str]] = {}
+        self._item_ordinals: Dict[str, Dict[str, int]] = {}
+        self._colors: List[str] = []
+        self._color_ordinals: Dict[str, int] = {}
+        self._fingerprint = b"\x00\x00"
+
+    def _ensure_tables(self) -> None:
+        """(Re)build ordinal tables when the catalog version changes."""
+        if self._catalog_version == self.generator.catalog_version:
+            return
+        digest = hashlib.blake2b(digest_size=2)
+        for slot_name in self._slot_names:
+            ids = [opt.get("id", "") for opt in self.generator.get_slot_options(slot_name)]
+            self._item_ids[slot_name] = ids
+            self._item_ordinals[slot_name] = {item_id: i + 1 for i, item_id in enumerate(ids)}
+            digest.update(slot_name.encode("utf-8"))
+            digest.update("\x1f".join(ids).encode("utf-8"))
+        self._colors = list(self.generator.individual_colors)
+        self._color_ordinals = {color: i + 1 for i, color in enumerate(self._colors)}
+        digest.update("\x1f".join(self._colors).encode("utf-8"))
+        self._fingerprint = digest.digest()
+        self._catalog_version = self.generator.catalog_version
+
+    def encode(
+        self,
+        slots: Dict[str, Any],
+        full_body_mode: bool = False,
+        upper_body_mode: bool = False,
+        locked: Optional[Dict[str, bool]] = None,
+    ) -> str:
+        """
+        Pack slot state into a code. Slots may be dicts, SlotConfig or SlotState.
+        Raises CharacterCodeError for values that are not in the catalogs.
+        """
+        self._ensure_tables()
+        locked = locked or {}
+        out = bytearray([CODE_VERSION])
+        out += self._fingerprint
+        out.append((MODE_FULL_BODY if full_body_mode else 0) | (MODE_UPPER_BODY if upper_body_mode else 0))
+
+        bitmap = bytearray((len(self._slot_names) + 7) // 8)
+        body = bytearray()
+        for index, slot_name in enumerate(self._slot_names):
+            slot = slots.get(slot_name)
+            is_locked = bool(locked.get(slot_name) or (slot is not None and _field(slot, "locked", False)))
+            if slot is None and not is_locked:
+                continue
+
+            item_ordinal = 0
+            color_ordinal = 0
+            enabled = True
+            weight = 1.0
+            if slot is not None:
+                enabled = bool(_field(slot, "enabled", True))
+                weight = float(_field(slot, "weight", 1.0) or 1.0)
+                item_ordinal = self._item_ordinal(slot_name, slot)
+                color = _field(slot, "color")
+                if color:
+                    color_ordinal = self._color_ordinals.get(color, 0)
+                    if not color_ordinal:
+                        raise CharacterCodeError(f"Color '{color}' is not in the catalog")
+
+            flags = (FLAG_ENABLED if enabled else 0) | (FLAG_LOCKED if is_locked else 0)
+            tenths = int(round(weight * 10))
+            if tenths != 10:
+                if not 0 <= tenths <= 255:
+                    raise CharacterCodeError(f"Weight {weight} for '{slot_name}' is out of range")
+                flags |= FLAG_WEIGHT
+            if flags == FLAG_ENABLED and not item_ordinal and not color_ordinal:
+                continue  # Default state; omit.
+
+            bitmap[index // 8] |= 1 << (index % 8)
+            body.append(flags)
+            _write_varint(body, item_ordinal)
+            _write_varint(body, color_ordinal)
+            if flags & FLAG_WEIGHT:
+                body.append(tenths)
+
+        out += bitmap
+        out += body
+        return base64.urlsafe_b64encode(bytes(out)).rstrip(b"=").decode("ascii")
+
+    def _item_ordinal(self, slot_name: str, slot: Any) -> int:
+        value_id = _field(slot, "value_id")
+        value = _field(slot, "value")
+        if not value_id and not value:
+            return 0
+        ordinals = self._item_ordinals.get(slot_name, {})
+        if value_id and value_id in ordinals:
+            return ordinals[value_id]
+        item = self.generator.resolve_slot_item(slot_name, value_id, value)
+        if item and item.get("id") in ordinals:
+            return ordinals[item["id"]]
+        raise CharacterCodeError(f"Value '{value_id or value}' for '{slot_name}' is not in the catalog")
+
+    def decode(self, code: str) -> Dict[str, Any]:
+        """
+        Unpack a code into {"slots", "locked", "full_body_mode", "upper_body_mode"}.
+        Slots are plain dicts with enabled/value_id/value/color/weight keys.
+        """
+        self._ensure_tables()
+        try:
+            data = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+        except (ValueError, TypeError):
+            raise CharacterCodeError("Character code is not valid base64url")
+        bitmap_len = (len(self._slot_names) + 7) // 8
+        if len(data) < 4 + bitmap_len:
+            raise CharacterCodeError("Character code is truncated")
+        if data[0] != CODE_VERSION:
+            raise CharacterCodeError(f"Unsupported character code version {data[0]}")
+        if data[1:3] != self._fingerprint:
+            raise CharacterCodeError("Character code was created for a different catalog")
+
+        modes = data[3]
+        bitmap = data[4:4 + bitmap_len]
+        pos = 4 + bitmap_len
+        slots: Dict[str, dict] = {}
+        locked: Dict[str, bool] = {}
+        for index, slot_name in enumerate(self._slot_names):
+            if not bitmap[index // 8] & (1 << (index % 8)):
+                continue
+            if pos >= len(data):
+                raise CharacterCodeError("Character code is truncated")
+            flags = data[pos]
+            pos += 1
+            item_ordinal, pos = _read_varint(data, pos)
+            color_ordinal, pos = _read_varint(data, pos)
+            weight = 1.0
+            if flags & FLAG_WEIGHT:
+                if pos >= len(data):
+                    raise CharacterCodeError("Character code is truncated")
+                weight = data[pos] / 10
+                pos += 1
+
+            ids = self._item_ids[slot_name]
+            if item_ordinal > len(ids) or color_ordinal > len(self._colors):
+                raise CharacterCodeError(f"Character code has an invalid ordinal for '{slot_name}'")
+            value_id = ids[item_ordinal - 1] if item_ordinal else None
+            item = self.generator.get_slot_item_by_id(slot_name, value_id) if value_id else None
+            slots[slot_name] = {
+                "enabled": bool(flags & FLAG_ENABLED),
+                "value_id": value_id,
+                "value": item.get("name") if item else None,
+                "color": self._colors[color_ordinal - 1] if color_ordinal else None,
+                "weight": weight,
+            }
+            if flags & FLAG_LOCKED:
+                locked[slot_name] = True
+
+        if pos != len(data):
+            raise CharacterCodeError("Character code has trailing data")
+        return {
+            "slots": slots,
+            "locked": locked,
+            "full_body_mode": bool(modes & MODE_FULL_BODY),
+            "upper_body_mode": bool(modes & MODE_UPPER_BODY),
+        }
@@ -0,0 +1,258 @@
+"""
+Columnar export of generated batches (Parquet, Arrow IPC or NumPy .npz).
+
+Each row is one record: index, seed, one integer-coded column per slot,
+a "<slot>_color" column per colorable slot and the rendered prompt. Codes
+are 1-based positions in get_slot_options() / the color table, with 0
+meaning "none". The dictionary table maps (column, code) back to item id
+and name.
+
+Arrow IPC files can be opened with pyarrow.memory_map for zero-copy reads;
+Parquet is smaller on disk. pyarrow and numpy are optional dependencies and
+are only imported when their format is used.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Format name -> file extension.
+EXPORT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow", "npz": ".npz"}
+
+# Rows per Arrow record batch / Parquet row group.
+DEFAULT_CHUNK_ROWS = 65536
+
+# Leading "_" keeps the table out of pyarrow.dataset discovery of part files.
+DICTIONARY_STEM = "_dictionary"
+
+
+class ExportError(RuntimeError):
+    """Raised when a columnar export cannot be written."""
+
+
+def _require(module: str, package: str):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        raise ExportError(f"This export format requires {package} (pip install {package})")
+
+
+class ColumnCoder:
+    """Integer code tables and column layout for one generator's catalogs."""
+
+    def __init__(self, generator):
+        self.slot_names: List[str] = list(generator.SLOT_DEFINITIONS)
+        self.color_slots: List[str] = [
+            name for name, definition in generator.SLOT_DEFINITIONS.items()
+            if definition.get("has_color", False)
+        ]
+        self.items: Dict[str, List[Tuple[str, str]]] = {
+            name: [(opt.get("id", ""), opt.get("name", "")) for opt in generator.get_slot_options(name)]
+            for name in self.slot_names
+        }
+        self._item_codes = {
+            name: {item_id: i + 1 for i, (item_id, _) in enumerate(items)}
+            for name, items in self.items.items()
+        }
+        # Individual colors first, then palette-only colors, so codes do not
+        # depend on which palette a batch used.
+        colors = list(generator.individual_colors)
+        known = set(colors)
+        extra = {c for p in generator.palettes.values() for c in p.get("colors", []) if c not in known}
+        self.colors: List[str] = colors + sorted(extra)
+        self._color_codes = {color: i + 1 for i, color in enumerate(self.colors)}
+
+        largest = max([len(self.colors)] + [len(items) for items in self.items.values()])
+        self.code_dtype = "uint16" if largest < 0xFFFF else "uint32"
+        self.color_columns = [f"{name}_color" for name in self.color_slots]
+        self.columns = ["index", "seed"] + self.slot_names + self.color_columns + ["prompt"]
+
+    def encode(self, records: List[dict], seed: int) -> Dict[str, list]:
+        """Return {column: values} for a chunk of generate_batch() records."""
+        columns: Dict[str, list] = {
+            "index": [r["index"] for r in records],
+            "seed": [seed] * len(records),
+            "prompt": [r["prompt"] for r in records],
+        }
+        for name in self.slot_names:
+            codes = self._item_codes[name]
+            try:
+                columns[name] = [codes[r["slots"][name]] if name in r["slots"] else 0 for r in records]
+            except KeyError as exc:
+                raise ExportError(f"Value {exc} for '{name}' is not in the catalog")
+        for name, column in zip(self.color_slots, self.color_columns):
+            codes = self._color_codes
+            try:
+                columns[column] = [codes[r["colors"][name]] if name in r["colors"] else 0 for r in records]
+            except KeyError as exc:
+                raise ExportError(f"Color {exc} for '{name}' is not in the color table")
+        return columns
+
+    def dictionary(self) -> Dict[str, list]:
+        """Return the long-form dictionary table {column, code, id, name}."""
+        table: Dict[str, list] = {"column": [], "code": [], "id": [], "name": []}
+        for name in self.slot_names:
+            for code, (item_id, item_name) in enumerate(self.items[name], start=1):
+                table["column"].append(name)
+                table["code"].append(code)
+                table["id"].append(item_id)
+                table["name"].append(item_name)
+        for column in self.color_columns:
+            for code, color in enumerate(self.colors, start=1):
+                table["column"].append(column)
+                table["code"].append(code)
+                table["id"].append(color)
+                table["name"].append(color)
+        return table
+
+    def dictionary_json(self) -> str:
+        """Compact {column: [id, ...]} form embedded in Arrow/Parquet metadata."""
+        mapping = {name: [item_id for item_id, _ in self.items[name]] for name in self.slot_names}
+        mapping.update({column: self.colors for column in self.color_columns})
+        return json.dumps(mapping, ensure_ascii=False, separators=(",", ":"))
+
+
+def _chunks(records: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk: List[dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def arrow_schema(coder: ColumnCoder):
+    """Return the pyarrow schema for coder's columns, with the dictionary in its metadata."""
+    pa = _require("pyarrow", "pyarrow")
+    code_type = pa.uint16() if coder.code_dtype == "uint16" else pa.uint32()
+    fields = [pa.field("index", pa.int64()), pa.field("seed", pa.int64())]
+    fields += [pa.field(name, code_type) for name in coder.slot_names + coder.color_columns]
+    fields.append(pa.field("prompt", pa.string()))
+    return pa.schema(fields, metadata={"dictionary": coder.dictionary_json()})
+
+
+def _record_batch(coder: ColumnCoder, schema, records: List[dict], seed: int):
+    pa = _require("pyarrow", "pyarrow")
+    columns = coder.encode(records, seed)
+    return pa.record_batch([columns[name] for name in schema.names], schema=schema)
+
+
+def write_columns(path: Path, fmt: str, coder: ColumnCoder, records: Iterable[dict],
+                  seed: int, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+    """
+    Write records to one columnar file and return the row count.
+
+    Arrow and Parquet are written one chunk_rows batch at a time. npz holds
+    a whole file in memory before saving, so keep npz files to shard size.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format '{fmt}'")
+    path = Path(path)
+    rows = 0
+
+    if fmt == "npz":
+        np = _require("numpy", "numpy")
+        parts: Dict[str, list] = {name: [] for name in coder.columns}
+        for chunk in _chunks(records, chunk_rows):
+            for name, values in coder.encode(chunk, seed).items():
+                parts[name].extend(values)
+            rows += len(chunk)
+        arrays = {
+            name: np.asarray(parts[name], dtype=np.int64 if name in ("index", "seed") else coder.code_dtype)
+            for name in coder.columns if name != "prompt"
+        }
+        # Prompts as concatenated UTF-8 plus row offsets, like an Arrow string column.
+        encoded = [p.encode("utf-8") for p in parts["prompt"]]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        arrays["prompt_bytes"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays["prompt_offsets"] = offsets
+        with open(path, "wb") as f:
+            np.savez(f, **arrays)
+        return rows
+
+    pa = _require("pyarrow", "pyarrow")
+    schema = arrow_schema(coder)
+    if fmt == "parquet":
+        pq = _require("pyarrow.parquet", "pyarrow")
+        writer = pq.ParquetWriter(str(path), schema)
+    else:
+        writer = pa.ipc.new_file(str(path), schema)
+    try:
+        for chunk in _chunks(records, chunk_rows):
+            writer.write_batch(_record_batch(coder, schema, chunk, seed))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+def write_dictionary(directory: Path, fmt: str, coder: ColumnCoder) -> Path:
+    """Write the dictionary table next to exported files; returns its path."""
+    path = Path(directory) / f"{DICTIONARY_STEM}{EXPORT_FORMATS[fmt]}"
+    table = coder.dictionary()
+    if fmt == "npz":
+        np = _require("numpy", "numpy")
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                column=np.array(table["column"], dtype=str),
+                code=np.array(table["code"], dtype=np.uint32),
+                id=np.array(table["id"], dtype=str),
+                name=np.array(table["name"], dtype=str),
+            )
+        return path
+
+    pa = _require("pyarrow", "pyarrow")
+    arrow_table = pa.table({
+        "column": pa.array(table["column"], pa.string()),
+        "code": pa.array(table["code"], pa.uint32()),
+        "id": pa.array(table["id"], pa.string()),
+        "name": pa.array(table["name"], pa.string()),
+    })
+    if fmt == "parquet":
+        _require("pyarrow.parquet", "pyarrow").write_table(arrow_table, str(path))
+    else:
+        with pa.ipc.new_file(str(path), arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+    return path
+
+
+class _ChunkSink:
+    """File-like sink that hands written bytes back to the caller."""
+
+    def __init__(self):
+        self.buffers: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        self.buffers.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.buffers)
+        self.buffers = []
+        return data
+
+
+def arrow_stream_chunks(coder: ColumnCoder, records: Iterable[dict], seed: int,
+                        chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[bytes]:
+    """Yield an Arrow IPC stream (schema, then one record batch per chunk)."""
+    pa = _require("pyarrow", "pyarrow")
+    schema = arrow_schema(coder)
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+    yield sink.take()
+    for chunk in _chunks(records, chunk_rows):
+        writer.write_batch(_record_batch(coder, schema, chunk, seed))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
@@ -10,6 +10,9 @@ from dataclasses import dataclass, field
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 
+from .render import PromptRenderer
+from .tokens import ClipTokenCounter, fit_prompt_to_budget
+
 
 @dataclass
 class SlotConfig:
@@ -132,6 +135,17 @@ class PromptGenerator:
     
     # Categories for section-based randomization
     CATEGORIES = ["appearance", "body", "expression", "clothing", "pose", "background"]
+
+    # Keep-priority when a prompt exceeds its token budget (higher survives longer).
+    SLOT_PRIORITY = {
+        "hair_color": 9, "eye_color": 9, "full_body": 9, "upper_body": 9, "lower_body": 9,
+        "hair_length": 8, "hair_style": 8, "expression": 8, "background": 8,
+        "pose": 7, "outerwear": 7, "view_angle": 6, "head": 6, "legs": 6, "feet": 6,
+        "body_type": 5, "skin": 5, "gesture": 5, "special_features": 5,
+        "neck": 4, "hands": 4, "accessory": 4, "eye_accessories": 4,
+        "hair_texture": 3, "eye_expression_quality": 3, "age_appearance": 3, "height": 3,
+        "waist": 2, "eye_shape": 2, "eye_state": 2, "eye_pupil_state": 1,
+    }
     
     def __init__(self, data_dir: Optional[Path] = None):
         """Initialize the generator with data directory."""
@@ -161,6 +175,12 @@ class PromptGenerator:
         self._lower_body_covers_legs_by_id_cache: Optional[Dict[str, bool]] = None
         self._pose_uses_hands_by_name_cache: Optional[Dict[str, bool]] = None
         self._pose_uses_hands_by_id_cache: Optional[Dict[str, bool]] = None
+        self._token_counter: Optional[ClipTokenCounter] = None
+        self._renderer: Optional[PromptRenderer] = None
+
+        # Monotonic counter bumped on every catalog (re)load; derived caches
+        # outside the generator compare against it to detect stale entries.
+        self.catalog_version = 0
         
         # Load all data
         self._load_catalogs()
@@ -203,8 +223,19 @@ class PromptGenerator:
                         }
                         self.individual_colors = data.get("individual_colors", [])
                         self.color_i18n = data.get("individual_colors_i18n", {})
+        self.catalog_version += 1
         self._reset_runtime_caches()
 
+    def reload_catalogs(self) -> None:
+        """Re-read all catalog JSON files from disk and bump catalog_version."""
+        self.catalogs = {}
+        self.palettes = {}
+        self.individual_colors = []
+        self.items_by_id = {}
+        self.item_id_by_name = {}
+        self.color_i18n = {}
+        self._load_catalogs()
+
     def _reset_runtime_caches(self) -> None:
         """Clear derived caches after catalog reload."""
         self._slot_options_cache.clear()
@@ -213,6 +244,39 @@ class PromptGenerator:
         self._lower_body_covers_legs_by_id_cache = None
         self._pose_uses_hands_by_name_cache = None
         self._pose_uses_hands_by_id_cache = None
+        self._token_counter = None
+
+    def get_token_counter(self) -> ClipTokenCounter:
+        """Return the CLIP token counter, precomputing counts for catalog names."""
+        if self._token_counter is None:
+            counter = ClipTokenCounter()
+            for items in self.items_by_id.values():
+                for item in items.values():
+                    counter.warm([item.get("name", "")])
+                    names = item.get("name_i18n")
+                    if isinstance(names, dict):
+                        counter.warm(n for n in names.values() if isinstance(n, str))
+            for color, names in self.color_i18n.items():
+                counter.warm([color])
+                if isinstance(names, dict):
+                    counter.warm(n for n in names.values() if isinstance(n, str))
+            self._token_counter = counter
+        return self._token_counter
+
+    def get_renderer(self) -> PromptRenderer:
+        """Return the shared prompt render pipeline for these catalogs."""
+        if self._renderer is None:
+            self._renderer = PromptRenderer(self)
+        return self._renderer
+
+    def fit_to_token_budget(self, parts: List[tuple], token_budget: Optional[int],
+                            budget_strategy: str = "drop") -> List[str]:
+        """Fit (slot_name, text) prompt parts into token_budget; no-op when unset."""
+        if not token_budget:
+            return [text for _, text in parts]
+        return fit_prompt_to_budget(
+            parts, token_budget, self.get_token_counter(), self.SLOT_PRIORITY, budget_strategy
+        )
 
     @classmethod
     def normalize_language(cls, language: Optional[str]) -> str:
@@ -525,19 +589,21 @@ class PromptGenerator:
             return group.strip()
         return None
 
-    def sample_slot(self, slot_name: str, disabled_groups: List[str] = None) -> Optional[dict]:
-        """Randomly sample an item for a slot, excluding disabled groups."""
+    def get_sampling_options(self, slot_name: str, disabled_groups: List[str] = None) -> List[dict]:
+        """Return the options sample_slot draws from, excluding disabled groups."""
         options = self.get_slot_options(slot_name)
-        if not options:
-            return None
-
         if disabled_groups:
             options = [opt for opt in options
                        if self._get_option_group(opt) not in disabled_groups]
-            if not options:
-                return None
+        return options
 
-        return random.choice(options)
+    def sample_slot(self, slot_name: str, disabled_groups: List[str] = None,
+                    rng: Optional[random.Random] = None) -> Optional[dict]:
+        """Randomly sample an item for a slot, excluding disabled groups."""
+        options = self.get_sampling_options(slot_name, disabled_groups)
+        if not options:
+            return None
+        return (rng or random).choice(options)
     
     def get_palette_list(self) -> List[dict]:
         """Get list of available palettes."""
@@ -547,7 +613,8 @@ class PromptGenerator:
         """Get palette names for dropdown."""
         return [p.get("name", p.get("id", "")) for p in self.palettes.values()]
     
-    def sample_color_from_palette(self, palette_id: str) -> Optional[str]:
+    def sample_color_from_palette(self, palette_id: str,
+                                  rng: Optional[random.Random] = None) -> Optional[str]:
         """Sample a random color from a palette."""
         if palette_id not in self.palettes:
             return None
@@ -555,7 +622,7 @@ class PromptGenerator:
         colors = palette.get("colors", [])
         if not colors:
             return None
-        return random.choice(colors)
+        return (rng or random).choice(colors)
     
     def sample_random_color(self) -> Optional[str]:
         """Sample a completely random color."""
@@ -649,72 +716,28 @@ class PromptGenerator:
             legs.value = None
             legs.value_id = None
     
-    def build_prompt(self, config: GeneratorConfig) -> str:
-        """Build the final prompt string from configuration."""
-        parts = []
-        
-        # Always start with "1girl"
-        parts.append("1girl")
-        
-        # Define slot order for prompt building
-        slot_order = [
-            # Appearance first
-            "hair_color", "hair_length", "hair_style", "hair_texture",
-            "eye_color", "eye_expression_quality", "eye_shape", "eye_pupil_state",
-            "eye_state", "eye_accessories",
-            # Body features
-            "body_type", "height", "skin", "age_appearance", "special_features",
-            # Expression
-            "expression",
-            # Clothing (specific order)
-            "full_body", "head", "neck", "upper_body", "waist", "lower_body",
-            "outerwear", "hands", "legs", "feet", "accessory",
-            # Pose
-            "view_angle", "pose", "gesture",
-            # Background
-            "background"
-        ]
-
-        lower_body_covers_legs = False
-        lower_body_slot = config.slots.get("lower_body")
-        if lower_body_slot and lower_body_slot.enabled and lower_body_slot.value:
-            lower_body_covers_legs = self.lower_body_value_covers_legs(lower_body_slot.value)
-        
-        for slot_name in slot_order:
-            if slot_name not in config.slots:
-                continue
-            
-            slot = config.slots[slot_name]
-            if not slot.enabled or not slot.value:
-                continue
-            
-            # Skip upper/lower body if full_body is active (unless they have values set)
-            if config.full_body_mode and slot_name in ["upper_body", "lower_body"]:
-                full_body_slot = config.slots.get("full_body")
-                if full_body_slot and full_body_slot.enabled and full_body_slot.value:
-                    # Skip if not explicitly overridden
-                    continue
-
-            # If lower body covers legs, skip legs slot to avoid overlap.
-            if slot_name == "legs" and lower_body_covers_legs:
-                continue
-            
-            # Build the prompt part
-            prompt_part = ""
-            
-            # Add color if enabled
-            if slot.color_enabled and slot.color:
-                prompt_part = f"{slot.color} {slot.value}"
-            else:
-                prompt_part = slot.value
-            
-            # Add weight if not default
-            if slot.weight != 1.0:
-                prompt_part = f"({prompt_part}:{slot.weight:.1f})"
-            
-            parts.append(prompt_part)
-        
-        return ", ".join(parts)
+    def build_prompt(self, config: GeneratorConfig, token_budget: Optional[int] = None,
+                     budget_strategy: str = "drop", dialect: str = "a1111") -> str:
+        """
+        Build the final prompt string from configuration.
+        When token_budget is set, low-priority slots are dropped/reordered or
+        BREAK is inserted so the prompt fits (see tokens.fit_prompt_to_budget).
+        dialect selects weight syntax: "a1111", "novelai" or "plain".
+        """
+        renderer = self.get_renderer()
+        if not token_budget:
+            return renderer.render(
+                config.slots, "en", config.full_body_mode, dialect,
+                require_color_enabled=True, raw_fallback=True,
+            )
+        parts = renderer.render_parts(
+            config.slots,
+            full_body_mode=config.full_body_mode,
+            dialect=dialect,
+            require_color_enabled=True,
+            raw_fallback=True,
+        )
+        return ", ".join(self.fit_to_token_budget(parts, token_budget, budget_strategy))
     
     def save_config(self, config: GeneratorConfig, filepath: Path) -> None:
         """Save configuration to a JSON file."""
@@ -0,0 +1,240 @@
+"""
+Typeahead search over every slot's options (English names, aliases and
+name_i18n), for /api/search.
+
+Each searchable string is normalized (NFKC, lowercase, "_"/"-" as spaces)
+and indexed twice:
+
+  - a prefix index: the normalized strings plus, for multi-word strings,
+    the suffixes starting at each later word ("long hair" also files
+    under "hair"), kept sorted so a query's prefix range is one bisect
+    away. The keys form a trie laid out in an array: every trie node is a
+    contiguous key range. A global index and one per slot are kept so a
+    slot filter never scans other slots.
+  - a character n-gram index (bigrams, plus single CJK characters) for
+    matches inside a string, which is what CJK input needs since it has
+    no word boundaries to anchor a prefix.
+
+Matches are ranked exact < prefix < word prefix < infix, then name <
+localized name < alias, then shorter strings and catalog order first, and
+deduplicated per option. The index is immutable; SearchIndexCache
+rebuilds it when generator.catalog_version moves.
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Match tiers, best first.
+MATCH_EXACT, MATCH_PREFIX, MATCH_WORD, MATCH_INFIX = range(4)
+MATCH_NAMES = ("exact", "prefix", "word", "infix")
+
+# Source of the matched string, best first.
+KIND_NAME, KIND_LOCALIZED, KIND_ALIAS = range(3)
+
+_SEPARATORS = re.compile(r"[\s_\-]+")
+
+# Sorts after every character a key can contain; closes a prefix range.
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    """Fold width, case and separators so "Long_Hair", "long-hair" and "ｌｏｎｇ hair" agree."""
+    return _SEPARATORS.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+
+
+def is_cjk(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x3040 <= code <= 0x30FF  # Hiragana, Katakana
+        or 0x3400 <= code <= 0x4DBF  # CJK Extension A
+        or 0x4E00 <= code <= 0x9FFF  # CJK Unified Ideographs
+        or 0xAC00 <= code <= 0xD7AF  # Hangul syllables
+        or 0xF900 <= code <= 0xFAFF  # CJK compatibility ideographs
+    )
+
+
+def ngrams(text: str) -> set:
+    """Bigrams of text, plus its CJK characters on their own."""
+    grams = {text[i:i + 2] for i in range(len(text) - 1)}
+    grams.update(char for char in text if is_cjk(char))
+    return grams
+
+
+class Term(NamedTuple):
+    """One searchable string of one option."""
+    slot: str
+    item_id: str
+    position: int  # Index in the slot's option list
+    text: str  # Normalized
+    kind: int
+
+
+class Hit(NamedTuple):
+    slot: str
+    item_id: str
+    position: int
+    matched: str
+    match: str  # One of MATCH_NAMES
+    kind: int
+
+
+class _PrefixIndex:
+    """Sorted (key, posting) arrays; a prefix query is a bisect range."""
+
+    __slots__ = ("keys", "postings")
+
+    def __init__(self, entries: List[Tuple[str, int]]):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        # Posting = rank of (term, word offset) in static rank order, see SearchIndex.
+        self.postings = [posting for _, posting in entries]
+
+    def range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self.keys, prefix)
+        return lo, bisect_left(self.keys, prefix + _PREFIX_END, lo)
+
+
+class SearchIndex:
+    """Immutable prefix + n-gram index over a generator's slot options."""
+
+    def __init__(self, generator):
+        self.catalog_version = generator.catalog_version
+        self.terms: List[Term] = []
+        for slot in generator.SLOT_DEFINITIONS:
+            for position, item in enumerate(generator.get_slot_options(slot)):
+                item_id = item.get("id")
+                if not item_id:
+                    continue
+                seen = set()
+                sources = [(item.get("name") or item_id, KIND_NAME)]
+                names = item.get("name_i18n")
+                if isinstance(names, dict):
+                    sources += [(name, KIND_LOCALIZED) for name in names.values() if isinstance(name, str)]
+                sources += [(alias, KIND_ALIAS) for alias in item.get("aliases") or () if isinstance(alias, str)]
+                for text, kind in sources:
+                    text = normalize(text)
+                    if text and text not in seen:
+                        seen.add(text)
+                        self.terms.append(Term(slot, item_id, position, text, kind))
+
+        # Prefix postings: (term, offset of the word the key starts at).
+        # Ranked once, statically: whole strings before word suffixes, then
+        # kind, length and catalog order; a query then just takes the
+        # smallest postings in its range.
+        starts = []
+        for term_id, term in enumerate(self.terms):
+            starts.append((term_id, 0))
+            starts += [(term_id, m.end()) for m in re.finditer(" ", term.text)]
+        starts.sort(key=lambda s: (s[1] > 0, self.terms[s[0]].kind, len(self.terms[s[0]].text), s[0]))
+        self.starts = starts
+
+        global_entries: List[Tuple[str, int]] = []
+        slot_entries: Dict[str, List[Tuple[str, int]]] = {}
+        for posting, (term_id, offset) in enumerate(starts):
+            term = self.terms[term_id]
+            entry = (term.text[offset:], posting)
+            global_entries.append(entry)
+            slot_entries.setdefault(term.slot, []).append(entry)
+        self.prefix = _PrefixIndex(global_entries)
+        self.slot_prefix = {slot: _PrefixIndex(entries) for slot, entries in slot_entries.items()}
+
+        # n-gram -> term ids (ascending, i.e. catalog order)
+        self.grams: Dict[str, List[int]] = {}
+        for term_id, term in enumerate(self.terms):
+            for gram in ngrams(term.text):
+                self.grams.setdefault(gram, []).append(term_id)
+
+    def search(self, query: str, slot: Optional[str] = None, limit: int = 20) -> List[Hit]:
+        """Return up to limit options matching query, best first, one hit per option."""
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+        hits: List[Hit] = []
+        seen = set()
+
+        def add(term: Term, match: int) -> bool:
+            key = (term.slot, term.item_id)
+            if key not in seen:
+                seen.add(key)
+                hits.append(Hit(term.slot, term.item_id, term.position, term.text, MATCH_NAMES[match], term.kind))
+            return len(hits) >= limit
+
+        index = self.prefix if slot is None else self.slot_prefix.get(slot)
+        if index is None:
+            return []
+        lo, hi = index.range(query)
+        # Keys equal to query sort first in the range; a whole-string one is exact.
+        exact = lo
+        while exact < hi and index.keys[exact] == query:
+            exact += 1
+        for posting in sorted(index.postings[lo:exact]):
+            term_id, offset = self.starts[posting]
+            if not offset and add(self.terms[term_id], MATCH_EXACT):
+                return hits
+        postings = index.postings[lo:hi]
+        # Static rank order puts prefix before word matches. Options can have
+        # several postings in range, so over-fetch, then finish if needed.
+        wanted = limit * 4
+        if len(postings) <= wanted:
+            batches = [sorted(postings)]
+        else:
+            head = heapq.nsmallest(wanted, postings)
+            # The rest is only sorted if the head holds fewer than limit options.
+            batches = [head, lambda: sorted(postings)[wanted:]]
+        for batch in batches:
+            for posting in batch() if callable(batch) else batch:
+                term_id, offset = self.starts[posting]
+                if add(self.terms[term_id], MATCH_WORD if offset else MATCH_PREFIX):
+                    return hits
+
+        infix = self._infix(query, slot)
+        for term in infix:
+            if add(term, MATCH_INFIX):
+                break
+        return hits
+
+    def _infix(self, query: str, slot: Optional[str]) -> List[Term]:
+        """Terms containing query anywhere, ranked like prefix matches."""
+        grams = ngrams(query)
+        if not grams:
+            return []  # One Latin character: prefix matches only
+        lists = []
+        for gram in grams:
+            term_ids = self.grams.get(gram)
+            if not term_ids:
+                return []
+            lists.append(term_ids)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for term_ids in lists[1:]:
+            candidates.intersection_update(term_ids)
+            if not candidates:
+                return []
+        matches = [
+            term_id for term_id in candidates
+            if query in self.terms[term_id].text and (slot is None or self.terms[term_id].slot == slot)
+        ]
+        matches.sort(key=lambda term_id: (self.terms[term_id].kind, len(self.terms[term_id].text), term_id))
+        return [self.terms[term_id] for term_id in matches]
+
+
+class SearchIndexCache:
+    """The SearchIndex for the generator's current catalogs, built on first use."""
+
+    def __init__(self, generator):
+        self.generator = generator
+        self._index: Optional[SearchIndex] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> SearchIndex:
+        index = self._index
+        if index is not None and index.catalog_version == self.generator.catalog_version:
+            return index
+        with self._lock:
+            if self._index is None or self._index.catalog_version != self.generator.catalog_version:
+                self._index = SearchIndex(self.generator)
+            return self._index
@@ -4,10 +4,17 @@ Entry point for the FastAPI web UI.
 
 Usage:
     python run_Fastapi.py
+    python run_Fastapi.py --dev    # serve web/static from disk, uncached
+    python run_Fastapi.py --prod --host 0.0.0.0 --port 8000 --workers 4
 
-Finds a free port, launches uvicorn, and opens the browser automatically.
+By default finds a free port, launches uvicorn with auto-reload, and opens
+the browser. --prod instead preloads the app once and forks workers that
+share it (see web/prefork.py); send SIGHUP for a graceful restart that
+also reloads the catalogs, SIGTERM to drain and stop.
 """
 
+import argparse
+import os
 import sys
 import socket
 import webbrowser
@@ -38,13 +45,90 @@ def open_browser(port):
     webbrowser.open(f"http://127.0.0.1:{port}")
 
 
+def preload_warmup():
+    """Warm the fork-safe caches in the parent so every worker inherits them."""
+    from web.routes.warmup import PRELOAD_STEPS, warmup
+    warmup.run(PRELOAD_STEPS)
+
+
+def reload_catalogs():
+    """Graceful-restart hook: reload and re-warm catalogs in the parent before forking new workers."""
+    from web.routes.deps import catalog_history, gen
+    from web.routes.warmup import warmup
+    gen.reload_catalogs()
+    catalog_history.sync()
+    warmup.reset()
+    preload_warmup()
+
+
+def run_prod(args):
+    """Serve without reload or browser, with preloaded forked workers."""
+    workers = args.workers or os.cpu_count() or 1
+    port = args.port or 8000
+    print(f"Serving on http://{args.host}:{port} with {workers} worker(s)")
+    from web.prefork import PreforkServer, fork_supported
+    if not fork_supported():
+        # No fork (Windows): uvicorn spawns workers that each load the app.
+        import uvicorn
+        uvicorn.run(
+            "web.server:app",
+            host=args.host,
+            port=port,
+            workers=workers,
+            timeout_keep_alive=args.keep_alive,
+            backlog=args.backlog,
+            timeout_graceful_shutdown=args.graceful_timeout,
+        )
+        return
+    PreforkServer(
+        "web.server:app",
+        host=args.host,
+        port=port,
+        workers=workers,
+        keep_alive=args.keep_alive,
+        backlog=args.backlog,
+        graceful_timeout=args.graceful_timeout,
+        on_preload=preload_warmup,
+        on_restart=reload_catalogs,
+    ).run()
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the FastAPI web UI")
+    parser.add_argument("--dev", action="store_true",
+                      help="Serve static files from disk without fingerprinting or caching")
+    parser.add_argument("--prod", action="store_true",
+                      help="Production mode: preloaded forked workers, no reload, no browser")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (--prod)")
+    parser.add_argument("--port", type=int, default=None,
+                      help="Port (--prod: default 8000; otherwise the first free port from 8000)")
+    parser.add_argument("--workers", type=int, default=None,
+                      help="Worker processes (--prod; default: CPU count)")
+    parser.add_argument("--keep-alive", type=int, default=5,
+                      help="Seconds to keep idle HTTP connections open (--prod)")
+    parser.add_argument("--backlog", type=int, default=2048,
+                      help="Pending connection queue length (--prod)")
+    parser.add_argument("--graceful-timeout", type=int, default=30,
+                      help="Seconds workers may spend draining on restart/stop (--prod)")
+    args = parser.parse_args()
+    if args.dev and args.prod:
+        parser.error("--dev and --prod are mutually exclusive")
+
+    if args.dev:
+        from web.assets import DEV_ASSETS_ENV
+        # Read by web.server in the (reloaded) server process.
+        os.environ[DEV_ASSETS_ENV] = "1"
+
     print("=" * 60)
     print("Random Character Prompt Generator — FastAPI")
     print("=" * 60)
     print()
 
-    port = find_free_port()
+    if args.prod:
+        run_prod(args)
+        return
+
+    port = args.port or find_free_port()
     if port is None:
         print("ERROR: No available port in range 8000-8099")
         sys.exit(1)
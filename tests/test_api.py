@@ -141,6 +141,549 @@ class TestPromptAPI:
         assert ":1.5" in data["prompt"] or "(blue blouse:1.5)" in data["prompt"]
 
 
+class TestPromptCache:
+    """Test the rendered prompt cache behind /api/generate-prompt."""
+
+    def _generate(self, weight=1.0):
+        return client.post(
+            "/api/generate-prompt",
+            json={
+                "slots": {
+                    "hair_style": {"enabled": True, "value": "ponytail", "weight": weight}
+                },
+                "full_body_mode": False,
+                "upper_body_mode": False,
+                "output_language": "en"
+            }
+        )
+
+    def test_repeat_request_hits_cache(self):
+        """Identical slot state is served from the cache on repeat."""
+        from web.routes.deps import prompt_cache
+        prompt_cache.clear()
+
+        first = self._generate(weight=1.3).json()["prompt"]
+        second = self._generate(weight=1.3).json()["prompt"]
+        assert first == second
+
+        stats = client.get("/api/cache/stats").json()["prompt_cache"]
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_catalog_reload_invalidates(self):
+        """Reloading catalogs drops every cached prompt."""
+        from web.routes.deps import gen, prompt_cache
+        prompt_cache.clear()
+
+        self._generate()
+        gen.reload_catalogs()
+        self._generate()
+
+        stats = prompt_cache.stats()
+        assert stats["misses"] == 2
+        assert stats["invalidations"] == 1
+        assert stats["catalog_version"] == gen.catalog_version
+
+    def test_bounded_entries(self):
+        """The cache evicts least recently used entries past its limit."""
+        from web.routes.cache import PromptCache
+        from web.routes.deps import gen
+        from web.routes.prompt import SlotState
+
+        cache = PromptCache(gen, max_entries=2)
+        for weight in (1.1, 1.2, 1.3):
+            key = cache.make_key({"hair_style": SlotState(weight=weight)}, False, False, "en")
+            cache.get_or_build(key, lambda: "prompt")
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+
+
+class TestCharacterCodeAPI:
+    """Test compact character codes on the generate/randomize routes."""
+
+    def test_generate_returns_code_that_round_trips(self):
+        slots = {"hair_style": {"enabled": False, "weight": 1.2}}
+        data = client.post("/api/generate-prompt", json={"slots": slots}).json()
+        assert data["code"]
+
+        again = client.post("/api/generate-prompt", json={"code": data["code"]}).json()
+        assert again["prompt"] == data["prompt"]
+        assert again["code"] == data["code"]
+
+    def test_invalid_code_is_422(self):
+        response = client.post("/api/generate-prompt", json={"code": "!!not-a-code"})
+        assert response.status_code == 422
+
+    def test_randomize_all_compact(self):
+        response = client.post(
+            "/api/randomize-all",
+            json={"compact": True, "include_prompt": True}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert "results" not in data
+        assert "prompt" in data
+        assert "code" in data
+
+
+class TestCatalogPayloads:
+    """Test serialized, precompressed /api/slots and /api/palettes."""
+
+    def test_etag_and_not_modified(self):
+        first = client.get("/api/slots", headers={"Accept-Encoding": "identity"})
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith('W/')
+        again = client.get("/api/slots", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+
+    def test_gzip_variant(self):
+        response = client.get("/api/palettes", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert "palettes" in response.json()
+        plain = client.get("/api/palettes", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] != response.headers["etag"]
+
+    def test_serialized_once_per_language_and_version(self):
+        from web.routes.deps import gen, payload_cache
+        payload_cache.clear()
+        builds = payload_cache.builds
+        client.get("/api/slots?lang=zh")
+        client.get("/api/slots?lang=zh-CN")
+        client.get("/api/slots")
+        assert payload_cache.builds == builds + 2
+        gen.reload_catalogs()
+        client.get("/api/slots")
+        assert payload_cache.builds == builds + 3
+
+
+class TestSlotsDeltaSync:
+    """Test /api/slots?since= patches."""
+
+    def test_current_version_gets_empty_patch(self):
+        version = client.get("/api/slots").json()["catalog_version"]
+        data = client.get(f"/api/slots?since={version}").json()
+        assert data == {
+            "catalog_version": version,
+            "since": version,
+            "patch": {},
+            "lower_body_covers_legs_by_id": data["lower_body_covers_legs_by_id"],
+            "pose_uses_hands_by_id": data["pose_uses_hands_by_id"],
+        }
+
+    def test_reload_then_patch(self):
+        version = client.get("/api/slots").json()["catalog_version"]
+        reloaded = client.post("/api/catalog/reload").json()["catalog_version"]
+        assert reloaded > version
+        data = client.get(f"/api/slots?since={version}").json()
+        assert data["catalog_version"] == reloaded
+        assert data["patch"] == {}  # Same files on disk
+
+    def test_unknown_version_gets_full_payload(self):
+        data = client.get("/api/slots?since=-1").json()
+        assert "slots" in data and "patch" not in data
+
+
+class TestSlotOptionPages:
+    """Test paginated option and section endpoints."""
+
+    @pytest.fixture
+    def catalog(self, test_generator, monkeypatch):
+        from web.routes import options
+        monkeypatch.setattr(options, "gen", test_generator)
+        monkeypatch.setattr(options, "option_tables", options.OptionTables(test_generator))
+        return test_generator
+
+    def test_cursor_walks_all_options(self, catalog):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 1, "fields": "id,localized_name"}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/api/slots/expression/options", params=params).json()
+            assert data["total"] == 2
+            seen += data["options"]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [{"id": "smile", "localized_name": "smile"}, {"id": "neutral", "localized_name": "neutral"}]
+
+    def test_group_filter(self, catalog):
+        data = client.get("/api/slots/hair_style/options", params={"group": "style"}).json()
+        assert [o["id"] for o in data["options"]] == ["ponytail"]
+        assert client.get("/api/slots/hair_style/options", params={"group": "nope"}).json()["total"] == 0
+
+    def test_stale_cursor_and_bad_input(self, catalog):
+        cursor = client.get("/api/slots/expression/options", params={"limit": 1}).json()["next_cursor"]
+        catalog.reload_catalogs()
+        assert client.get("/api/slots/expression/options", params={"cursor": cursor}).status_code == 409
+        assert client.get("/api/slots/expression/options", params={"cursor": "!!"}).status_code == 400
+        assert client.get("/api/slots/expression/options", params={"fields": "id,price"}).status_code == 400
+        assert client.get("/api/slots/nope/options").status_code == 404
+
+    def test_section_first_pages(self, catalog):
+        data = client.get("/api/sections/body", params={"limit": 1, "fields": "id"}).json()
+        assert list(data["slots"]) == data["layout"]["slots"]
+        assert data["slots"]["expression"]["options"] == [{"id": "smile"}]
+        assert data["slots"]["expression"]["next_cursor"]
+        assert client.get("/api/sections/nope").status_code == 404
+
+
+class TestSessionChannel:
+    """Test the /ws session channel."""
+
+    def test_state_then_diffs(self):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"op": "state", "id": 1})
+            first = ws.receive_json()
+            assert first["id"] == 1
+            assert "hair_color" in first["changed"] and "prompt" in first
+
+            ws.send_json({"op": "set", "id": 2, "slot": "hair_color", "weight": 1.3})
+            reply = ws.receive_json()
+            assert list(reply["changed"]) == ["hair_color"]
+            assert reply["changed"]["hair_color"]["weight"] == 1.3
+
+            ws.send_json({"op": "language", "id": 3, "lang": "zh"})
+            reply = ws.receive_json()
+            assert reply["changed"] == {} and "prompt" not in reply  # Same text in both languages
+
+    def test_lock_survives_randomize(self):
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"op": "set", "slot": "hair_color", "value": "black hair"})
+            ws.receive_json()
+            ws.send_json({"op": "lock", "slot": "hair_color"})
+            assert ws.receive_json()["locked"] == {"hair_color": True}
+            ws.send_json({"op": "randomize", "section": "appearance"})
+            assert "hair_color" not in ws.receive_json()["changed"]
+
+    def test_rejected_ops_leave_state(self):
+        with client.websocket_connect("/ws") as ws:
+            for message in (
+                {"op": "fly"},
+                {"op": "set", "slot": "nope"},
+                {"op": "settings", "prompt_syntax": "bogus"},
+                {"op": "randomize", "section": "nope"},
+                {"op": "load", "code": "!!!"},
+            ):
+                ws.send_json({**message, "id": 9})
+                reply = ws.receive_json()
+                assert reply["id"] == 9 and "error" in reply
+            ws.send_json({"op": "state"})
+            assert all(state["value_id"] is None for state in ws.receive_json()["changed"].values())
+
+
+class TestOffloadPool:
+    """Test CPU-heavy routes running on the offload lanes."""
+
+    def test_parse_runs_on_process_lane(self):
+        before = client.get("/api/offload/stats").json()["process"]["completed"]
+        response = client.post("/api/parse-prompt", json={"prompt": "1girl, smile"})
+        assert response.status_code == 200
+        stats = client.get("/api/offload/stats").json()
+        assert stats["process"]["completed"] == before + 1
+        assert stats["process"]["pending"] == 0
+        assert stats["process"]["workers"] >= 1
+
+    def test_full_lane_returns_503(self, monkeypatch):
+        from web.routes.deps import offload
+        monkeypatch.setattr(offload.lanes["thread"], "max_pending", 0)
+        response = client.post("/api/randomize-all", json={})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/api/offload/stats").json()["thread"]["rejected"] >= 1
+
+    def test_workers_follow_catalog_reload(self):
+        from web.routes.deps import gen
+        gen.reload_catalogs()
+        assert client.post("/api/parse-prompt", json={"prompt": "smile"}).status_code == 200
+
+
+class TestAdmissionControl:
+    """Test per-endpoint concurrency gates and their 503 fast-fail."""
+
+    def test_gate_queues_then_rejects(self):
+        import asyncio
+        from web.routes.admission import AdmissionRejected, CostClass, Gate
+
+        async def scenario():
+            gate = Gate("POST /x", CostClass("test", max_concurrent=1, max_waiting=1, queue_timeout=0.05, retry_after=3))
+            await gate.acquire()
+            waiter = asyncio.ensure_future(gate.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected):  # Queue already full
+                await gate.acquire()
+            gate.release()  # Slot handed to the waiter
+            await waiter
+            assert gate.active == 1
+            with pytest.raises(AdmissionRejected) as exc:  # Waits past the queue-time budget
+                await gate.acquire()
+            assert exc.value.retry_after == 3
+            gate.release()
+            return gate.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["active"] == 0
+        assert stats["waiting"] == 0
+        assert stats["admitted"] == 2
+        assert stats["rejected_full"] == 1
+        assert stats["rejected_timeout"] == 1
+
+    def test_saturated_endpoint_returns_503(self, monkeypatch):
+        from web.routes.admission import CostClass, Gate, admission
+        monkeypatch.setitem(
+            admission.gates, "POST /parse-prompt",
+            Gate("POST /parse-prompt", CostClass("heavy", max_concurrent=0, max_waiting=0, queue_timeout=0, retry_after=2)),
+        )
+        response = client.post("/api/parse-prompt", json={"prompt": "smile"})
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "2"
+        # Cheap endpoints are not gated
+        assert client.post("/api/generate-prompt", json={"slots": {}}).status_code == 200
+        assert client.get("/api/admission/stats").json()["POST /parse-prompt"]["rejected_full"] == 1
+
+    def test_slot_released_after_request(self):
+        assert client.post("/api/parse-prompt", json={"prompt": "smile"}).status_code == 200
+        stats = client.get("/api/admission/stats").json()["POST /parse-prompt"]
+        assert stats["cost_class"] == "heavy"
+        assert stats["active"] == 0
+
+
+class TestFastJSONPath:
+    """Test the lean body/response path of the hot routes."""
+
+    BODIES = [
+        (b'{"slots": {"hair_color": {"weight": "heavy"}}}', "application/json"),
+        (b'{"slots": [1, 2]', "application/json"),
+        (b'null', "application/json"),
+        (b'', "application/json"),
+        (b'{"prompt_syntax": "sdxl", "token_budget": "x"}', "application/json"),
+        (b'{"slots": {}}', "text/plain"),
+        (b'{"slots": {"a": {"enabled": "yes"}}}', "application/vnd.api+json"),
+    ]
+
+    def test_errors_match_standard_body_params(self):
+        from fastapi import FastAPI
+        from web.routes.prompt import GenerateRequest
+
+        reference = FastAPI()
+
+        @reference.post("/api/generate-prompt")
+        async def standard(req: GenerateRequest):
+            return {}
+
+        reference_client = TestClient(reference)
+        for body, content_type in self.BODIES:
+            headers = {"content-type": content_type}
+            expected = reference_client.post("/api/generate-prompt", content=body, headers=headers)
+            actual = client.post("/api/generate-prompt", content=body, headers=headers)
+            assert actual.status_code == expected.status_code, body
+            if expected.status_code == 422:
+                assert actual.json() == expected.json(), body
+
+    def test_lax_python_values_still_accepted(self):
+        from web.routes.fastjson import _slow_parse
+        from web.routes.prompt import SlotState
+        # Valid for model_validate but not model_validate_json
+        assert _slow_parse(SlotState, b'{"weight": 1}', "application/json").weight == 1.0
+
+    def test_responses_are_plain_json(self):
+        from web.routes.fastjson import dumps
+        assert dumps({"prompt": "1girl, 黒髪", "n": [1, 2.5, None]}) == json.dumps(
+            {"prompt": "1girl, 黒髪", "n": [1, 2.5, None]}, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        response = client.post("/api/randomize-all", json={"include_prompt": True})
+        assert response.headers["content-type"] == "application/json"
+        assert "prompt" in response.json()
+
+    def test_openapi_documents_request_bodies(self):
+        paths = client.get("/openapi.json").json()["paths"]
+        schema = paths["/api/parse-prompt"]["post"]["requestBody"]["content"]["application/json"]["schema"]
+        assert "prompt" in schema["properties"]
+
+
+class TestWarmup:
+    """Test startup warmup and the readiness route."""
+
+    def test_steps_run_once_and_report_timings(self):
+        from web.routes.warmup import Warmup
+        calls = []
+        warmup = Warmup([("a", lambda: calls.append("a")), ("b", lambda: calls.append("b"))])
+        warmup.run(["a"])
+        assert not warmup.ready
+        assert warmup.status()["pending"] == ["b"]
+        warmup.start("blocking")
+        assert calls == ["a", "b"]
+        status = warmup.status()
+        assert status["ready"] and status["pending"] == []
+        assert set(status["steps"]) == {"a", "b"}
+
+    def test_failed_step_does_not_block_readiness(self):
+        from web.routes.warmup import Warmup
+
+        def broken():
+            raise RuntimeError("no catalogs")
+
+        warmup = Warmup([("broken", broken)])
+        warmup.start("background")
+        assert warmup.wait(5)
+        assert warmup.status()["errors"] == {"broken": "no catalogs"}
+
+    def test_ready_endpoint(self, monkeypatch):
+        from web.routes import warmup as warmup_module
+        pending = warmup_module.Warmup([("noop", lambda: None)])
+        monkeypatch.setattr(warmup_module, "warmup", pending)
+        response = client.get("/api/ready")
+        assert response.status_code == 503
+        assert response.json()["pending"] == ["noop"]
+        pending.start("blocking")
+        response = client.get("/api/ready")
+        assert response.status_code == 200
+        assert "noop" in response.json()["steps"]
+
+    def test_default_steps_warm_payloads(self):
+        from web.routes.deps import payload_cache
+        from web.routes.warmup import Warmup, STEPS
+        Warmup(STEPS).run(["options", "payloads"])
+        builds = payload_cache.builds
+        client.get("/api/slots?lang=zh")
+        client.get("/api/bootstrap?lang=en")
+        assert payload_cache.builds == builds
+
+
+class TestSearchAPI:
+    """Test the typeahead option search endpoint."""
+
+    @pytest.fixture
+    def catalog(self, test_generator, monkeypatch):
+        from generator.search import SearchIndexCache
+        from web.routes import search
+        monkeypatch.setattr(search, "gen", test_generator)
+        monkeypatch.setattr(search, "search_index", SearchIndexCache(test_generator))
+        return test_generator
+
+    def test_ranked_results_with_group_labels(self, catalog):
+        data = client.get("/api/search?q=hair&lang=zh").json()
+        assert data["catalog_version"] == catalog.catalog_version
+        results = data["results"]
+        assert {r["id"] for r in results} == {"long_hair", "black_hair", "straight_hair"}
+        first = results[0]
+        option = next(o for o in catalog.get_slot_options_localized(first["slot"], "zh") if o["id"] == first["id"])
+        assert first["localized_name"] == option["localized_name"]
+        assert first["localized_group"] == option["localized_group"]
+        assert first["match"] == "word"
+
+    def test_slot_filter_and_validation(self, catalog):
+        results = client.get("/api/search?q=s&slot=upper_body").json()["results"]
+        assert [r["id"] for r in results] == ["shirt"]
+        assert client.get("/api/search?q=s&slot=nope").status_code == 404
+        assert client.get("/api/search?q=s&limit=0").status_code == 400
+        assert client.get("/api/search?q=").json()["results"] == []
+
+
+class TestBootstrapAPI:
+    """Test the single cold-load bootstrap response."""
+
+    def test_bundles_page_data(self):
+        data = client.get("/api/bootstrap?lang=zh").json()
+        assert data["lang"] == "zh"
+        assert data["slots"] == client.get("/api/slots?lang=zh").json()
+        assert data["palettes"] == client.get("/api/palettes?lang=zh").json()
+        assert data["configs"] == client.get("/api/configs").json()["configs"]
+        assert data["ui_strings"] == json.loads(
+            (Path(__file__).parent.parent / "web" / "static" / "i18n" / "zh.json").read_text(encoding="utf-8-sig")
+        )
+
+    def test_saved_config_changes_etag(self):
+        before = client.get("/api/bootstrap").headers["etag"]
+        client.post("/api/configs/bootstrap_test", json={"name": "bootstrap_test", "data": {}})
+        response = client.get("/api/bootstrap", headers={"If-None-Match": before})
+        assert response.status_code == 200
+        assert "bootstrap_test" in response.json()["configs"]
+
+    def test_inlined_into_index(self):
+        page = client.get("/", cookies={"ui_locale": "zh"}).text
+        start = page.index('<script id="bootstrap-data" type="application/json">')
+        inlined = page[page.index(">", start) + 1:page.index("</script>", start)]
+        assert json.loads(inlined)["lang"] == "zh"
+
+
+class TestRandomizeBatchAPI:
+    """Test multi-candidate randomization."""
+
+    def test_returns_count_candidates(self):
+        response = client.post("/api/randomize-batch", json={"count": 5})
+        assert response.status_code == 200
+        candidates = response.json()["candidates"]
+        assert len(candidates) == 5
+        for candidate in candidates:
+            assert {"results", "prompt", "code"} <= set(candidate)
+            assert candidate["prompt"].startswith("1girl")
+
+    def test_locked_slots_not_in_results(self):
+        response = client.post("/api/randomize-batch", json={"count": 2, "locked": {"hair_style": True}})
+        for candidate in response.json()["candidates"]:
+            assert "hair_style" not in candidate["results"]
+            assert "hair_length" in candidate["results"]
+
+    def test_seed_is_reproducible(self):
+        body = {"count": 3, "seed": 42}
+        first = client.post("/api/randomize-batch", json=body).json()
+        assert client.post("/api/randomize-batch", json=body).json() == first
+
+    def test_compact_omits_results(self):
+        candidates = client.post("/api/randomize-batch", json={"count": 2, "compact": True}).json()["candidates"]
+        assert all("results" not in c for c in candidates)
+
+    def test_invalid_count(self):
+        assert client.post("/api/randomize-batch", json={"count": 0}).status_code == 400
+
+
+class TestBatchStreamAPI:
+    """Test NDJSON batch streaming."""
+
+    def _stream(self, **body):
+        response = client.post("/api/generate-batch/stream", json=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return response, [json.loads(line) for line in response.text.splitlines()]
+
+    def test_streams_count_records(self):
+        _, records = self._stream(count=150, seed=7)
+        assert [r["index"] for r in records] == list(range(150))
+        assert all("prompt" in r and "slots" in r for r in records)
+
+    def test_same_seed_is_deterministic(self):
+        first = client.post("/api/generate-batch/stream", json={"count": 20, "seed": 3}).text
+        second = client.post("/api/generate-batch/stream", json={"count": 20, "seed": 3}).text
+        assert first == second
+
+    def test_start_resumes_same_records(self):
+        _, full = self._stream(count=30, seed=11)
+        _, tail = self._stream(count=30, seed=11, start=25)
+        assert tail == full[25:]
+
+    def test_seed_echoed_when_omitted(self):
+        response, _ = self._stream(count=1)
+        assert int(response.headers["x-batch-seed"]) >= 0
+
+    def test_invalid_count(self):
+        response = client.post("/api/generate-batch/stream", json={"count": 0})
+        assert response.status_code == 400
+
+    def test_arrow_format(self):
+        pa = pytest.importorskip("pyarrow")
+        response = client.post("/api/generate-batch/stream", json={"count": 40, "seed": 2, "format": "arrow"})
+        assert response.status_code == 200
+        table = pa.ipc.open_stream(response.content).read_all()
+        _, records = self._stream(count=40, seed=2)
+        assert table.column("prompt").to_pylist() == [r["prompt"] for r in records]
+
+
 class TestConfigsAPI:
     """Test configuration save/load endpoints."""
     
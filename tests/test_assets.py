@@ -0,0 +1,79 @@
+"""
+Tests for the content-hashed static asset pipeline.
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from web.assets import IMMUTABLE_CACHE_CONTROL, AssetPipeline
+from web.server import app, assets
+
+
+def _site(root: Path, state_js: str = "export const state = {};\n") -> AssetPipeline:
+    (root / "js").mkdir(parents=True)
+    (root / "js" / "state.js").write_text(state_js)
+    (root / "js" / "app.js").write_text('import { state } from "./state.js";\nconsole.log(state);\n')
+    (root / "js" / "a.js").write_text('import "./b.js";\n')
+    (root / "js" / "b.js").write_text('import "./a.js";\n')
+    (root / "index.html").write_text(
+        '<html><head><link rel="stylesheet" href="/static/site.css"></head>'
+        '<body><script type="module" src="/static/js/app.js"></script></body></html>'
+    )
+    (root / "site.css").write_text("body { margin: 0; }\n")
+    return AssetPipeline(root).build()
+
+
+class TestAssetPipeline:
+    """Test fingerprinting and rewriting."""
+
+    def test_imports_rewritten_and_hash_cascades(self, tmp_path):
+        first = _site(tmp_path / "one")
+        app_js = first.assets["js/app.js"]
+        assert app_js.url.startswith("/static/js/app.") and app_js.url.endswith(".js")
+        assert first.assets["js/state.js"].url.encode() in app_js.payload.body
+
+        second = _site(tmp_path / "two", state_js="export const state = {changed: true};\n")
+        assert second.assets["js/state.js"].url != first.assets["js/state.js"].url
+        assert second.assets["js/app.js"].url != app_js.url
+        assert second.assets["site.css"].url == first.assets["site.css"].url
+
+    def test_import_cycle_keeps_plain_path(self, tmp_path):
+        pipeline = _site(tmp_path)
+        a_body = pipeline.assets["js/a.js"].payload.body
+        b_body = pipeline.assets["js/b.js"].payload.body
+        assert b_body == b'import "./a.js";\n'
+        assert pipeline.assets["js/b.js"].url.encode() in a_body
+
+    def test_index_references_and_manifest(self, tmp_path):
+        pipeline = _site(tmp_path)
+        html = pipeline.index.body.decode()
+        assert pipeline.url_for("site.css") in html
+        assert pipeline.url_for("js/app.js") in html
+        assert "window.__ASSETS__" in html
+
+
+class TestAssetServing:
+    """Test the ASGI serving path."""
+
+    client = TestClient(app)
+
+    def test_fingerprinted_url_is_immutable(self):
+        response = self.client.get(assets.url_for("js/app.js"), headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+
+    def test_plain_path_revalidates(self):
+        response = self.client.get("/static/js/app.js")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        again = self.client.get("/static/js/app.js", headers={"If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304
+
+    def test_index_and_missing_file(self):
+        assert assets.url_for("js/app.js") in self.client.get("/").text
+        assert self.client.get("/static/js/missing.js").status_code == 404
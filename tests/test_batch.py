@@ -0,0 +1,81 @@
+"""
+Tests for seeded batch generation.
+"""
+
+import pytest
+from generator.batch import BLOCK_SIZE, BatchJob, CharacterSampler, generate_batch, run_batch
+
+
+def _records(gen, count, seed, start=0, **sampler_kwargs):
+    sampler = CharacterSampler(gen, **sampler_kwargs)
+    return list(generate_batch(gen, sampler, count, seed, start=start))
+
+
+class TestGenerateBatch:
+    """Test determinism, resuming and sampling options."""
+
+    def test_same_seed_same_records(self, test_generator):
+        assert _records(test_generator, 10, 5) == _records(test_generator, 10, 5)
+
+    def test_records_have_prompt_and_ids(self, test_generator):
+        record = _records(test_generator, 1, 1)[0]
+        assert record["index"] == 0
+        assert record["prompt"].startswith("1girl")
+        assert record["slots"]["hair_style"] == "ponytail"
+
+    def test_start_mid_block_matches_full_run(self, test_generator):
+        count = BLOCK_SIZE + 10
+        full = _records(test_generator, count, 9)
+        assert _records(test_generator, count, 9, start=BLOCK_SIZE - 3) == full[BLOCK_SIZE - 3:]
+
+    def test_locked_slot_keeps_value(self, test_generator):
+        records = _records(
+            test_generator, 5, 2,
+            locked={"expression": True},
+            slots={"expression": {"value_id": "neutral", "value": "neutral"}},
+        )
+        assert {r["slots"]["expression"] for r in records} == {"neutral"}
+
+    def test_palette_colors_only_on_color_slots(self, test_generator):
+        records = _records(test_generator, 5, 4, palette_id="test_palette")
+        color_slots = {n for n, d in test_generator.SLOT_DEFINITIONS.items() if d["has_color"]}
+        for record in records:
+            assert record["colors"]
+            assert set(record["colors"]) <= color_slots
+            assert set(record["colors"].values()) <= {"red", "blue", "green"}
+
+    def test_disabled_groups_excluded(self, test_generator):
+        records = _records(test_generator, 5, 4, disabled_groups={"hair_style": ["style"]})
+        assert all("hair_style" not in r["slots"] for r in records)
+
+
+class TestRunBatch:
+    """Test sharded file output and resume."""
+
+    def _job(self, data_dir, **overrides):
+        params = dict(count=BLOCK_SIZE * 3 + 5, seed=1, shard_size=BLOCK_SIZE, data_dir=str(data_dir))
+        params.update(overrides)
+        return BatchJob(**params)
+
+    def test_output_independent_of_workers(self, temp_data_dir, tmp_path):
+        run_batch(self._job(temp_data_dir), tmp_path / "one.txt", workers=1)
+        run_batch(self._job(temp_data_dir), tmp_path / "two.txt", workers=2)
+        one = (tmp_path / "one.txt").read_bytes()
+        assert one == (tmp_path / "two.txt").read_bytes()
+        assert one.count(b"\n") == BLOCK_SIZE * 3 + 5
+        assert not (tmp_path / "one.txt.shards").exists()
+
+    def test_resume_reuses_completed_shards(self, temp_data_dir, tmp_path):
+        out = tmp_path / "out.txt"
+        run_batch(self._job(temp_data_dir), out, keep_shards=True)
+        expected = out.read_bytes()
+        (tmp_path / "out.txt.shards" / "shard-000002.txt").unlink()
+        stats = run_batch(self._job(temp_data_dir), out, resume=True)
+        assert stats["prompts"] == BLOCK_SIZE
+        assert out.read_bytes() == expected
+
+    def test_resume_rejects_different_job(self, temp_data_dir, tmp_path):
+        out = tmp_path / "out.txt"
+        run_batch(self._job(temp_data_dir), out, keep_shards=True)
+        with pytest.raises(ValueError):
+            run_batch(self._job(temp_data_dir, seed=2), out, resume=True)
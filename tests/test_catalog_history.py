@@ -0,0 +1,76 @@
+"""
+Tests for per-version catalog diffs.
+"""
+
+import json
+from pathlib import Path
+
+from generator.catalog_history import CatalogHistory
+
+
+def _edit_hair(data_dir, edit):
+    path = Path(data_dir) / "hair" / "hair_catalog.json"
+    catalog = json.loads(path.read_text(encoding="utf-8"))
+    edit(catalog)
+    path.write_text(json.dumps(catalog), encoding="utf-8")
+
+
+def _add_bun(catalog):
+    catalog["items"].append({"id": "bun", "name": "bun", "category": "style"})
+    catalog["index_by_category"]["style"].append("bun")
+
+
+def _rename_ponytail(catalog):
+    catalog["items"][0]["name"] = "high ponytail"
+
+
+def _remove_bun(catalog):
+    catalog["items"] = [item for item in catalog["items"] if item["id"] != "bun"]
+    catalog["index_by_category"]["style"].remove("bun")
+
+
+class TestCatalogHistory:
+    """Test diff recording and composition."""
+
+    def test_current_version_has_no_changes(self, test_generator):
+        history = CatalogHistory(test_generator)
+        assert history.changes_since(test_generator.catalog_version) == {}
+
+    def test_added_and_changed_items(self, test_generator, temp_data_dir):
+        history = CatalogHistory(test_generator)
+        start = history.sync()
+        _edit_hair(temp_data_dir, _add_bun)
+        test_generator.reload_catalogs()
+        middle = history.sync()
+        _edit_hair(temp_data_dir, _rename_ponytail)
+        test_generator.reload_catalogs()
+
+        changes = history.changes_since(start)
+        assert list(changes) == ["hair_style"]
+        assert changes["hair_style"].changed == {"bun", "ponytail"}
+        assert changes["hair_style"].reordered
+        # Only the rename happened after the first reload.
+        assert history.changes_since(middle)["hair_style"].changed == {"ponytail"}
+
+    def test_added_then_removed(self, test_generator, temp_data_dir):
+        history = CatalogHistory(test_generator)
+        start = history.sync()
+        _edit_hair(temp_data_dir, _add_bun)
+        test_generator.reload_catalogs()
+        history.sync()
+        _edit_hair(temp_data_dir, _remove_bun)
+        test_generator.reload_catalogs()
+
+        changes = history.changes_since(start)["hair_style"]
+        assert changes.changed == set()
+        assert changes.removed == {"bun"}
+
+    def test_version_older_than_ring(self, test_generator):
+        history = CatalogHistory(test_generator, max_versions=2)
+        start = history.sync()
+        for _ in range(3):
+            test_generator.reload_catalogs()
+            history.sync()
+        assert history.changes_since(start) is None
+        assert history.changes_since(start + 1) is not None
+        assert history.changes_since(start + 100) is None
@@ -0,0 +1,62 @@
+"""
+Tests for compact character codes.
+"""
+
+import json
+import pytest
+from generator.character_code import CharacterCodec, CharacterCodeError
+from generator.prompt_generator import SlotConfig
+
+
+class TestCharacterCodec:
+    """Test encode/decode round trips against the test catalogs."""
+
+    def test_round_trip(self, test_generator, sample_slot_state):
+        codec = CharacterCodec(test_generator)
+        code = codec.encode(sample_slot_state, full_body_mode=True, locked={"background": True})
+        decoded = codec.decode(code)
+
+        assert decoded["full_body_mode"] is True
+        assert decoded["upper_body_mode"] is False
+        assert decoded["locked"] == {"background": True}
+        assert set(decoded["slots"]) == {"hair_style", "upper_body", "background"}
+        upper = decoded["slots"]["upper_body"]
+        assert upper["value_id"] == "shirt"
+        assert upper["color"] == "blue"
+        assert upper["weight"] == 1.5
+
+    def test_code_is_short(self, test_generator, sample_slot_state):
+        codec = CharacterCodec(test_generator)
+        code = codec.encode(sample_slot_state)
+        assert len(code) <= 32
+        assert all(c.isalnum() or c in "-_" for c in code)
+
+    def test_accepts_slot_config_and_legacy_names(self, test_generator):
+        codec = CharacterCodec(test_generator)
+        code = codec.encode({"hair_length": SlotConfig(value="long hair", enabled=False)})
+        slot = codec.decode(code)["slots"]["hair_length"]
+        assert slot["value_id"] == "long_hair"
+        assert slot["enabled"] is False
+
+    def test_unknown_value_rejected(self, test_generator):
+        codec = CharacterCodec(test_generator)
+        with pytest.raises(CharacterCodeError):
+            codec.encode({"hair_style": {"value_id": "not_an_item"}})
+
+    def test_catalog_change_rejected(self, test_generator, temp_data_dir, sample_slot_state):
+        codec = CharacterCodec(test_generator)
+        code = codec.encode(sample_slot_state)
+
+        colors_path = temp_data_dir / "colors" / "color_palettes.json"
+        colors = json.loads(colors_path.read_text(encoding="utf-8"))
+        colors["individual_colors"].insert(0, "teal")
+        colors_path.write_text(json.dumps(colors), encoding="utf-8")
+        test_generator.reload_catalogs()
+
+        with pytest.raises(CharacterCodeError):
+            codec.decode(code)
+
+    def test_garbage_rejected(self, test_generator):
+        codec = CharacterCodec(test_generator)
+        with pytest.raises(CharacterCodeError):
+            codec.decode("AAAA")
@@ -0,0 +1,125 @@
+"""
+Tests for negotiated response compression.
+"""
+
+import asyncio
+import gzip
+import json
+import sys
+import zlib
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from web.compression import CompressionMiddleware, negotiate
+from web.routes.payloads import Payload, payload_response
+
+BIG = {"items": [{"id": f"item_{i}", "name": f"item number {i}"} for i in range(200)]}
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, min_size=512)
+
+    @app.get("/big")
+    async def big():
+        return BIG
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/payload")
+    async def payload(request: Request):
+        return payload_response(request, Payload.from_data(BIG))
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\0" * 4096, media_type="application/octet-stream")
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(5):
+                yield json.dumps({"index": i}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+
+client = TestClient(_app())
+
+
+class TestNegotiation:
+    """Test Accept-Encoding negotiation."""
+
+    def test_highest_q_then_server_preference(self):
+        encodings = ("zstd", "br", "gzip")
+        assert negotiate("gzip, br", encodings) == "br"
+        assert negotiate("gzip;q=1.0, br;q=0.5", encodings) == "gzip"
+        assert negotiate("*", encodings) == "zstd"
+        assert negotiate("br;q=0, *;q=0.1", ("br", "gzip")) == "gzip"
+        assert negotiate("identity", encodings) is None
+        assert negotiate("", encodings) is None
+
+
+class TestCompressionMiddleware:
+    """Test which responses are compressed and how."""
+
+    def test_large_json_is_compressed(self):
+        response = client.get("/big", headers={"accept-encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(json.dumps(BIG))
+        assert response.json() == BIG
+
+    def test_small_binary_and_unaccepted_are_not(self):
+        assert "content-encoding" not in client.get("/small", headers={"accept-encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/binary", headers={"accept-encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/big", headers={"accept-encoding": "identity"}).headers
+
+    def test_precompressed_payload_passes_through(self):
+        payload = Payload.from_data(BIG)
+        response = client.get("/payload", headers={"accept-encoding": "gzip"})
+        assert response.headers["etag"] == payload.etag_for("gzip")
+        assert int(response.headers["content-length"]) == len(payload.encoded["gzip"])
+        assert client.get(
+            "/payload", headers={"accept-encoding": "gzip", "if-none-match": payload.etag_for("gzip")}
+        ).status_code == 304
+
+    def test_stream_chunks_are_flushed(self):
+        messages = []
+
+        async def run():
+            scope = {
+                "type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream",
+                "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+                "headers": [(b"accept-encoding", b"gzip")], "server": ("test", 80), "client": ("test", 1),
+            }
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            await _app()(scope, receive, send)
+
+        asyncio.run(run())
+        start = messages[0]
+        headers = dict(start["headers"])
+        assert headers[b"content-encoding"] == b"gzip"
+        assert b"content-length" not in headers
+        decoder = zlib.decompressobj(31)
+        records = []
+        for message in messages[1:]:
+            # Every chunk decodes to whole lines on its own.
+            text = decoder.decompress(message.get("body", b"")).decode()
+            records += [json.loads(line) for line in text.splitlines()]
+            if text:
+                assert text.endswith("\n")
+        assert [r["index"] for r in records] == list(range(5))
+        assert gzip.decompress(b"".join(m.get("body", b"") for m in messages[1:]))
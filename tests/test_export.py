@@ -0,0 +1,87 @@
+"""
+Tests for columnar batch export.
+"""
+
+import json
+
+import pytest
+from generator.batch import BLOCK_SIZE, BatchJob, CharacterSampler, generate_batch, run_batch
+from generator.export import ColumnCoder, write_columns, write_dictionary
+
+
+def _records(gen, count=50, seed=3):
+    sampler = CharacterSampler(gen, palette_id="test_palette")
+    return list(generate_batch(gen, sampler, count, seed))
+
+
+class TestColumnCoder:
+    """Test code tables."""
+
+    def test_codes_round_trip_through_dictionary(self, test_generator):
+        coder = ColumnCoder(test_generator)
+        records = _records(test_generator)
+        columns = coder.encode(records, seed=3)
+        table = coder.dictionary()
+        lookup = {(c, code): item_id for c, code, item_id in zip(table["column"], table["code"], table["id"])}
+        for row, record in enumerate(records):
+            for name in coder.slot_names:
+                code = columns[name][row]
+                assert (lookup[(name, code)] if code else None) == record["slots"].get(name)
+            for name in coder.color_slots:
+                code = columns[f"{name}_color"][row]
+                assert (lookup[(f"{name}_color", code)] if code else None) == record["colors"].get(name)
+
+    def test_zero_means_unset(self, test_generator):
+        coder = ColumnCoder(test_generator)
+        columns = coder.encode([{"index": 0, "prompt": "1girl", "slots": {}, "colors": {}}], seed=0)
+        assert columns["hair_style"] == [0]
+
+
+class TestWriteColumns:
+    """Test reading exported files back."""
+
+    def test_arrow_memory_mapped_read(self, test_generator, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        records = _records(test_generator)
+        path = tmp_path / "part.arrow"
+        assert write_columns(path, "arrow", ColumnCoder(test_generator), records, seed=3, chunk_rows=16) == 50
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        assert table.column("prompt").to_pylist() == [r["prompt"] for r in records]
+        assert table.column("index").to_pylist() == list(range(50))
+        assert json.loads(table.schema.metadata[b"dictionary"])["hair_style"] == ["ponytail"]
+
+    def test_parquet_and_dictionary(self, test_generator, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        coder = ColumnCoder(test_generator)
+        write_columns(tmp_path / "part.parquet", "parquet", coder, _records(test_generator), seed=3)
+        table = pq.read_table(tmp_path / "part.parquet")
+        assert table.num_rows == 50
+        assert set(table.column("seed").to_pylist()) == {3}
+        dictionary = pq.read_table(write_dictionary(tmp_path, "parquet", coder)).to_pydict()
+        assert ("hair_style", 1, "ponytail") in zip(dictionary["column"], dictionary["code"], dictionary["id"])
+
+    def test_npz_prompt_offsets(self, test_generator, tmp_path):
+        np = pytest.importorskip("numpy")
+        records = _records(test_generator)
+        write_columns(tmp_path / "part.npz", "npz", ColumnCoder(test_generator), records, seed=3)
+        data = np.load(tmp_path / "part.npz")
+        offsets, blob = data["prompt_offsets"], data["prompt_bytes"].tobytes()
+        assert blob[offsets[7]:offsets[8]].decode("utf-8") == records[7]["prompt"]
+        assert data["hair_style"].dtype == np.uint16
+
+
+class TestColumnarBatch:
+    """Test columnar output through run_batch."""
+
+    def test_part_files_independent_of_workers(self, temp_data_dir, tmp_path):
+        pytest.importorskip("pyarrow")
+        job = BatchJob(count=BLOCK_SIZE * 2 + 1, seed=5, shard_size=BLOCK_SIZE,
+                       data_dir=str(temp_data_dir), output_format="parquet")
+        run_batch(job, tmp_path / "one", workers=1)
+        run_batch(job, tmp_path / "two", workers=2)
+        parts = sorted(p.name for p in (tmp_path / "one").glob("part-*"))
+        assert parts == ["part-000000.parquet", "part-000001.parquet", "part-000002.parquet"]
+        for name in parts:
+            assert (tmp_path / "one" / name).read_bytes() == (tmp_path / "two" / name).read_bytes()
+        assert (tmp_path / "one" / "_dictionary.parquet").exists()
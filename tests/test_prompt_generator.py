@@ -60,6 +60,15 @@ class TestPromptGenerator:
             assert "id" in palette
             assert "name" in palette
             
+    def test_reload_catalogs_bumps_version(self, test_generator):
+        """Test catalog reload increments the catalog version."""
+        gen = test_generator
+        version = gen.catalog_version
+        gen.get_slot_options("hair_style")
+        gen.reload_catalogs()
+        assert gen.catalog_version == version + 1
+        assert gen.get_slot_options("hair_style")
+
     def test_sample_color_from_palette(self, test_generator):
         """Test sampling colors from palette."""
         gen = test_generator
@@ -0,0 +1,92 @@
+"""
+Tests for the shared prompt render pipeline.
+"""
+
+import pytest
+from generator.prompt_generator import GeneratorConfig, SlotConfig
+from generator.render import DIALECTS
+
+
+@pytest.fixture
+def renderer(test_generator):
+    return test_generator.get_renderer()
+
+
+class TestDialects:
+    """Test weight syntax for each output dialect."""
+
+    @pytest.mark.parametrize("dialect,expected", [
+        ("a1111", "(blue shirt:1.5)"),
+        ("novelai", "{{{{{{{{blue shirt}}}}}}}}"),
+        ("plain", "blue shirt"),
+    ])
+    def test_weight_syntax(self, renderer, dialect, expected):
+        slots = {"upper_body": {"value_id": "shirt", "color": "blue", "weight": 1.5}}
+        assert renderer.render(slots, dialect=dialect) == f"1girl, {expected}"
+
+    def test_novelai_deemphasis(self):
+        assert DIALECTS["novelai"]("hat", 0.9) == "[[hat]]"
+
+    def test_unknown_dialect_rejected(self, renderer):
+        with pytest.raises(ValueError):
+            renderer.render({}, dialect="markdown")
+
+
+class TestRenderParts:
+    """Test skip rules, localization and slot field sources."""
+
+    def test_parts_carry_slot_names(self, renderer):
+        parts = renderer.render_parts({"head": {"value_id": "hat"}, "hair_style": {"value_id": "ponytail"}})
+        assert parts == [("", "1girl"), ("hair_style", "ponytail"), ("head", "hat")]
+
+    def test_localizes_color(self, renderer):
+        slots = {"upper_body": {"value_id": "shirt", "color": "red"}}
+        assert renderer.render(slots, language="zh-CN") == "1girl, 红色 shirt"
+
+    def test_covers_legs_skips_legs(self, renderer):
+        slots = {"lower_body": {"value_id": "pants"}, "legs": {"value": "thighhighs"}}
+        assert renderer.render(slots, raw_fallback=True) == "1girl, pants"
+
+    def test_full_body_skips_body_pair(self, renderer):
+        slots = {
+            "full_body": {"value": "dress"},
+            "upper_body": {"value_id": "shirt"},
+            "lower_body": {"value_id": "pants"},
+            "legs": {"value": "thighhighs"},
+        }
+        rendered = renderer.render(slots, full_body_mode=True, raw_fallback=True)
+        assert rendered == "1girl, dress, thighhighs"
+
+    def test_unknown_values_skipped_without_fallback(self, renderer):
+        assert renderer.render({"head": {"value": "crown"}}) == "1girl"
+
+    def test_memo_tracks_slot_edits(self, renderer):
+        slots = {"head": {"value_id": "hat", "weight": 1.0}}
+        assert renderer.render(slots) == "1girl, hat"
+        slots["head"]["weight"] = 1.2
+        assert renderer.render(slots) == "1girl, (hat:1.2)"
+        slots["head"]["enabled"] = False
+        assert renderer.render(slots) == "1girl"
+
+    def test_catalog_reload_clears_memo(self, test_generator, renderer):
+        slots = {"head": {"value_id": "hat"}}
+        renderer.render(slots)
+        test_generator.reload_catalogs()
+        assert renderer.render(slots) == "1girl, hat"
+        assert renderer._catalog_version == test_generator.catalog_version
+
+
+class TestBuildPromptUsesPipeline:
+    """Test SlotConfig semantics through PromptGenerator.build_prompt."""
+
+    def test_color_requires_color_enabled(self, test_generator):
+        config = GeneratorConfig(full_body_mode=False)
+        config.slots["upper_body"] = SlotConfig(value="shirt", value_id="shirt", color="blue")
+        assert test_generator.build_prompt(config) == "1girl, shirt"
+        config.slots["upper_body"].color_enabled = True
+        assert test_generator.build_prompt(config) == "1girl, blue shirt"
+
+    def test_dialect_passthrough(self, test_generator):
+        config = GeneratorConfig(full_body_mode=False)
+        config.slots["head"] = SlotConfig(value="hat", weight=1.2)
+        assert test_generator.build_prompt(config, dialect="plain") == "1girl, hat"
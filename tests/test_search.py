@@ -0,0 +1,79 @@
+"""
+Tests for the typeahead option search index.
+"""
+
+import json
+from pathlib import Path
+
+from generator.search import SearchIndex, SearchIndexCache, normalize
+
+
+def _localize_hair(data_dir):
+    path = Path(data_dir) / "hair" / "hair_catalog.json"
+    catalog = json.loads(path.read_text(encoding="utf-8"))
+    extra = {
+        "ponytail": {"aliases": ["pony tail"], "name_i18n": {"en": "ponytail", "zh": "马尾辫"}},
+        "long_hair": {"name_i18n": {"en": "long hair", "zh": "长发"}},
+        "black_hair": {"name_i18n": {"en": "black hair", "zh": "黑发"}},
+    }
+    for item in catalog["items"]:
+        item.update(extra.get(item["id"], {}))
+    path.write_text(json.dumps(catalog, ensure_ascii=False), encoding="utf-8")
+
+
+def _ids(hits):
+    return [(hit.item_id, hit.match) for hit in hits]
+
+
+class TestSearchIndex:
+    """Test ranking, filtering and Latin/CJK matching."""
+
+    def test_normalize_folds_case_width_and_separators(self):
+        assert normalize("Long_Hair") == normalize("long-hair") == normalize("ＬＯＮＧ  hair") == "long hair"
+
+    def test_prefix_then_word_prefix(self, test_generator):
+        index = SearchIndex(test_generator)
+        hits = index.search("hair")
+        assert {hit.match for hit in hits} == {"word"}
+        assert {hit.item_id for hit in hits} == {"long_hair", "black_hair", "straight_hair"}
+        assert _ids(index.search("po")) == [("ponytail", "prefix")]
+
+    def test_exact_match_ranks_first(self, test_generator):
+        hits = SearchIndex(test_generator).search("shirt")
+        assert _ids(hits)[0] == ("shirt", "exact")
+
+    def test_slot_filter(self, test_generator):
+        index = SearchIndex(test_generator)
+        assert _ids(index.search("hair", slot="hair_length")) == [("long_hair", "word")]
+        assert index.search("hair", slot="upper_body") == []
+
+    def test_infix_and_limit(self, test_generator):
+        index = SearchIndex(test_generator)
+        assert _ids(index.search("tail")) == [("ponytail", "infix")]
+        assert len(index.search("hair", limit=2)) == 2
+
+    def test_aliases_and_cjk(self, test_generator, temp_data_dir):
+        _localize_hair(temp_data_dir)
+        test_generator.reload_catalogs()
+        index = SearchIndex(test_generator)
+        assert _ids(index.search("pony tail")) == [("ponytail", "exact")]
+        assert _ids(index.search("马尾")) == [("ponytail", "prefix")]
+        # Single CJK character inside a word
+        assert {hit.item_id for hit in index.search("发")} == {"long_hair", "black_hair"}
+        assert {hit.match for hit in index.search("发")} == {"infix"}
+
+    def test_one_result_per_option(self, test_generator, temp_data_dir):
+        _localize_hair(temp_data_dir)
+        test_generator.reload_catalogs()
+        hits = SearchIndex(test_generator).search("pony")
+        assert _ids(hits) == [("ponytail", "prefix")]
+        assert hits[0].matched == "ponytail"
+
+    def test_cache_rebuilds_after_reload(self, test_generator, temp_data_dir):
+        cache = SearchIndexCache(test_generator)
+        first = cache.get()
+        assert cache.get() is first
+        _localize_hair(temp_data_dir)
+        test_generator.reload_catalogs()
+        assert cache.get() is not first
+        assert cache.get().search("马尾")
@@ -0,0 +1,94 @@
+"""
+Tests for CLIP token counting and token-budget fitting.
+"""
+
+import pytest
+from generator.prompt_generator import PromptGenerator, GeneratorConfig, SlotConfig
+from generator.tokens import (
+    BREAK_KEYWORD,
+    CLIP_CHUNK_TOKENS,
+    ClipTokenCounter,
+    count_prompt_tokens,
+    fit_prompt_to_budget,
+)
+
+
+@pytest.fixture(scope="module")
+def counter():
+    return ClipTokenCounter()
+
+
+class TestClipTokenCounter:
+    """Test BPE token counts against known CLIP tokenizations."""
+
+    def test_bundled_vocab_loaded(self, counter):
+        assert counter.exact is True
+
+    @pytest.mark.parametrize("text,expected", [
+        ("1girl", 2),
+        ("blonde hair", 2),
+        ("looking at viewer", 3),
+        ("school_uniform", 3),
+        ("(red pleated skirt:1.2)", 10),
+    ])
+    def test_known_counts(self, counter, text, expected):
+        assert counter.count(text) == expected
+
+    def test_joined_prompt_counts_separators(self, counter):
+        assert count_prompt_tokens(["blonde hair", "1girl"], counter) == 5
+
+    def test_estimate_without_vocab(self, tmp_path):
+        fallback = ClipTokenCounter(merges_path=tmp_path / "missing.txt.gz")
+        assert fallback.exact is False
+        assert fallback.count("blonde hair") >= 2
+
+
+class TestFitPromptToBudget:
+    """Test drop / reorder / break strategies."""
+
+    PRIORITIES = {"hair": 9, "background": 8, "waist": 2}
+
+    def _fragments(self):
+        return [("", "1girl"), ("hair", "blonde hair"), ("waist", "belt"), ("background", "beach")]
+
+    def test_no_budget_is_passthrough(self, counter):
+        parts = fit_prompt_to_budget(self._fragments(), None, counter, self.PRIORITIES)
+        assert parts == ["1girl", "blonde hair", "belt", "beach"]
+
+    def test_drop_removes_lowest_priority(self, counter):
+        parts = fit_prompt_to_budget(self._fragments(), 8, counter, self.PRIORITIES, "drop")
+        assert parts == ["1girl", "blonde hair", "beach"]
+
+    def test_reorder_moves_low_priority_last(self, counter):
+        parts = fit_prompt_to_budget(self._fragments(), 8, counter, self.PRIORITIES, "reorder")
+        assert parts == ["1girl", "blonde hair", "beach", "belt"]
+
+    def test_break_never_splits_fragments(self, counter):
+        fragments = [("", "1girl")] + [("hair", f"long flowing hair style {i}") for i in range(20)]
+        parts = fit_prompt_to_budget(fragments, 2 * CLIP_CHUNK_TOKENS, counter, self.PRIORITIES, "break")
+        assert BREAK_KEYWORD in parts
+        chunk = []
+        for part in parts + [BREAK_KEYWORD]:
+            if part == BREAK_KEYWORD:
+                assert count_prompt_tokens(chunk, counter) + 2 <= CLIP_CHUNK_TOKENS
+                chunk = []
+            else:
+                chunk.append(part)
+
+    def test_unknown_strategy_rejected(self, counter):
+        with pytest.raises(ValueError):
+            fit_prompt_to_budget(self._fragments(), 8, counter, self.PRIORITIES, "truncate")
+
+
+class TestBuildPromptBudget:
+    """Test PromptGenerator.build_prompt with a token budget."""
+
+    def test_drops_low_priority_slot(self, test_generator):
+        config = GeneratorConfig(full_body_mode=False)
+        config.slots["hair_color"] = SlotConfig(value="black hair")
+        config.slots["height"] = SlotConfig(value="tall")
+        config.slots["background"] = SlotConfig(value="indoor")
+
+        assert test_generator.build_prompt(config) == "1girl, black hair, tall, indoor"
+        budgeted = test_generator.build_prompt(config, token_budget=7)
+        assert budgeted == "1girl, black hair, indoor"
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark request decoding and response encoding of the hot JSON routes:
+FastAPI's standard body param + jsonable_encoder path against the lean path
+in web/routes/fastjson.py (model_validate_json + direct byte encoding).
+
+Measures the serialization work alone and, through the ASGI app, the whole
+per-request overhead of two otherwise identical no-op routes.
+
+Usage:
+    python tools/bench_json.py
+    python tools/bench_json.py --requests 2000 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from web.routes.fastjson import dumps, json_body, json_response, orjson  # noqa: E402
+from web.routes.prompt import SLOT_ORDER  # noqa: E402
+from web.routes.slots import RandomizeAllRequest  # noqa: E402
+
+
+def make_request_body() -> bytes:
+    """A randomize-all request carrying a full verbose slot state."""
+    slots = {
+        name: {"enabled": True, "value_id": f"{name}_{i}", "value": f"{name} value {i}",
+               "color": "black" if i % 3 == 0 else None, "weight": 1.0 + (i % 4) / 10}
+        for i, name in enumerate(SLOT_ORDER)
+    }
+    return json.dumps({
+        "slots": slots,
+        "locked": {name: True for name in SLOT_ORDER[::5]},
+        "palette_id": "warm",
+        "include_prompt": True,
+        "disabled_groups": {"hair_style": ["long", "updo"]},
+    }).encode("utf-8")
+
+
+def make_response(req: RandomizeAllRequest) -> dict:
+    return {
+        "results": {name: {"value_id": s.value_id, "value": s.value, "color": s.color} for name, s in req.slots.items()},
+        "prompt": ", ".join(s.value for s in req.slots.values() if s.value),
+        "code": "A" * 64,
+    }
+
+
+def standard_roundtrip(body: bytes) -> bytes:
+    req = RandomizeAllRequest.model_validate(json.loads(body), from_attributes=True)
+    return JSONResponse(jsonable_encoder(make_response(req))).body
+
+
+def lean_roundtrip(body: bytes) -> bytes:
+    return dumps(make_response(RandomizeAllRequest.model_validate_json(body)))
+
+
+def build_apps():
+    standard = FastAPI()
+    lean = FastAPI()
+
+    @standard.post("/randomize-all")
+    async def standard_route(req: RandomizeAllRequest):
+        return make_response(req)
+
+    @lean.post("/randomize-all")
+    async def lean_route(req: RandomizeAllRequest = json_body(RandomizeAllRequest)):
+        return json_response(make_response(req))
+
+    return standard, lean
+
+
+async def time_app(app, body: bytes, requests: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    headers = {"content-type": "application/json"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.post("/randomize-all", content=body, headers=headers)
+            assert response.status_code == 200
+        return time.perf_counter() - start
+
+
+def best_of(rounds, cases):
+    """Return the best time per case, interleaving cases so noise hits all alike."""
+    best = [float("inf")] * len(cases)
+    for _ in range(rounds):
+        for i, (_, fn) in enumerate(cases):
+            start = time.perf_counter()
+            fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lean JSON route path")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    body = make_request_body()
+    assert json.loads(standard_roundtrip(body)) == json.loads(lean_roundtrip(body))
+    standard_app, lean_app = build_apps()
+
+    cases = [
+        ("serialize: standard", lambda: [standard_roundtrip(body) for _ in range(args.requests)]),
+        ("serialize: lean", lambda: [lean_roundtrip(body) for _ in range(args.requests)]),
+        ("ASGI request: standard", lambda: asyncio.run(time_app(standard_app, body, args.requests))),
+        ("ASGI request: lean", lambda: asyncio.run(time_app(lean_app, body, args.requests))),
+    ]
+
+    print(f"{len(body)} byte request, {args.requests} requests, best of {args.rounds} rounds"
+          f" (encoder: {'orjson' if orjson else 'json'})")
+    print("-" * 60)
+    for (label, _), elapsed in zip(cases, best_of(args.rounds, cases)):
+        print(f"{label:<28} {elapsed / args.requests * 1e6:8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared render pipeline against the legacy per-caller loops.
+
+The legacy functions below are verbatim ports of the three renderers that
+existed before generator/render.py (PromptGenerator.build_prompt by name,
+web build_prompt_string by id, and the ComfyUI node's localized builder).
+
+Usage:
+    python tools/bench_render.py
+    python tools/bench_render.py --characters 500 --rounds 20
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from generator.prompt_generator import PromptGenerator  # noqa: E402
+from generator.render import PROMPT_SLOT_ORDER  # noqa: E402
+
+DEFAULT_DATA_DIR = PROJECT_ROOT / "auto_prompt" / "prompt data"
+
+
+def legacy_build_prompt(gen, config):
+    """Pre-pipeline PromptGenerator.build_prompt (by name, color_enabled)."""
+    parts = ["1girl"]
+    lower_body_covers_legs = False
+    lower = config.slots.get("lower_body")
+    if lower and lower.enabled and lower.value:
+        lower_body_covers_legs = gen.lower_body_value_covers_legs(lower.value)
+    for name in PROMPT_SLOT_ORDER:
+        slot = config.slots.get(name)
+        if not slot or not slot.enabled or not slot.value:
+            continue
+        if config.full_body_mode and name in ("upper_body", "lower_body"):
+            fb = config.slots.get("full_body")
+            if fb and fb.enabled and fb.value:
+                continue
+        if name == "legs" and lower_body_covers_legs:
+            continue
+        part = f"{slot.color} {slot.value}" if slot.color_enabled and slot.color else slot.value
+        if slot.weight != 1.0:
+            part = f"({part}:{slot.weight:.1f})"
+        parts.append(part)
+    return ", ".join(parts)
+
+
+def legacy_build_prompt_string(gen, config, language):
+    """Pre-pipeline web build_prompt_string (by id, localized)."""
+    parts = ["1girl"]
+    slots = config.slots
+    full_body_val_id = None
+    fb = slots.get("full_body")
+    if fb and fb.enabled and (fb.value_id or fb.value):
+        full_body_val_id = fb.value_id
+    lower_body_covers_legs = False
+    lower = slots.get("lower_body")
+    if lower and lower.enabled and lower.value_id:
+        lower_body_covers_legs = gen.lower_body_id_covers_legs(lower.value_id)
+    if config.full_body_mode and full_body_val_id:
+        lower_body_covers_legs = False
+    for name in PROMPT_SLOT_ORDER:
+        slot = slots.get(name)
+        if not slot or not slot.enabled or not (slot.value_id or slot.value):
+            continue
+        if config.full_body_mode and name in ("upper_body", "lower_body") and full_body_val_id:
+            continue
+        if name == "legs" and lower_body_covers_legs:
+            continue
+        value_name = gen.resolve_slot_value_name(name, slot.value_id, slot.value, language)
+        if not value_name:
+            continue
+        color_name = gen.localize_color_token(slot.color, language) if slot.color else None
+        part = f"{color_name} {value_name}" if color_name else value_name
+        if slot.weight != 1.0:
+            part = f"({part}:{slot.weight:.1f})"
+        parts.append(part)
+    return ", ".join(parts)
+
+
+def make_characters(gen, count, seed):
+    random.seed(seed)
+    palette_id = next(iter(gen.palettes), None)
+    configs = []
+    for i in range(count):
+        config = gen.create_default_config()
+        config.full_body_mode = i % 2 == 0
+        gen.randomize_all(config, include_color=True, palette_id=palette_id)
+        for slot in config.slots.values():
+            if random.random() < 0.2:
+                slot.weight = random.choice((0.8, 1.2, 1.5))
+        configs.append(config)
+    return configs
+
+
+def best_of(rounds, cases):
+    """Return the best time per case, interleaving cases so noise hits all alike."""
+    best = [float("inf")] * len(cases)
+    for _ in range(rounds):
+        for i, (_, fn) in enumerate(cases):
+            start = time.perf_counter()
+            fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prompt render paths")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--characters", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gen = PromptGenerator(data_dir=args.data_dir)
+    configs = make_characters(gen, args.characters, args.seed)
+    renderer = gen.get_renderer()
+
+    cases = [
+        ("legacy build_prompt (by name)", lambda: [legacy_build_prompt(gen, c) for c in configs]),
+        ("legacy build_prompt_string en", lambda: [legacy_build_prompt_string(gen, c, "en") for c in configs]),
+        ("legacy build_prompt_string zh", lambda: [legacy_build_prompt_string(gen, c, "zh") for c in configs]),
+        ("pipeline build_prompt", lambda: [gen.build_prompt(c) for c in configs]),
+        ("pipeline render en (by id, string)", lambda: [
+            renderer.render(c.slots, "en", c.full_body_mode) for c in configs
+        ]),
+        ("pipeline render en (by id)", lambda: [
+            renderer.render_parts(c.slots, "en", c.full_body_mode) for c in configs
+        ]),
+        ("pipeline render zh (by id)", lambda: [
+            renderer.render_parts(c.slots, "zh", c.full_body_mode) for c in configs
+        ]),
+        ("pipeline render novelai", lambda: [
+            renderer.render_parts(c.slots, "en", c.full_body_mode, dialect="novelai") for c in configs
+        ]),
+    ]
+
+    print(f"{args.characters} characters, best of {args.rounds} rounds")
+    print("-" * 60)
+    for (label, _), elapsed in zip(cases, best_of(args.rounds, cases)):
+        per_prompt_us = elapsed / args.characters * 1e6
+        print(f"{label:<36} {per_prompt_us:8.2f} us/prompt")
+
+
+if __name__ == "__main__":
+    main()
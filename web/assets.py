@@ -0,0 +1,224 @@
+"""
+Content-hashed static assets.
+
+At startup every file under web/static is read once, given a fingerprinted
+URL (css/layout.css -> /static/css/layout.3f9a0c2e71d4.css) and
+precompressed. ES module imports are rewritten to the fingerprinted URLs of
+their targets before hashing, so a change to state.js also changes the URL
+of every module that imports it. index.html is rewritten to reference the
+fingerprinted URLs and gets a window.__ASSETS__ map for URLs built at
+runtime (the i18n string tables).
+
+AssetMiddleware serves /static/ straight from memory as a plain ASGI app,
+ahead of routing. Fingerprinted URLs are cached as immutable; the original
+paths still work but must be revalidated. In dev mode (PROMPT_GEN_DEV_ASSETS=1
+or `python run_Fastapi.py --dev`) files are served from disk uncached instead.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.staticfiles import StaticFiles
+
+from .routes.payloads import Payload, choose_encoding, etag_matches
+
+# Environment variable that switches to serving files from disk, uncached.
+DEV_ASSETS_ENV = "PROMPT_GEN_DEV_ASSETS"
+
+STATIC_PREFIX = "/static/"
+
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+NO_STORE_CACHE_CONTROL = "no-cache, no-store, must-revalidate"
+
+# Smaller files are not worth a compressed variant.
+MIN_COMPRESS_SIZE = 256
+COMPRESSIBLE_SUFFIXES = {".js", ".css", ".json", ".html", ".svg", ".txt"}
+
+# Relative specifiers in static and dynamic ES module imports.
+_IMPORT_RE = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])(\.{1,2}/[^"']+)\2""")
+# href/src attributes pointing into /static/ in index.html.
+_HTML_REF_RE = re.compile(r"""((?:href|src)=)(["'])/static/([^"']+)\2""")
+
+INDEX_NAME = "index.html"
+
+
+def dev_assets_enabled() -> bool:
+    return os.environ.get(DEV_ASSETS_ENV, "").strip().lower() in ("1", "true", "yes")
+
+
+def _media_type(path: str) -> str:
+    if path.endswith(".js"):
+        return "text/javascript; charset=utf-8"
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/json":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+class Asset:
+    """One static file: its fingerprinted URL, media type and encoded bodies."""
+
+    __slots__ = ("path", "url", "media_type", "payload")
+
+    def __init__(self, path: str, url: str, media_type: str, payload: Payload):
+        self.path = path
+        self.url = url
+        self.media_type = media_type
+        self.payload = payload
+
+
+class AssetPipeline:
+    """Fingerprints, rewrites and precompresses the files of a static directory."""
+
+    def __init__(self, static_dir: Path):
+        self.static_dir = Path(static_dir)
+        self.assets: Dict[str, Asset] = {}  # logical path -> Asset
+        self._by_url: Dict[str, tuple] = {}  # request path -> (Asset, immutable)
+        self._sources: Dict[str, bytes] = {}
+        self.index: Optional[Payload] = None
+
+    def build(self) -> "AssetPipeline":
+        """Read and fingerprint every file; safe to call again after edits."""
+        self.assets.clear()
+        self._by_url.clear()
+        self._sources = {
+            path.relative_to(self.static_dir).as_posix(): path.read_bytes()
+            for path in sorted(self.static_dir.rglob("*"))
+            if path.is_file()
+        }
+        for path in self._sources:
+            if path != INDEX_NAME:
+                self._asset(path, ())
+        for asset in self.assets.values():
+            self._by_url[asset.url] = (asset, True)
+            self._by_url[STATIC_PREFIX + asset.path] = (asset, False)
+        if INDEX_NAME in self._sources:
+            self.index = Payload.from_bytes(self.render_index(), MIN_COMPRESS_SIZE)
+        self._sources = {}
+        return self
+
+    def _asset(self, path: str, importers: tuple) -> Optional[Asset]:
+        """Return the Asset for path, fingerprinting its imports first."""
+        asset = self.assets.get(path)
+        if asset is not None:
+            return asset
+        body = self._sources.get(path)
+        if body is None or path in importers:
+            # Missing file or import cycle: keep the plain path.
+            return None
+        if path.endswith(".js"):
+            body = self._rewrite_imports(path, body, importers + (path,))
+
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()[:HASH_LENGTH]
+        stem, dot, suffix = path.rpartition(".")
+        url = f"{STATIC_PREFIX}{stem}.{digest}.{suffix}" if dot else f"{STATIC_PREFIX}{path}.{digest}"
+        min_size = MIN_COMPRESS_SIZE if Path(path).suffix in COMPRESSIBLE_SUFFIXES else len(body) + 1
+        asset = Asset(path, url, _media_type(path), Payload.from_bytes(body, min_size))
+        self.assets[path] = asset
+        return asset
+
+    def _rewrite_imports(self, path: str, body: bytes, importers: tuple) -> bytes:
+        base = Path(path).parent
+
+        def replace(match: "re.Match") -> str:
+            target = os.path.normpath((base / match.group(3)).as_posix()).replace(os.sep, "/")
+            asset = self._asset(target, importers)
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{match.group(2)}{asset.url}{match.group(2)}"
+
+        return _IMPORT_RE.sub(replace, body.decode("utf-8")).encode("utf-8")
+
+    def url_for(self, path: str) -> str:
+        """Return the fingerprinted URL for a logical path like "js/app.js"."""
+        asset = self.assets.get(path)
+        return asset.url if asset else STATIC_PREFIX + path
+
+    def manifest(self) -> Dict[str, str]:
+        return {path: asset.url for path, asset in self.assets.items()}
+
+    def render_index(self) -> bytes:
+        """index.html with fingerprinted references and the asset map inlined."""
+        html = self._sources[INDEX_NAME].decode("utf-8-sig")
+        html = _HTML_REF_RE.sub(
+            lambda m: f"{m.group(1)}{m.group(2)}{self.url_for(m.group(3))}{m.group(2)}", html
+        )
+        manifest = json.dumps(self.manifest(), separators=(",", ":")).replace("</", "<\\/")
+        script = f"  <script>window.__ASSETS__ = {manifest};</script>\n</head>"
+        return html.replace("</head>", script, 1).encode("utf-8")
+
+    def lookup(self, request_path: str) -> Optional[tuple]:
+        """Return (Asset, immutable) for a /static/ request path, or None."""
+        return self._by_url.get(request_path)
+
+
+def _header(scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+async def send_payload(send, scope, payload: Payload, media_type: str, cache_control: str) -> None:
+    """Send a Payload as a complete ASGI response, honoring ETag and Accept-Encoding."""
+    encoding = choose_encoding(payload, _header(scope, b"accept-encoding"))
+    headers = [
+        (b"etag", payload.etag_for(encoding).encode("latin-1")),
+        (b"cache-control", cache_control.encode("latin-1")),
+        (b"vary", b"Accept-Encoding"),
+    ]
+    if etag_matches(_header(scope, b"if-none-match"), payload):
+        await send({"type": "http.response.start", "status": 304, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    body = payload.encoded[encoding] if encoding else payload.body
+    if encoding:
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+    headers.append((b"content-type", media_type.encode("latin-1")))
+    headers.append((b"content-length", str(len(body)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+
+class AssetMiddleware:
+    """Pure ASGI middleware answering GET/HEAD /static/... from an AssetPipeline."""
+
+    def __init__(self, app, pipeline: AssetPipeline):
+        self.app = app
+        self.pipeline = pipeline
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(STATIC_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        found = self.pipeline.lookup(scope["path"]) if scope["method"] in ("GET", "HEAD") else None
+        if found is None:
+            await send({"type": "http.response.start", "status": 404,
+                        "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+            await send({"type": "http.response.body", "body": b"Not Found"})
+            return
+        asset, immutable = found
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        await send_payload(send, scope, asset.payload, asset.media_type, cache_control)
+
+
+class NoCacheStaticFiles(StaticFiles):
+    """StaticFiles that tells browsers not to cache anything (dev mode)."""
+
+    async def __call__(self, scope, receive, send):
+        async def send_no_cache(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    (k, v) for k, v in message.get("headers", []) if k.lower() != b"cache-control"
+                ] + [(b"cache-control", NO_STORE_CACHE_CONTROL.encode("latin-1"))]
+            await send(message)
+
+        await super().__call__(scope, receive, send_no_cache)
@@ -0,0 +1,207 @@
+"""
+Response compression for dynamic API responses.
+
+CompressionMiddleware negotiates zstd, brotli or gzip from Accept-Encoding
+(highest q first, then that server preference; zstd and brotli only when
+their packages are installed) and compresses:
+
+  - complete responses of a compressible type at least min_size bytes long;
+  - streaming responses (NDJSON batches) chunk by chunk, flushing after
+    every chunk so each record batch reaches the client as soon as it is
+    produced.
+
+Responses that already carry a Content-Encoding pass through untouched:
+the cached catalog payloads and static assets are served from their
+precompressed bytes (see routes/payloads.py) and never compressed again.
+"""
+
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+from .routes.payloads import brotli, parse_accept_encoding, zstandard
+
+# Bodies shorter than this are sent as-is; compression would not pay for itself.
+DEFAULT_MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+# Levels for on-the-fly compression: fast, most of the ratio.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class _Compressor:
+    """Streaming compressor: compress() for a chunk (flushed), finish() for the end."""
+
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._flush = lambda: self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = self._obj.flush
+            self._process = self._obj.compress
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._flush = self._obj.flush
+            self._finish = self._obj.finish
+            self._process = self._obj.process
+        else:
+            self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+            self._flush = lambda: self._obj.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._obj.flush
+            self._process = self._obj.compress
+
+    def compress(self, data: bytes) -> bytes:
+        return self._process(data) + self._flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._process(data) + self._finish()
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Encodings this process can produce, in server preference order."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return tuple(encodings)
+
+
+def negotiate(accept_encoding: str, encodings: Tuple[str, ...]) -> Optional[str]:
+    """Pick the accepted encoding with the highest q (ties: order of encodings), or None."""
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing responses the client accepts compressed."""
+
+    def __init__(self, app, min_size: int = DEFAULT_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.min_size))
+
+
+class _CompressingSend:
+    """ASGI send wrapper that decides on the first body message whether to compress."""
+
+    def __init__(self, send: Callable, encoding: str, min_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self.start: Optional[dict] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: dict) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self._flush_start()
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            if more_body:
+                await self._flush_start(encoded=True)
+                await self.send({"type": "http.response.body", "body": self.compressor.compress(body), "more_body": True})
+            else:
+                compressed = self.compressor.finish(body)
+                await self._flush_start(encoded=True, length=len(compressed))
+                await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        if more_body:
+            chunk = self.compressor.compress(body)
+            if chunk:
+                await self.send({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.finish(body)})
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        start = self.start or {}
+        if start.get("status", 200) not in (200, 201, 202, 203):
+            return False  # No body to compress (204, 304) or a partial/error response
+        headers: Dict[bytes, bytes] = {key.lower(): value for key, value in start.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False  # Precompressed payload or asset
+        if not _compressible(headers.get(b"content-type", b"").decode("latin-1")):
+            return False
+        if more_body:
+            return True  # Streams are compressed whatever their first chunk's size
+        return len(body) >= self.min_size
+
+    async def _flush_start(self, encoded: bool = False, length: Optional[int] = None) -> None:
+        """
+        Send the held response start; when encoded, with Content-Encoding and
+        the compressed length (none for a stream).
+        """
+        if self.start is None:
+            return
+        start, self.start = self.start, None
+        if encoded:
+            headers = []
+            vary = None
+            for key, value in start.get("headers", []):
+                name = key.lower()
+                if name == b"content-length":
+                    continue
+                if name == b"vary":
+                    vary = value
+                    continue
+                if name == b"etag" and not value.startswith(b"W/"):
+                    value = b"W/" + value  # Same resource, different bytes
+                headers.append((key, value))
+            if vary is None:
+                vary = b"Accept-Encoding"
+            elif b"accept-encoding" not in vary.lower():
+                vary += b", Accept-Encoding"
+            headers.append((b"vary", vary))
+            headers.append((b"content-encoding", self.encoding.encode("latin-1")))
+            if length is not None:
+                headers.append((b"content-length", str(length).encode("latin-1")))
+            start = {**start, "headers": headers}
+        await self.send(start)
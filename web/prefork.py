@@ -0,0 +1,204 @@
+"""
+Pre-fork worker manager for production serving (run_Fastapi.py --prod).
+
+The parent imports the app once (catalogs and the built asset pipeline),
+runs on_preload() (e.g. warming caches the workers can inherit), binds
+the listening socket and freezes the GC heap, then forks the workers.
+Workers share those pages copy-on-write instead of each loading its own
+catalogs, and all accept on one socket.
+
+Signals to the parent:
+  SIGHUP          graceful restart: run on_restart() (e.g. reload and
+                  re-warm the catalogs), fork a fresh set of workers, then
+                  let the old ones finish their in-flight requests and exit.
+  SIGTERM/SIGINT  graceful stop: workers stop accepting and drain, and are
+                  killed if still running after graceful_timeout.
+
+Workers that die unexpectedly are replaced. POSIX only (needs os.fork).
+"""
+
+import gc
+import importlib
+import logging
+import os
+import signal
+import time
+from typing import Callable, Dict, Optional, Set
+
+import uvicorn
+
+logger = logging.getLogger("uvicorn.error")
+
+# Seconds between supervision passes (reaping, restarts).
+TICK_SECONDS = 0.5
+
+
+def fork_supported() -> bool:
+    return hasattr(os, "fork")
+
+
+class PreforkServer:
+    """Preload an ASGI app, then fork and supervise uvicorn workers."""
+
+    def __init__(
+        self,
+        app_path: str,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 2,
+        keep_alive: int = 5,
+        backlog: int = 2048,
+        graceful_timeout: int = 30,
+        log_level: str = "info",
+        on_preload: Optional[Callable[[], None]] = None,
+        on_restart: Optional[Callable[[], None]] = None,
+    ):
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.keep_alive = keep_alive
+        self.backlog = backlog
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.on_preload = on_preload
+        self.on_restart = on_restart
+        self._children: Dict[int, int] = {}  # pid -> generation
+        self._retiring: Set[int] = set()
+        self._generation = 0
+        self._stopping = False
+        self._restart = False
+
+    def _load_app(self):
+        module_name, _, attr = self.app_path.partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+
+    def run(self) -> None:
+        started = time.perf_counter()
+        app = self._load_app()
+        self.config = uvicorn.Config(
+            app,
+            host=self.host,
+            port=self.port,
+            log_level=self.log_level,
+            timeout_keep_alive=self.keep_alive,
+            backlog=self.backlog,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        self.config.load()  # Configures logging
+        if self.on_preload is not None:
+            self.on_preload()
+        self.socket = self.config.bind_socket()
+        logger.info("Preloaded %s in %.0f ms", self.app_path, (time.perf_counter() - started) * 1000)
+
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        self._spawn_generation()
+        try:
+            while not self._stopping:
+                self._reap()
+                if self._restart:
+                    self._restart = False
+                    self._rolling_restart()
+                current = sum(1 for pid in self._children if pid not in self._retiring)
+                for _ in range(self.workers - current):
+                    if not self._stopping:
+                        self._spawn(self._generation)
+                time.sleep(TICK_SECONDS)
+        finally:
+            self._stop_all()
+            self.socket.close()
+
+    # -- signals -----------------------------------------------------------
+
+    def _handle_restart(self, signum, frame) -> None:
+        self._restart = True
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    # -- workers -----------------------------------------------------------
+
+    def _spawn_generation(self) -> None:
+        # Objects that exist now are never collected in the workers, so the
+        # GC does not touch (and copy) the preloaded pages.
+        gc.collect()
+        gc.freeze()
+        self._generation += 1
+        for _ in range(self.workers):
+            self._spawn(self._generation)
+
+    def _spawn(self, generation: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()
+        self._children[pid] = generation
+        logger.info("Started worker %d (generation %d)", pid, generation)
+
+    def _run_worker(self) -> None:
+        status = 0
+        try:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            # uvicorn installs its own SIGTERM/SIGINT handlers for a graceful exit.
+            uvicorn.Server(self.config).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _reap(self) -> None:
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._children.pop(pid, None)
+            if pid in self._retiring:
+                self._retiring.discard(pid)
+            elif not self._stopping:
+                logger.warning("Worker %d exited unexpectedly (status %d); replacing it", pid, status)
+
+    def _rolling_restart(self) -> None:
+        """Start a new generation, then gracefully stop the previous one."""
+        logger.info("Graceful restart requested")
+        gc.unfreeze()  # Let the previous generation's catalogs be collected
+        if self.on_restart is not None:
+            try:
+                self.on_restart()
+            except Exception:
+                logger.exception("Restart hook failed; restarting workers anyway")
+        old = [pid for pid in self._children if pid not in self._retiring]
+        self._spawn_generation()
+        self._retiring.update(old)
+        for pid in old:
+            self._signal(pid, signal.SIGTERM)
+
+    def _stop_all(self) -> None:
+        for pid in list(self._children):
+            self._retiring.add(pid)
+            self._signal(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._children):
+            logger.warning("Worker %d did not stop in time; killing it", pid)
+            self._signal(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self._children.pop(pid, None)
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
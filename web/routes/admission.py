@@ -0,0 +1,154 @@
+"""
+Admission control: per-endpoint concurrency limits by cost class.
+
+Every router is assigned a cost class where it is included in
+web/server.py. Each endpoint of a limited class gets its own gate that
+admits max_concurrent requests at once and queues up to max_waiting more
+for at most queue_timeout seconds. Past either budget the request fails
+fast with 503 and Retry-After, so bursts of expensive calls cannot push
+up latency for cheap endpoints, which are not gated at all.
+
+Gates are keyed by "METHOD path" with the path as declared on the router
+(e.g. "POST /parse-prompt"). For streaming responses the slot is held until
+the stream finishes. Counters are reported by /api/admission/stats.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from fastapi import Depends, Request
+
+
+@dataclass(frozen=True)
+class CostClass:
+    name: str
+    max_concurrent: int  # Requests running at once, per endpoint
+    max_waiting: int  # Requests queued behind them, per endpoint
+    queue_timeout: float  # Seconds a queued request may wait
+    retry_after: int  # Seconds suggested to rejected clients
+
+
+COST_CLASSES: Dict[str, Optional[CostClass]] = {
+    "cheap": None,  # Not gated
+    "moderate": CostClass("moderate", max_concurrent=8, max_waiting=32, queue_timeout=0.5, retry_after=1),
+    "heavy": CostClass("heavy", max_concurrent=2, max_waiting=8, queue_timeout=2.0, retry_after=2),
+}
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when an endpoint's concurrency or queue-time budget is exceeded."""
+
+    def __init__(self, endpoint: str, cost: CostClass, reason: str):
+        super().__init__(f"{endpoint} is busy ({reason}); retry shortly")
+        self.endpoint = endpoint
+        self.retry_after = cost.retry_after
+
+
+class Gate:
+    """FIFO concurrency gate for one endpoint."""
+
+    def __init__(self, endpoint: str, cost: CostClass):
+        self.endpoint = endpoint
+        self.cost = cost
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.peak_waiting = 0
+        self.wait_seconds = 0.0
+
+    async def acquire(self) -> None:
+        if self.active < self.cost.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.cost.max_waiting:
+            self.rejected_full += 1
+            raise AdmissionRejected(self.endpoint, self.cost, "queue full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+        started = time.perf_counter()
+        try:
+            # A releasing request hands its slot over by resolving the future.
+            await asyncio.wait_for(future, self.cost.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise AdmissionRejected(self.endpoint, self.cost, "queue time budget exceeded")
+        finally:
+            self.wait_seconds += time.perf_counter() - started
+            if future in self._waiters:
+                self._waiters.remove(future)
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)  # Slot passes to the waiter; active is unchanged
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "cost_class": self.cost.name,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.cost.max_concurrent,
+            "max_waiting": self.cost.max_waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "peak_waiting": self.peak_waiting,
+            "mean_wait_ms": round(self.wait_seconds / self.queued * 1000, 3) if self.queued else 0.0,
+        }
+
+
+class AdmissionController:
+    """Gates by endpoint, created on first request."""
+
+    def __init__(self):
+        self.gates: Dict[str, Gate] = {}
+
+    def gate(self, endpoint: str, cost: CostClass) -> Gate:
+        gate = self.gates.get(endpoint)
+        if gate is None:
+            gate = self.gates[endpoint] = Gate(endpoint, cost)
+        return gate
+
+    def stats(self) -> dict:
+        return {endpoint: gate.stats() for endpoint, gate in sorted(self.gates.items())}
+
+
+admission = AdmissionController()
+
+
+def cost_class(name: str):
+    """
+    Router dependency applying cost class name to every endpoint of the router:
+    app.include_router(router, dependencies=[cost_class("heavy")]).
+    """
+    cost = COST_CLASSES[name]
+
+    async def admit(request: Request):
+        if cost is None:
+            yield
+            return
+        route = request.scope.get("route")
+        endpoint = f"{request.method} {route.path if route else request.url.path}"
+        gate = admission.gate(endpoint, cost)
+        await gate.acquire()
+        try:
+            yield
+        finally:
+            gate.release()
+
+    return Depends(admit)
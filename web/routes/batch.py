@@ -0,0 +1,114 @@
+"""
+Batch generation routes: stream many seeded random characters in one request.
+"""
+
+import asyncio
+import json
+import random
+from typing import Dict, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from generator.batch import CharacterSampler, generate_batch
+from generator.export import ColumnCoder, ExportError, arrow_schema, arrow_stream_chunks
+
+from .deps import gen
+from .prompt import BudgetStrategy, PromptSyntax, SlotState
+
+router = APIRouter()
+
+MAX_BATCH_COUNT = 10_000_000
+
+# Records serialized per response chunk; each chunk is awaited by the ASGI
+# send, so a slow client pauses generation instead of growing a buffer.
+STREAM_CHUNK_RECORDS = 64
+
+# Rows per Arrow record batch when format="arrow".
+ARROW_CHUNK_RECORDS = 4096
+
+
+class GenerateBatchRequest(BaseModel):
+    count: int
+    seed: Optional[int] = None  # None = pick one; echoed in X-Batch-Seed
+    start: int = 0  # First record index (resume a partial stream)
+    locked: Dict[str, bool] = {}
+    slots: Dict[str, SlotState] = {}  # Values for locked slots
+    palette_enabled: bool = True
+    palette_id: Optional[str] = None
+    full_body_mode: bool = False
+    disabled_groups: Dict[str, List[str]] = {}  # slot_name -> [group_keys]
+    output_language: str = "en"
+    token_budget: Optional[int] = None
+    budget_strategy: BudgetStrategy = "drop"
+    prompt_syntax: PromptSyntax = "a1111"
+    format: Literal["ndjson", "arrow"] = "ndjson"  # arrow = integer-coded IPC stream
+
+
+@router.post("/generate-batch/stream")
+async def generate_batch_stream(req: GenerateBatchRequest):
+    """
+    Stream count seeded characters as NDJSON, one record per line:
+    {"index", "prompt", "slots": {slot: value_id}, "colors": {slot: color}}.
+    With format="arrow", stream an Arrow IPC stream of integer-coded columns
+    instead (see generator/export.py; the dictionary is in the schema metadata).
+    The same seed and settings always produce the same records.
+    """
+    if not 1 <= req.count <= MAX_BATCH_COUNT:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_BATCH_COUNT}")
+    if not 0 <= req.start <= req.count:
+        raise HTTPException(status_code=400, detail="start must be between 0 and count")
+    seed = req.seed if req.seed is not None else random.getrandbits(63)
+
+    sampler = CharacterSampler(
+        gen,
+        locked=req.locked,
+        slots=req.slots,
+        palette_id=req.palette_id if req.palette_enabled else None,
+        disabled_groups=req.disabled_groups,
+        full_body_mode=req.full_body_mode,
+    )
+    records = generate_batch(
+        gen, sampler, req.count, seed,
+        start=req.start,
+        language=req.output_language,
+        dialect=req.prompt_syntax,
+        token_budget=req.token_budget,
+        budget_strategy=req.budget_strategy,
+    )
+
+    headers = {"X-Batch-Seed": str(seed)}
+    if req.format == "arrow":
+        coder = ColumnCoder(gen)
+        try:
+            arrow_schema(coder)
+        except ExportError as exc:
+            raise HTTPException(status_code=501, detail=str(exc))
+
+        async def arrow_chunks():
+            for chunk in arrow_stream_chunks(coder, records, seed, ARROW_CHUNK_RECORDS):
+                yield chunk
+                await asyncio.sleep(0)
+
+        return StreamingResponse(
+            arrow_chunks(), media_type="application/vnd.apache.arrow.stream", headers=headers
+        )
+
+    async def ndjson_chunks():
+        lines = []
+        for record in records:
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            if len(lines) >= STREAM_CHUNK_RECORDS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+                # Let other requests run between chunks of CPU-bound work.
+                await asyncio.sleep(0)
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+    return StreamingResponse(
+        ndjson_chunks(),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
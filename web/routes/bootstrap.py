@@ -0,0 +1,94 @@
+"""
+Bootstrap route: everything the page needs before its first render, in one response.
+
+/api/bootstrap?lang= bundles the /api/slots and /api/palettes bodies, the
+saved config names and the UI string table for lang. The body is cached
+and precompressed like the catalog payloads (see payloads.py), keyed by
+catalog version, config names and string-table mtime. The index page can
+also carry it inline (see inline_bootstrap) so a cold load needs no API
+round trips at all.
+"""
+
+import json
+from pathlib import Path
+
+from fastapi import APIRouter, Request
+
+from .configs import config_names
+from .deps import gen, payload_cache
+from .payloads import Payload, payload_response
+from .prompt import palettes_data
+from .slots import slots_data
+
+router = APIRouter()
+
+I18N_DIR = Path(__file__).parent.parent / "static" / "i18n"
+
+# Cookie the frontend sets to its UI locale, read when inlining into index.html.
+UI_LOCALE_COOKIE = "ui_locale"
+
+# Element id of the inlined JSON in index.html.
+BOOTSTRAP_ELEMENT_ID = "bootstrap-data"
+
+
+def _ui_strings_path(language: str) -> Path:
+    return I18N_DIR / f"{language}.json"
+
+
+def _version(language: str) -> tuple:
+    path = _ui_strings_path(language)
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    return tuple(config_names()), mtime
+
+
+def bootstrap_data(language: str) -> dict:
+    """Build the /api/bootstrap response body for language."""
+    path = _ui_strings_path(language)
+    ui_strings = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            ui_strings = json.load(f)
+    return {
+        "lang": language,
+        "catalog_version": gen.catalog_version,
+        "slots": slots_data(language),
+        "palettes": palettes_data(language),
+        "configs": config_names(),
+        "ui_strings": ui_strings,
+    }
+
+
+def bootstrap_payload(lang: str) -> Payload:
+    language = gen.normalize_language(lang)
+    return payload_cache.get("bootstrap", language, bootstrap_data, version=_version(language))
+
+
+@router.get("/bootstrap")
+async def get_bootstrap(request: Request, lang: str = "en"):
+    """Return slots, palettes, config names and UI strings for lang in one response."""
+    return payload_response(request, bootstrap_payload(lang))
+
+
+def request_language(request: Request) -> str:
+    """UI language for a page request: the locale cookie, then Accept-Language."""
+    cookie = request.cookies.get(UI_LOCALE_COOKIE)
+    if cookie:
+        return gen.normalize_language(cookie)
+    accept = request.headers.get("accept-language", "")
+    return gen.normalize_language(accept.split(",")[0].split(";")[0])
+
+
+def inline_bootstrap(index: Payload, lang: str) -> Payload:
+    """Return index with the bootstrap JSON for lang embedded in a script element."""
+    bootstrap = bootstrap_payload(lang)
+
+    def build(_language: str) -> Payload:
+        # "</" cannot appear inside a script element; "<\/" is the same JSON string.
+        data = bootstrap.body.replace(b"</", b"<\\/")
+        script = (
+            f'  <script id="{BOOTSTRAP_ELEMENT_ID}" type="application/json">'.encode("utf-8")
+            + data + b"</script>\n</head>"
+        )
+        return Payload.from_bytes(index.body.replace(b"</head>", script, 1))
+
+    return payload_cache.get("index", lang, build, version=(index.etag, bootstrap.etag))
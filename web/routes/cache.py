@@ -0,0 +1,109 @@
+"""
+Bounded LRU cache for rendered prompt strings.
+
+Entries are keyed by a canonical hash of the prompt-relevant request state
+(slots, body modes, output language, token budget, syntax) plus the
+generator's catalog_version, so a catalog reload invalidates everything.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from generator.prompt_generator import PromptGenerator
+
+
+class PromptCache:
+    """Thread-safe LRU map of canonical request hash -> prompt string."""
+
+    def __init__(self, generator: PromptGenerator, max_entries: int = 2048):
+        self.generator = generator
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._catalog_version = generator.catalog_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(
+        self,
+        slots: Dict[str, Any],
+        full_body_mode: bool,
+        upper_body_mode: bool,
+        output_language: Optional[str],
+        token_budget: Optional[int] = None,
+        budget_strategy: str = "drop",
+        prompt_syntax: str = "a1111",
+    ) -> bytes:
+        """Return a 16-byte digest of the canonical prompt-relevant state."""
+        canonical = [
+            self.generator.catalog_version,
+            bool(full_body_mode),
+            bool(upper_body_mode),
+            self.generator.normalize_language(output_language),
+            token_budget or 0,
+            budget_strategy,
+            prompt_syntax,
+            [
+                [name, slot.enabled, slot.value_id, slot.value, slot.color, float(slot.weight)]
+                for name, slot in sorted(slots.items())
+            ],
+        ]
+        encoded = json.dumps(canonical, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+
+    def get_or_build(self, key: bytes, builder: Callable[[], str]) -> str:
+        """Return the cached prompt for key, building and storing it on a miss."""
+        with self._lock:
+            self._check_catalog_version()
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        prompt = builder()
+
+        with self._lock:
+            self._entries[key] = prompt
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return prompt
+
+    def _check_catalog_version(self) -> None:
+        """Drop all entries if the catalogs were reloaded since last access."""
+        if self._catalog_version != self.generator.catalog_version:
+            self._entries.clear()
+            self._catalog_version = self.generator.catalog_version
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        """Return size and hit-ratio metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "catalog_version": self._catalog_version,
+            }
@@ -6,7 +6,7 @@ import json
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, List
 from datetime import datetime
 
 router = APIRouter()
@@ -20,11 +20,15 @@ class SaveConfigRequest(BaseModel):
     data: Dict[str, Any]
 
 
+def config_names() -> List[str]:
+    """Return the sorted names of all saved configurations."""
+    return sorted(f.stem for f in CONFIGS_DIR.glob("*.json"))
+
+
 @router.get("/configs")
 async def list_configs():
     """List all saved configuration names."""
-    names = [f.stem for f in CONFIGS_DIR.glob("*.json")]
-    return {"configs": sorted(names)}
+    return {"configs": config_names()}
 
 
 @router.get("/configs/{name}")
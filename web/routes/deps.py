@@ -2,7 +2,28 @@
 Shared route dependencies.
 """
 
+from generator.catalog_history import CatalogHistory
+from generator.character_code import CharacterCodec
 from generator.prompt_generator import PromptGenerator
 
+from .cache import PromptCache
+from .offload import OffloadPool
+from .payloads import PayloadCache
+
 # Keep one catalog loader instance per app process.
 gen = PromptGenerator()
+
+# Rendered prompt strings keyed by canonical slot state + catalog version.
+prompt_cache = PromptCache(gen)
+
+# Compact character code encoder bound to the same catalogs.
+codec = CharacterCodec(gen)
+
+# Serialized + precompressed catalog responses (/api/slots, /api/palettes).
+payload_cache = PayloadCache(gen)
+
+# Per-version slot-option diffs for /api/slots?since=.
+catalog_history = CatalogHistory(gen)
+
+# Process/thread lanes for CPU-heavy routes (parse-prompt, randomize-all, apply-palette).
+offload = OffloadPool(gen)
@@ -0,0 +1,109 @@
+"""
+Lean JSON path for hot routes (/api/generate-prompt, /api/randomize*,
+/api/parse-prompt).
+
+Request bodies are validated straight from bytes with pydantic's compiled
+schema (model_validate_json) instead of json.loads plus a second pass over
+the resulting dicts, and responses are encoded directly to bytes (with
+orjson when installed) instead of going through jsonable_encoder.
+
+Only the success path is different: a body that fails fast validation is
+re-checked the way FastAPI does it, so clients get exactly the same 422
+details (json_invalid, loc prefixed with "body", and so on).
+"""
+
+import email.message
+import json
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar
+
+from fastapi import Depends, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder gives the same JSON.
+    orjson = None
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+def dumps(data: Any) -> bytes:
+    """Encode data as compact UTF-8 JSON (same output as FastAPI's JSONResponse)."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(data: Any, status_code: int = 200) -> Response:
+    """Response with data pre-encoded by dumps()."""
+    return Response(dumps(data), status_code=status_code, media_type="application/json")
+
+
+@lru_cache(maxsize=64)
+def _is_json(content_type: str) -> bool:
+    message = email.message.Message()
+    message["content-type"] = content_type
+    if message.get_content_maintype() != "application":
+        return False
+    subtype = message.get_content_subtype()
+    return subtype == "json" or subtype.endswith("+json")
+
+
+def _slow_parse(model: Type[Model], body: bytes, content_type: str) -> Model:
+    """Validate body the way FastAPI does for a body param of type model, raising the same errors."""
+    if not body:
+        raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    value: Any = body
+    if content_type and _is_json(content_type):
+        try:
+            value = json.loads(body)
+        except json.JSONDecodeError as exc:
+            raise RequestValidationError(
+                [{
+                    "type": "json_invalid",
+                    "loc": ("body", exc.pos),
+                    "msg": "JSON decode error",
+                    "input": {},
+                    "ctx": {"error": exc.msg},
+                }],
+                body=exc.doc,
+            )
+        if value is None:
+            raise RequestValidationError([{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}])
+    try:
+        return model.model_validate(value, from_attributes=True)
+    except ValidationError as exc:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in exc.errors(include_url=False)]
+        raise RequestValidationError(errors, body=value)
+
+
+def json_body(model: Type[Model]):
+    """
+    Dependency returning the request body as model:
+    req: GenerateRequest = json_body(GenerateRequest).
+    """
+
+    async def parse(request: Request) -> Model:
+        body = await request.body()
+        content_type = request.headers.get("content-type", "")
+        if body and content_type and _is_json(content_type):
+            try:
+                return model.model_validate_json(body)
+            except ValidationError:
+                pass  # Report (or accept) it exactly as FastAPI would
+        return _slow_parse(model, body, content_type)
+
+    return Depends(parse)
+
+
+def body_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """openapi_extra documenting model as the JSON request body of a json_body() route."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
@@ -0,0 +1,178 @@
+"""
+Bounded worker pools for CPU-heavy route work, so one slow request does not
+stall the event loop for every other client.
+
+Two lanes:
+  - "process": prompt parsing (fuzzy matching over every indexed name).
+    Worker processes are pre-warmed with their own catalogs and
+    PromptParser indices, and resync when the server's catalog_version moves.
+  - "thread": work that needs the server's own generator and prompt cache
+    (randomize-all, apply-palette). Threads share the GIL, but the event
+    loop keeps serving other requests between the GIL switch intervals.
+
+Each lane admits at most max_pending jobs (running + queued); beyond that
+run() raises PoolBusy and the route answers 503 with Retry-After.
+Queue depth and counters are reported by /api/offload/stats.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+# Environment variable for the number of parser processes (0 = use threads).
+PROCESS_WORKERS_ENV = "PROMPT_GEN_PARSE_WORKERS"
+
+DEFAULT_MAX_PENDING = 64
+
+# Seconds suggested to clients in Retry-After when a lane is full.
+RETRY_AFTER_SECONDS = 1
+
+
+class PoolBusy(RuntimeError):
+    """Raised when a lane already has max_pending jobs."""
+
+    def __init__(self, lane: str):
+        super().__init__(f"The {lane} worker pool is busy; retry shortly")
+        self.lane = lane
+
+
+# -- worker process side -----------------------------------------------------
+
+# (catalog_version the worker last synced to, generator, parser)
+_worker_state: Optional[tuple] = None
+
+
+def _init_worker(catalog_version: int) -> None:
+    """Build catalogs and parser indices once per worker process."""
+    global _worker_state
+    from generator.prompt_generator import PromptGenerator
+    from .parser import PromptParser
+
+    generator = PromptGenerator()
+    _worker_state = (catalog_version, generator, PromptParser(generator))
+
+
+def _worker_parser(catalog_version: int):
+    global _worker_state
+    version, generator, parser = _worker_state
+    if version != catalog_version:
+        # The server reloaded its catalogs; follow it before parsing.
+        from .parser import PromptParser
+
+        generator.reload_catalogs()
+        parser = PromptParser(generator)
+        _worker_state = (catalog_version, generator, parser)
+    return parser
+
+
+def _warm(_: int) -> int:
+    return os.getpid()
+
+
+def parse_prompt_task(catalog_version: int, prompt: str, use_fuzzy: bool) -> Dict[str, Any]:
+    """Process-lane job: parse prompt with this worker's parser."""
+    return _worker_parser(catalog_version).parse(prompt, use_fuzzy=use_fuzzy)
+
+
+# -- server side -------------------------------------------------------------
+
+class _Lane:
+    """One executor plus admission bookkeeping."""
+
+    def __init__(self, name: str, max_pending: int):
+        self.name = name
+        self.max_pending = max_pending
+        self.executor: Optional[Executor] = None
+        self.workers = 0
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "peak_pending": self.peak_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+class OffloadPool:
+    """Process and thread lanes for heavy route work."""
+
+    def __init__(self, generator, process_workers: Optional[int] = None,
+                 thread_workers: Optional[int] = None, max_pending: int = DEFAULT_MAX_PENDING):
+        self.generator = generator
+        if process_workers is None:
+            process_workers = int(os.environ.get(PROCESS_WORKERS_ENV, min(2, os.cpu_count() or 1)))
+        self.process_workers = max(0, process_workers)
+        self.thread_workers = thread_workers or min(4, (os.cpu_count() or 1) + 1)
+        self.lanes = {
+            "process": _Lane("process", max_pending),
+            "thread": _Lane("thread", max_pending),
+        }
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Create the executors and pre-warm every worker process (idempotent)."""
+        with self._lock:
+            threads = self.lanes["thread"]
+            if threads.executor is None:
+                threads.executor = ThreadPoolExecutor(self.thread_workers, thread_name_prefix="offload")
+                threads.workers = self.thread_workers
+            processes = self.lanes["process"]
+            if processes.executor is None and self.process_workers:
+                processes.executor = ProcessPoolExecutor(
+                    max_workers=self.process_workers,
+                    initializer=_init_worker,
+                    initargs=(self.generator.catalog_version,),
+                )
+                processes.workers = self.process_workers
+                # Workers start on demand; one job each brings them all up now.
+                list(processes.executor.map(_warm, range(self.process_workers)))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for lane in self.lanes.values():
+                if lane.executor is not None:
+                    lane.executor.shutdown(wait=True, cancel_futures=True)
+                    lane.executor = None
+                    lane.workers = 0
+
+    async def run(self, lane_name: str, fn: Callable, *args) -> Any:
+        """Run fn(*args) on a lane and await its result; raises PoolBusy when full."""
+        self.start()
+        lane = self.lanes[lane_name]
+        if lane.pending >= lane.max_pending:
+            lane.rejected += 1
+            raise PoolBusy(lane.name)
+        lane.pending += 1
+        lane.peak_pending = max(lane.peak_pending, lane.pending)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(lane.executor, partial(fn, *args))
+        except Exception:
+            lane.failed += 1
+            raise
+        finally:
+            lane.pending -= 1
+        lane.completed += 1
+        return result
+
+    async def parse_prompt(self, prompt: str, use_fuzzy: bool = True) -> Dict[str, Any]:
+        """Parse on the process lane, or on the thread lane when process workers are disabled."""
+        self.start()
+        if self.lanes["process"].executor is None:
+            from .parser import get_parser
+            return await self.run("thread", get_parser().parse, prompt, use_fuzzy)
+        return await self.run("process", parse_prompt_task, self.generator.catalog_version, prompt, use_fuzzy)
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,198 @@
+"""
+Paginated slot option routes, so the UI can load visible sections first and
+fetch long dropdowns lazily instead of taking every option from /api/slots.
+
+Options come from per-(slot, language) tables built once per catalog
+version: the localized option list plus the positions of each group.
+Cursors are opaque and tied to the catalog version; a cursor from before
+a catalog reload is rejected with 409 so the client restarts its listing.
+"""
+
+import base64
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException
+
+from generator.prompt_generator import PromptGenerator
+
+from .deps import gen
+from .slots import SECTION_LAYOUT
+
+router = APIRouter()
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Fields of a localized option (see get_slot_options_localized).
+OPTION_FIELDS = ("id", "name", "name_i18n", "localized_name", "group", "group_i18n", "localized_group")
+
+
+class OptionTable:
+    """One slot's localized options with per-group position lists."""
+
+    __slots__ = ("options", "by_group")
+
+    def __init__(self, options: List[dict]):
+        self.options = options
+        self.by_group: Dict[str, List[int]] = {}
+        for position, option in enumerate(options):
+            self.by_group.setdefault(option.get("group") or "", []).append(position)
+
+    def positions(self, groups: Optional[List[str]]) -> Optional[List[int]]:
+        """Positions of options in any of groups (in option order), or None for all."""
+        if not groups:
+            return None
+        if len(groups) == 1:
+            return self.by_group.get(groups[0], [])
+        return sorted(p for group in set(groups) for p in self.by_group.get(group, []))
+
+
+class OptionTables:
+    """Thread-safe (slot, language) -> OptionTable map for the current catalogs."""
+
+    def __init__(self, generator: PromptGenerator):
+        self.generator = generator
+        self._tables: Dict[Tuple[str, str], OptionTable] = {}
+        self._lock = threading.Lock()
+        self._catalog_version = generator.catalog_version
+
+    def get(self, slot_name: str, language: str) -> Tuple[OptionTable, int]:
+        """Return (table, catalog_version) for slot_name in language."""
+        language = self.generator.normalize_language(language)
+        key = (slot_name, language)
+        with self._lock:
+            if self._catalog_version != self.generator.catalog_version:
+                self._tables.clear()
+                self._catalog_version = self.generator.catalog_version
+            table = self._tables.get(key)
+            if table is None:
+                table = OptionTable(self.generator.get_slot_options_localized(slot_name, language))
+                self._tables[key] = table
+            return table, self._catalog_version
+
+
+option_tables = OptionTables(gen)
+
+
+def encode_cursor(catalog_version: int, offset: int) -> str:
+    raw = f"{catalog_version}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, catalog_version: int) -> int:
+    """Return the offset in cursor; 400 if malformed, 409 if from another catalog version."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        version, offset = base64.urlsafe_b64decode(padded).decode("ascii").split(":")
+        version, offset = int(version), int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+    if version != catalog_version:
+        raise HTTPException(status_code=409, detail="Catalog changed since this cursor was issued; restart from the first page")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Malformed cursor")
+    return offset
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    names = _split(fields)
+    if not names:
+        return None
+    unknown = [name for name in names if name not in OPTION_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown option fields: {', '.join(unknown)}")
+    return names
+
+
+def _check_limit(limit: int) -> None:
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+
+def option_page(
+    slot_name: str,
+    language: str,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    groups: Optional[List[str]] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[int, dict]:
+    """Return (catalog_version, {"total", "options", "next_cursor"}) for one page of options."""
+    table, catalog_version = option_tables.get(slot_name, language)
+    offset = decode_cursor(cursor, catalog_version) if cursor else 0
+    positions = table.positions(groups)
+    total = len(table.options) if positions is None else len(positions)
+    stop = min(offset + limit, total)
+    if positions is None:
+        page = table.options[offset:stop]
+    else:
+        page = [table.options[p] for p in positions[offset:stop]]
+    if fields:
+        page = [{name: option.get(name) for name in fields} for option in page]
+    return catalog_version, {
+        "total": total,
+        "options": page,
+        "next_cursor": encode_cursor(catalog_version, stop) if stop < total else None,
+    }
+
+
+@router.get("/slots/{slot_name}/options")
+async def get_slot_options_page(
+    slot_name: str,
+    lang: str = "en",
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    group: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    Return a page of one slot's options.
+
+    group: comma-separated group keys to keep; fields: comma-separated
+    option fields to return (e.g. "id,localized_name"). Pass next_cursor
+    back as cursor to get the following page.
+    """
+    if slot_name not in gen.SLOT_DEFINITIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown slot '{slot_name}'")
+    _check_limit(limit)
+    version, page = option_page(slot_name, lang, cursor, limit, _split(group), _parse_fields(fields))
+    return {"slot": slot_name, "catalog_version": version, **page}
+
+
+@router.get("/sections/{section_id}")
+async def get_section(
+    section_id: str,
+    lang: str = "en",
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+):
+    """
+    Return one section's layout and, per slot, its definition and first page
+    of options; continue long slots with /slots/{slot_name}/options.
+    """
+    layout = SECTION_LAYOUT.get(section_id)
+    if layout is None:
+        raise HTTPException(status_code=404, detail=f"Unknown section '{section_id}'")
+    _check_limit(limit)
+    field_names = _parse_fields(fields)
+    slots = {}
+    version = gen.catalog_version
+    for name in layout["slots"]:
+        definition = gen.SLOT_DEFINITIONS[name]
+        version, page = option_page(name, lang, limit=limit, fields=field_names)
+        slots[name] = {
+            "category": definition["category"],
+            "has_color": definition.get("has_color", False),
+            **page,
+        }
+    return {
+        "section": section_id,
+        "layout": layout,
+        "catalog_version": version,
+        "slots": slots,
+    }
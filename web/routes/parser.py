@@ -10,6 +10,9 @@ from pydantic import BaseModel
 
 from generator.prompt_generator import PromptGenerator
 
+from .deps import offload
+from .fastjson import body_schema, json_body, json_response
+
 router = APIRouter()
 
 
@@ -348,14 +351,16 @@ class ParsePromptResponse(BaseModel):
     confidence: float
 
 
-@router.post("/parse-prompt", response_model=ParsePromptResponse)
-async def parse_prompt(req: ParsePromptRequest):
+@router.post(
+    "/parse-prompt",
+    response_model=ParsePromptResponse,
+    openapi_extra=body_schema(ParsePromptRequest),
+)
+async def parse_prompt(req: ParsePromptRequest = json_body(ParsePromptRequest)):
     """
     Parse a prompt string back into slot settings.
 
     Returns matched slots with their values, colors, and weights,
     plus any unmatched tokens and overall confidence score.
     """
-    parser = get_parser()
-    result = parser.parse(req.prompt, use_fuzzy=req.use_fuzzy)
-    return result
+    return json_response(await offload.parse_prompt(req.prompt, use_fuzzy=req.use_fuzzy))
@@ -0,0 +1,168 @@
+"""
+Serialized, precompressed responses for catalog-derived GET endpoints.
+
+/api/slots and /api/palettes only change when the catalogs are reloaded,
+so their JSON is built once per (endpoint, language, catalog_version) and
+kept as identity, gzip and (if the brotli / zstandard packages are
+installed) brotli and zstd bodies. Responses carry a strong ETag per encoding; a matching
+If-None-Match gets a bodyless 304.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip is always available.
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional
+    zstandard = None
+
+from generator.prompt_generator import PromptGenerator
+
+# Content-Encoding -> ETag suffix, in server preference order.
+ENCODINGS = (("br", "-br"), ("zstd", "-zst"), ("gzip", "-gz"))
+
+# Clients may keep the body but must revalidate it (cheap with the ETag).
+CACHE_CONTROL = "no-cache"
+
+
+@dataclass
+class Payload:
+    """One serialized response body and its precompressed variants."""
+    body: bytes
+    etag: str  # Strong ETag of the identity body, quoted
+    encoded: Dict[str, bytes] = field(default_factory=dict)  # encoding -> body
+
+    @classmethod
+    def from_data(cls, data) -> "Payload":
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls.from_bytes(body)
+
+    @classmethod
+    def from_bytes(cls, body: bytes, min_compress_size: int = 0) -> "Payload":
+        """Wrap body, precompressing it unless it is shorter than min_compress_size."""
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        encoded: Dict[str, bytes] = {}
+        if len(body) >= min_compress_size:
+            encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                encoded["br"] = brotli.compress(body, quality=11)
+            if zstandard is not None:
+                encoded["zstd"] = zstandard.ZstdCompressor(level=19).compress(body)
+        return cls(body=body, etag=f'"{digest}"', encoded=encoded)
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        if encoding is None:
+            return self.etag
+        suffix = dict(ENCODINGS)[encoding]
+        return self.etag[:-1] + suffix + '"'
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}."""
+    accepted: Dict[str, float] = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(payload: Payload, accept_encoding: str) -> Optional[str]:
+    """Return the preferred stored encoding the client accepts, or None for identity."""
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for encoding, _ in ENCODINGS:
+        if encoding in payload.encoded and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: str, payload: Payload) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    known = {payload.etag} | {payload.etag_for(encoding) for encoding in payload.encoded}
+    return not tags.isdisjoint(known)
+
+
+def payload_response(request: Request, payload: Payload, media_type: str = "application/json") -> Response:
+    """Serve payload with content negotiation and conditional-request support."""
+    encoding = choose_encoding(payload, request.headers.get("accept-encoding", ""))
+    headers = {
+        "ETag": payload.etag_for(encoding),
+        "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), payload):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+        body = payload.encoded[encoding]
+    else:
+        body = payload.body
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class PayloadCache:
+    """Thread-safe map of (endpoint, language) -> Payload for the current catalogs."""
+
+    def __init__(self, generator: PromptGenerator):
+        self.generator = generator
+        self._entries: Dict[Tuple[str, str], Tuple[Hashable, Payload]] = {}
+        self._lock = threading.Lock()
+        self._catalog_version = generator.catalog_version
+        self.builds = 0
+
+    def get(self, name: str, language: str, builder: Callable[[str], object],
+            version: Hashable = None) -> Payload:
+        """
+        Return the payload for name in language, building it on first use.
+        version covers inputs other than the catalogs (e.g. saved configs);
+        a different version replaces the stored payload.
+        """
+        language = self.generator.normalize_language(language)
+        key = (name, language)
+        with self._lock:
+            if self._catalog_version != self.generator.catalog_version:
+                self._entries.clear()
+                self._catalog_version = self.generator.catalog_version
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            catalog_version = self._catalog_version
+
+        payload = builder(language)
+        if not isinstance(payload, Payload):
+            payload = Payload.from_data(payload)
+
+        with self._lock:
+            # Don't store a payload built from catalogs that have since been reloaded.
+            if catalog_version == self.generator.catalog_version:
+                self._entries[key] = (version, payload)
+                self.builds += 1
+        return payload
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -2,26 +2,22 @@
 Prompt generation and palette application routes.
 """
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from .deps import gen
+from generator.character_code import CharacterCodeError
+from generator.render import PROMPT_SLOT_ORDER
+
+from .admission import admission
+from .deps import codec, gen, offload, payload_cache, prompt_cache
+from .fastjson import body_schema, json_body, json_response
+from .payloads import payload_response
 
 router = APIRouter()
 
-# Canonical slot order for prompt building (matches prompt_generator.py)
-SLOT_ORDER = [
-    "hair_color", "hair_length", "hair_style", "hair_texture",
-    "eye_color", "eye_expression_quality", "eye_shape", "eye_pupil_state",
-    "eye_state", "eye_accessories",
-    "body_type", "height", "skin", "age_appearance", "special_features",
-    "expression",
-    "full_body", "head", "neck", "upper_body", "waist", "lower_body",
-    "outerwear", "hands", "legs", "feet", "accessory",
-    "view_angle", "pose", "gesture",
-    "background",
-]
+# Canonical slot order for prompt building (owned by the render pipeline)
+SLOT_ORDER = list(PROMPT_SLOT_ORDER)
 
 
 class SlotState(BaseModel):
@@ -32,70 +28,98 @@ class SlotState(BaseModel):
     weight: float = 1.0
 
 
+BudgetStrategy = Literal["drop", "reorder", "break"]
+PromptSyntax = Literal["a1111", "novelai", "plain"]
+
+
 class GenerateRequest(BaseModel):
-    slots: Dict[str, SlotState]
+    slots: Dict[str, SlotState] = {}
+    code: Optional[str] = None  # Compact character code; replaces slots/modes
     full_body_mode: bool = False
     upper_body_mode: bool = False
     output_language: str = "en"
-
-
-@router.post("/generate-prompt")
-async def generate_prompt(req: GenerateRequest):
-    """Build the prompt string from provided slot state."""
-    return {"prompt": build_prompt_string(req)}
+    token_budget: Optional[int] = None  # CLIP tokens; None = unlimited
+    budget_strategy: BudgetStrategy = "drop"
+    prompt_syntax: PromptSyntax = "a1111"  # Weight syntax dialect
+
+
+@router.post("/generate-prompt", openapi_extra=body_schema(GenerateRequest))
+async def generate_prompt(req: GenerateRequest = json_body(GenerateRequest)):
+    """Build the prompt string from provided slot state (verbose or code)."""
+    apply_character_code(req)
+    return json_response({
+        "prompt": build_prompt_string(req),
+        "code": encode_character_code(req.slots, req.full_body_mode, req.upper_body_mode),
+    })
+
+
+def apply_character_code(req: Any) -> None:
+    """
+    Replace a request's slots and modes with its decoded character code.
+    Locks carried in the code are merged into req.locked when present.
+    """
+    if not req.code:
+        return
+    try:
+        decoded = codec.decode(req.code)
+    except CharacterCodeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    req.slots = {name: SlotState(**state) for name, state in decoded["slots"].items()}
+    req.full_body_mode = decoded["full_body_mode"]
+    req.upper_body_mode = decoded["upper_body_mode"]
+    if hasattr(req, "locked"):
+        req.locked = {**decoded["locked"], **req.locked}
+
+
+def encode_character_code(
+    slots: Dict[str, SlotState],
+    full_body_mode: bool,
+    upper_body_mode: bool,
+    locked: Optional[Dict[str, bool]] = None,
+) -> Optional[str]:
+    """Return the character code for a slot state, or None if not encodable."""
+    try:
+        return codec.encode(slots, full_body_mode, upper_body_mode, locked)
+    except CharacterCodeError:
+        return None
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Return prompt cache size and hit-ratio metrics."""
+    return {"prompt_cache": prompt_cache.stats()}
+
+
+@router.get("/offload/stats")
+async def get_offload_stats():
+    """Return worker counts and queue depth of the offload lanes."""
+    return offload.stats()
+
+
+@router.get("/admission/stats")
+async def get_admission_stats():
+    """Return per-endpoint concurrency, queue depth and rejection counts."""
+    return admission.stats()
 
 
 def build_prompt_string(req: GenerateRequest) -> str:
     """Build prompt text from slot state; shared by randomize routes."""
-    parts = ["1girl"]
-
-    output_language = req.output_language
-    full_body_val_id = None
-    fb = req.slots.get("full_body")
-    if fb and fb.enabled and (fb.value_id or fb.value):
-        if fb.value_id:
-            full_body_val_id = fb.value_id
-        else:
-            item = gen.resolve_slot_item("full_body", None, fb.value)
-            full_body_val_id = item.get("id") if item else None
-
-    lower_body_covers_legs = False
-    lower = req.slots.get("lower_body")
-    if lower and lower.enabled and (lower.value_id or lower.value):
-        if lower.value_id:
-            lower_body_covers_legs = gen.lower_body_id_covers_legs(lower.value_id)
-        elif lower.value:
-            item = gen.resolve_slot_item("lower_body", None, lower.value)
-            lower_body_covers_legs = gen.lower_body_item_covers_legs(item)
-    if req.full_body_mode and full_body_val_id:
-        lower_body_covers_legs = False
-
-    for name in SLOT_ORDER:
-        slot = req.slots.get(name)
-        if not slot or not slot.enabled:
-            continue
-        if not slot.value_id and not slot.value:
-            continue
-
-        # Skip upper/lower if full_body active
-        if req.full_body_mode and name in ("upper_body", "lower_body") and full_body_val_id:
-            continue
-        if name == "legs" and lower_body_covers_legs:
-            continue
-
-        value_name = gen.resolve_slot_value_name(name, slot.value_id, slot.value, output_language)
-        if not value_name:
-            continue
-
-        color_name = gen.localize_color_token(slot.color, output_language) if slot.color else None
-        part = f"{color_name} {value_name}" if color_name else value_name
-
-        if slot.weight != 1.0:
-            part = f"({part}:{slot.weight:.1f})"
+    key = prompt_cache.make_key(
+        req.slots, req.full_body_mode, req.upper_body_mode, req.output_language,
+        req.token_budget, req.budget_strategy, req.prompt_syntax,
+    )
+    return prompt_cache.get_or_build(key, lambda: _render_prompt_string(req))
 
-        parts.append(part)
 
-    return ", ".join(parts)
+def _render_prompt_string(req: GenerateRequest) -> str:
+    """Render prompt text from slot state without consulting the cache."""
+    parts = gen.get_renderer().render_parts(
+        req.slots,
+        language=req.output_language,
+        full_body_mode=req.full_body_mode,
+        dialect=req.prompt_syntax,
+    )
+    return ", ".join(gen.fit_to_token_budget(parts, req.token_budget, req.budget_strategy))
 
 
 class ApplyPaletteRequest(BaseModel):
@@ -104,11 +128,18 @@ class ApplyPaletteRequest(BaseModel):
     full_body_mode: bool = False
     upper_body_mode: bool = False
     output_language: str = "en"
+    token_budget: Optional[int] = None
+    budget_strategy: BudgetStrategy = "drop"
+    prompt_syntax: PromptSyntax = "a1111"
 
 
 @router.post("/apply-palette")
 async def apply_palette(req: ApplyPaletteRequest):
     """Apply palette colors to all has_color slots that have a value, then regenerate prompt."""
+    return await offload.run("thread", _apply_palette, req)
+
+
+def _apply_palette(req: ApplyPaletteRequest) -> dict:
     new_colors = {}
 
     for name, defn in gen.SLOT_DEFINITIONS.items():
@@ -128,6 +159,9 @@ async def apply_palette(req: ApplyPaletteRequest):
         full_body_mode=req.full_body_mode,
         upper_body_mode=req.upper_body_mode,
         output_language=req.output_language,
+        token_budget=req.token_budget,
+        budget_strategy=req.budget_strategy,
+        prompt_syntax=req.prompt_syntax,
     )
     prompt = build_prompt_string(gen_req)
 
@@ -135,14 +169,21 @@ async def apply_palette(req: ApplyPaletteRequest):
 
 
 @router.get("/palettes")
-async def get_palettes():
-    """Return all palettes and individual colors."""
+async def get_palettes(request: Request, lang: str = "en"):
+    """Return all palettes (names localized to lang) and individual colors."""
+    return payload_response(request, payload_cache.get("palettes", lang, palettes_data))
+
+
+def palettes_data(language: str) -> dict:
+    """Build the /api/palettes response body for language."""
     palettes = []
     for p in gen.palettes.values():
+        name = p.get("name", p["id"])
+        name_i18n = p.get("name_i18n", {"en": name, "zh": name})
         palettes.append({
             "id": p["id"],
-            "name": p.get("name", p["id"]),
-            "name_i18n": p.get("name_i18n", {"en": p.get("name", p["id"]), "zh": p.get("name", p["id"])}),
+            "name": name_i18n.get(language) or name,
+            "name_i18n": name_i18n,
             "description_i18n": p.get("description_i18n", {"en": p.get("description", ""), "zh": p.get("description", "")}),
             "colors": p.get("colors", []),
         })
@@ -0,0 +1,52 @@
+"""
+Typeahead option search across all slots (see generator/search.py).
+
+The index is built from the catalogs on first use (or by startup warmup)
+and rebuilt after a catalog reload. Results carry the localized name and
+group label of each option as get_slot_options_localized gives them.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+from generator.search import SearchIndexCache
+
+from .deps import gen
+from .fastjson import json_response
+
+router = APIRouter()
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+search_index = SearchIndexCache(gen)
+
+
+@router.get("/search")
+async def search_options(q: str = "", lang: str = "en", slot: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+    """
+    Return options whose English name, alias or localized name matches q,
+    best first: exact, prefix, word prefix, then substring matches.
+    slot restricts the search to one slot.
+    """
+    if slot is not None and slot not in gen.SLOT_DEFINITIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown slot '{slot}'")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_LIMIT}")
+    index = search_index.get()
+    language = gen.normalize_language(lang)
+    results = []
+    for hit in index.search(q, slot=slot, limit=limit):
+        option = gen.get_slot_options_localized(hit.slot, language)[hit.position]
+        results.append({
+            "slot": hit.slot,
+            "id": option["id"],
+            "name": option["name"],
+            "localized_name": option["localized_name"],
+            "group": option["group"],
+            "localized_group": option["localized_group"],
+            "matched": hit.matched,
+            "match": hit.match,
+        })
+    return json_response({"query": q, "catalog_version": index.catalog_version, "results": results})
@@ -0,0 +1,273 @@
+"""
+WebSocket session channel: the server keeps one client's slot state and
+answers small ops with only what changed.
+
+Each client message is a JSON object {"op": ..., "id": optional echo, ...}:
+
+    {"op": "load", "slots": {...}, "locked": {...}, "full_body_mode": ..., "code": ...}
+    {"op": "set", "slot": "hair_color", "value_id": "black_hair", "color": ..., "enabled": ..., "weight": ...}
+    {"op": "lock", "slot": "hair_color", "locked": true}
+    {"op": "randomize", "slots": [...]} | {"op": "randomize", "section": "clothing"} | {"op": "randomize"}
+    {"op": "settings", "full_body_mode": ..., "palette_id": ..., "prompt_syntax": ..., ...}
+    {"op": "language", "lang": "zh"}
+    {"op": "state"}
+
+and each reply is {"id", "changed": {slot: state}, "locked"?, "prompt"?, "code"}
+where prompt is only sent when it differs from the last one pushed, or
+{"id", "error"} if the op was rejected (the session state is unchanged).
+"""
+
+from typing import Any, Dict, List, Optional, get_args
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from generator.character_code import CharacterCodeError
+
+from .deps import codec, gen
+from .prompt import (
+    BudgetStrategy,
+    GenerateRequest,
+    PromptSyntax,
+    SlotState,
+    build_prompt_string,
+    encode_character_code,
+)
+from .slots import SECTION_LAYOUT
+
+router = APIRouter()
+
+SLOT_FIELDS = ("enabled", "value_id", "value", "color", "weight")
+
+# Settings an op may change: a type the value must have, or a list of allowed values.
+SETTINGS = {
+    "full_body_mode": bool,
+    "upper_body_mode": bool,
+    "palette_enabled": bool,
+    "palette_id": (str, type(None)),
+    "disabled_groups": dict,
+    "token_budget": (int, type(None)),
+    "budget_strategy": list(get_args(BudgetStrategy)),
+    "prompt_syntax": list(get_args(PromptSyntax)),
+}
+
+
+class SessionError(ValueError):
+    """An op that cannot be applied; reported back to the client."""
+
+
+def _slot_dict(slot: SlotState) -> dict:
+    return {name: getattr(slot, name) for name in SLOT_FIELDS}
+
+
+class Session:
+    """Slot state, locks and settings for one connection."""
+
+    def __init__(self, generator=gen):
+        self.generator = generator
+        self.slots: Dict[str, SlotState] = {name: SlotState() for name in generator.SLOT_DEFINITIONS}
+        self.locked: Dict[str, bool] = {}
+        self.full_body_mode = False
+        self.upper_body_mode = False
+        self.palette_enabled = True
+        self.palette_id: Optional[str] = None
+        self.disabled_groups: Dict[str, List[str]] = {}
+        self.output_language = "en"
+        self.token_budget: Optional[int] = None
+        self.budget_strategy = "drop"
+        self.prompt_syntax = "a1111"
+        self._last_prompt: Optional[str] = None
+
+    # -- ops ---------------------------------------------------------------
+
+    def handle(self, message: Dict[str, Any]) -> dict:
+        """Apply one op and return the reply."""
+        op = message.get("op")
+        handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+        if handler is None:
+            raise SessionError(f"Unknown op {op!r}")
+        before = {name: _slot_dict(slot) for name, slot in self.slots.items()}
+        locked_before = dict(self.locked)
+        full = handler(message)  # True: resend every slot, the locks and the prompt
+
+        changed = {}
+        for name, slot in self.slots.items():
+            state = _slot_dict(slot)
+            if full or state != before.get(name):
+                changed[name] = state
+        reply: Dict[str, Any] = {"changed": changed}
+        if full or self.locked != locked_before:
+            reply["locked"] = dict(self.locked)
+        prompt = self.prompt()
+        if full or prompt != self._last_prompt:
+            reply["prompt"] = prompt
+            self._last_prompt = prompt
+        reply["code"] = encode_character_code(
+            self.slots, self.full_body_mode, self.upper_body_mode, self.locked
+        )
+        return reply
+
+    def op_load(self, message: dict) -> bool:
+        """Replace the whole state (verbose fields or a character code)."""
+        if message.get("code"):
+            try:
+                decoded = codec.decode(message["code"])
+            except CharacterCodeError as exc:
+                raise SessionError(str(exc))
+            slots = decoded["slots"]
+            locked = decoded["locked"]
+            settings = {
+                "full_body_mode": decoded["full_body_mode"],
+                "upper_body_mode": decoded["upper_body_mode"],
+            }
+        else:
+            slots = message.get("slots", {})
+            locked = message.get("locked", {})
+            if not isinstance(slots, dict) or not isinstance(locked, dict):
+                raise SessionError("slots and locked must be objects")
+            settings = {k: v for k, v in message.items() if k in SETTINGS}
+        new_slots = {name: SlotState() for name in self.generator.SLOT_DEFINITIONS}
+        for name, state in slots.items():
+            if name in new_slots:
+                new_slots[name] = self._slot_state(state)
+        self.apply_settings(settings)
+        self.slots = new_slots
+        self.locked = {name: bool(value) for name, value in locked.items() if name in new_slots}
+        return True
+
+    def op_set(self, message: dict) -> bool:
+        name = self._slot_name(message)
+        slot = self.slots[name]
+        updates = {field: message[field] for field in SLOT_FIELDS if field in message}
+        if "value_id" in updates and "value" not in updates:
+            item = self.generator.resolve_slot_item(name, updates["value_id"], None)
+            updates["value"] = item.get("name") if item else None
+        self.slots[name] = self._slot_state({**_slot_dict(slot), **updates})
+        return False
+
+    def op_lock(self, message: dict) -> bool:
+        name = self._slot_name(message)
+        if message.get("locked", True):
+            self.locked[name] = True
+        else:
+            self.locked.pop(name, None)
+        return False
+
+    def op_randomize(self, message: dict) -> bool:
+        if "section" in message:
+            layout = SECTION_LAYOUT.get(message["section"])
+            if layout is None:
+                raise SessionError(f"Unknown section {message['section']!r}")
+            names = layout["slots"]
+        elif "slots" in message:
+            names = message["slots"]
+            if not isinstance(names, list) or any(n not in self.slots for n in names):
+                raise SessionError("slots must be a list of slot names")
+        else:
+            names = list(self.generator.SLOT_DEFINITIONS)
+        self.randomize(names)
+        return False
+
+    def op_settings(self, message: dict) -> bool:
+        self.apply_settings({k: v for k, v in message.items() if k not in ("op", "id")})
+        return False
+
+    def op_language(self, message: dict) -> bool:
+        lang = message.get("lang")
+        if not isinstance(lang, str):
+            raise SessionError("lang must be a string")
+        self.output_language = self.generator.normalize_language(lang)
+        return False
+
+    def op_state(self, message: dict) -> bool:
+        """Resend everything (e.g. after a client reload)."""
+        return True
+
+    # -- helpers -----------------------------------------------------------
+
+    def _slot_name(self, message: dict) -> str:
+        name = message.get("slot")
+        if name not in self.slots:
+            raise SessionError(f"Unknown slot {name!r}")
+        return name
+
+    @staticmethod
+    def _slot_state(state: Any) -> SlotState:
+        if not isinstance(state, dict):
+            raise SessionError("slot state must be an object")
+        try:
+            return SlotState(**{k: v for k, v in state.items() if k in SLOT_FIELDS})
+        except ValueError as exc:
+            raise SessionError(str(exc))
+
+    def apply_settings(self, settings: dict) -> None:
+        for key, value in settings.items():
+            expected = SETTINGS.get(key)
+            if expected is None:
+                raise SessionError(f"Unknown setting {key!r}")
+            valid = value in expected if isinstance(expected, list) else isinstance(value, expected)
+            if not valid:
+                raise SessionError(f"Invalid value for {key}")
+        for key, value in settings.items():
+            setattr(self, key, value)
+
+    def randomize(self, names: List[str]) -> None:
+        """Randomize the unlocked slots in names, like /randomize-all."""
+        definitions = self.generator.SLOT_DEFINITIONS
+        palette_id = self.palette_id if self.palette_enabled else None
+        for name in names:
+            if self.locked.get(name, False):
+                continue
+            item = self.generator.sample_slot(name, disabled_groups=self.disabled_groups.get(name, []))
+            slot = self.slots[name].model_copy()
+            slot.value_id = item.get("id") if item else None
+            slot.value = item.get("name") if item else None
+            if palette_id and definitions[name].get("has_color", False):
+                slot.color = self.generator.sample_color_from_palette(palette_id)
+            elif definitions[name].get("has_color", False):
+                slot.color = None
+            self.slots[name] = slot
+        # Full-body override, as in /randomize: an outfit replaces upper/lower body.
+        if self.full_body_mode and self.slots["full_body"].value_id:
+            for name in ("upper_body", "lower_body"):
+                if name in names and not self.locked.get(name, False):
+                    slot = self.slots[name].model_copy()
+                    slot.value_id = None
+                    slot.value = None
+                    self.slots[name] = slot
+
+    def prompt(self) -> str:
+        req = GenerateRequest.model_construct(
+            slots=self.slots,
+            code=None,
+            full_body_mode=self.full_body_mode,
+            upper_body_mode=self.upper_body_mode,
+            output_language=self.output_language,
+            token_budget=self.token_budget,
+            budget_strategy=self.budget_strategy,
+            prompt_syntax=self.prompt_syntax,
+        )
+        return build_prompt_string(req)
+
+
+@router.websocket("/ws")
+async def session_channel(websocket: WebSocket):
+    """One Session per connection; see the module docstring for the protocol."""
+    await websocket.accept()
+    session = Session()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            request_id = message.get("id") if isinstance(message, dict) else None
+            try:
+                if not isinstance(message, dict):
+                    raise SessionError("message must be a JSON object")
+                reply = session.handle(message)
+            except SessionError as exc:
+                reply = {"error": str(exc)}
+            await websocket.send_json({"id": request_id, **reply})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
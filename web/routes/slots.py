@@ -2,12 +2,24 @@
 Slot-related API routes: definitions, options, randomization.
 """
 
-from fastapi import APIRouter
+import random
+
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 
-from .deps import gen
-from .prompt import SlotState, GenerateRequest, build_prompt_string
+from generator.batch import CharacterSampler
+
+from .deps import catalog_history, gen, offload, payload_cache
+from .fastjson import body_schema, json_body, json_response
+from .payloads import payload_response
+from .prompt import (
+    SlotState,
+    GenerateRequest,
+    apply_character_code,
+    build_prompt_string,
+    encode_character_code,
+)
 
 router = APIRouter()
 
@@ -51,17 +63,43 @@ SECTION_LAYOUT = {
 
 
 @router.get("/slots")
-async def get_slots():
-    """Return slot definitions, per-slot options, and section layout."""
+async def get_slots(request: Request, lang: str = "en", since: Optional[int] = None):
+    """
+    Return slot definitions, per-slot options (localized to lang), and section layout.
+
+    With since=<catalog_version> from an earlier response, return only the
+    options changed since then as {"catalog_version", "since", "patch"},
+    or the full payload if that version is too old to patch.
+    """
+    if since is not None:
+        changes = catalog_history.changes_since(since)
+        if changes is not None:
+            payload = payload_cache.get(
+                f"slots-since:{since}", lang, lambda language: slots_patch(language, since, changes)
+            )
+            return payload_response(request, payload)
+    return payload_response(request, payload_cache.get("slots", lang, slots_data))
+
+
+@router.post("/catalog/reload")
+async def reload_catalog():
+    """Re-read the catalog files (e.g. after tools/merge_catalog.py) and record the diff."""
+    gen.reload_catalogs()
+    return {"catalog_version": catalog_history.sync()}
+
+
+def slots_data(language: str) -> dict:
+    """Build the /api/slots response body for language."""
     slots = {}
     for name, defn in gen.SLOT_DEFINITIONS.items():
-        full_options = gen.get_slot_options_localized(name)
+        full_options = gen.get_slot_options_localized(name, language)
         slots[name] = {
             "category": defn["category"],
             "has_color": defn.get("has_color", False),
             "options": full_options,
         }
     return {
+        "catalog_version": gen.catalog_version,
         "slots": slots,
         "sections": SECTION_LAYOUT,
         "lower_body_covers_legs_by_id": gen.get_lower_body_covers_legs_by_id(),
@@ -69,6 +107,29 @@ async def get_slots():
     }
 
 
+def slots_patch(language: str, since: int, changes: dict) -> dict:
+    """Build the /api/slots?since= patch from CatalogHistory changes."""
+    patch = {}
+    for name, slot_changes in changes.items():
+        if name not in gen.SLOT_DEFINITIONS:
+            continue
+        options = gen.get_slot_options_localized(name, language)
+        entry = {
+            "upsert": [opt for opt in options if opt["id"] in slot_changes.changed],
+            "remove": sorted(slot_changes.removed),
+        }
+        if slot_changes.reordered:
+            entry["order"] = [opt["id"] for opt in options]
+        patch[name] = entry
+    return {
+        "catalog_version": gen.catalog_version,
+        "since": since,
+        "patch": patch,
+        "lower_body_covers_legs_by_id": gen.get_lower_body_covers_legs_by_id(),
+        "pose_uses_hands_by_id": gen.get_pose_uses_hands_by_id(),
+    }
+
+
 class RandomizeRequest(BaseModel):
     slot_names: List[str]
     locked: Dict[str, bool] = {}
@@ -81,11 +142,14 @@ class RandomizeRequest(BaseModel):
     include_prompt: bool = False
     output_language: str = "en"
     disabled_groups: Dict[str, List[str]] = {}  # slot_name -> [group_keys]
+    code: Optional[str] = None  # Compact character code; replaces slots/modes/locks
+    compact: bool = False  # Return only code (+ prompt) instead of verbose results
 
 
-@router.post("/randomize")
-async def randomize_slots(req: RandomizeRequest):
+@router.post("/randomize", openapi_extra=body_schema(RandomizeRequest))
+async def randomize_slots(req: RandomizeRequest = json_body(RandomizeRequest)):
     """Randomize specific slots. Returns {slot_name: {value_id, value, color}}."""
+    apply_character_code(req)
     results = {}
     full_body_value_id = req.current_values.get("full_body")
 
@@ -116,26 +180,7 @@ async def randomize_slots(req: RandomizeRequest):
 
         results[name] = {"value_id": value_id, "value": value, "color": color}
 
-    payload = {"results": results}
-    if req.include_prompt:
-        for name, res in results.items():
-            slot = req.slots.get(name)
-            if not slot:
-                slot = SlotState()
-                req.slots[name] = slot
-            slot.value_id = res["value_id"]
-            slot.value = res["value"]
-            slot.color = res["color"]
-        prompt = build_prompt_string(
-            GenerateRequest(
-                slots=req.slots,
-                full_body_mode=req.full_body_mode,
-                upper_body_mode=req.upper_body_mode,
-                output_language=req.output_language,
-            )
-        )
-        payload["prompt"] = prompt
-    return payload
+    return json_response(_randomize_payload(req, results))
 
 
 class RandomizeAllRequest(BaseModel):
@@ -148,11 +193,18 @@ class RandomizeAllRequest(BaseModel):
     include_prompt: bool = False
     output_language: str = "en"
     disabled_groups: Dict[str, List[str]] = {}  # slot_name -> [group_keys]
+    code: Optional[str] = None  # Compact character code; replaces slots/modes/locks
+    compact: bool = False  # Return only code (+ prompt) instead of verbose results
 
 
-@router.post("/randomize-all")
-async def randomize_all(req: RandomizeAllRequest):
+@router.post("/randomize-all", openapi_extra=body_schema(RandomizeAllRequest))
+async def randomize_all(req: RandomizeAllRequest = json_body(RandomizeAllRequest)):
     """Randomize every non-locked slot. Returns full state."""
+    return json_response(await offload.run("thread", _randomize_all, req))
+
+
+def _randomize_all(req: RandomizeAllRequest) -> dict:
+    apply_character_code(req)
     results = {}
     full_body_value_id = None
 
@@ -182,16 +234,76 @@ async def randomize_all(req: RandomizeAllRequest):
                 results[name]["value_id"] = None
                 results[name]["value"] = None
 
-    payload = {"results": results}
+    return _randomize_payload(req, results)
+
+
+MAX_RANDOMIZE_BATCH = 64
+
+
+class RandomizeBatchRequest(RandomizeAllRequest):
+    count: int = 8  # Number of candidate characters
+    seed: Optional[int] = None  # Reproducible candidates when set
+
+
+@router.post("/randomize-batch", openapi_extra=body_schema(RandomizeBatchRequest))
+async def randomize_batch(req: RandomizeBatchRequest = json_body(RandomizeBatchRequest)):
+    """
+    Return count candidate characters, each shaped like a randomize-all
+    response with prompt ({results, prompt, code}). Same locks, palette and
+    disabled_groups semantics as /randomize-all; option tables are resolved
+    once for all candidates.
+    """
+    if not 1 <= req.count <= MAX_RANDOMIZE_BATCH:
+        raise HTTPException(status_code=400, detail=f"count must be between 1 and {MAX_RANDOMIZE_BATCH}")
+    apply_character_code(req)
+    sampler = CharacterSampler(
+        gen,
+        locked=req.locked,
+        slots=req.slots,
+        palette_id=req.palette_id if req.palette_enabled else None,
+        disabled_groups=req.disabled_groups,
+        full_body_mode=req.full_body_mode,
+    )
+    rng = random.Random(req.seed)
+    renderer = gen.get_renderer()
+
+    candidates = []
+    for _ in range(req.count):
+        character = sampler.sample(rng)
+        candidate = {
+            "prompt": renderer.render(character, req.output_language, req.full_body_mode),
+            "code": encode_character_code(
+                {
+                    name: {"enabled": enabled, "value_id": value_id, "value": value,
+                           "color": color, "weight": weight}
+                    for name, (enabled, value_id, value, color, weight) in character.items()
+                },
+                req.full_body_mode, req.upper_body_mode, req.locked,
+            ),
+        }
+        if not req.compact:
+            candidate["results"] = {
+                name: {"value_id": value_id, "value": value, "color": color}
+                for name, (_, value_id, value, color, _) in character.items()
+                if not req.locked.get(name, False)
+            }
+        candidates.append(candidate)
+    return json_response({"candidates": candidates})
+
+
+def _randomize_payload(req, results: Dict[str, dict]) -> dict:
+    """Merge results into the request slot state and build the response."""
+    for name, res in results.items():
+        slot = req.slots.get(name)
+        if not slot:
+            slot = SlotState()
+            req.slots[name] = slot
+        slot.value_id = res["value_id"]
+        slot.value = res["value"]
+        slot.color = res["color"]
+
+    payload = {} if req.compact else {"results": results}
     if req.include_prompt:
-        for name, res in results.items():
-            slot = req.slots.get(name)
-            if not slot:
-                slot = SlotState()
-                req.slots[name] = slot
-            slot.value_id = res["value_id"]
-            slot.value = res["value"]
-            slot.color = res["color"]
         prompt = build_prompt_string(
             GenerateRequest(
                 slots=req.slots,
@@ -201,4 +313,7 @@ async def randomize_all(req: RandomizeAllRequest):
             )
         )
         payload["prompt"] = prompt
+    payload["code"] = encode_character_code(
+        req.slots, req.full_body_mode, req.upper_body_mode, req.locked
+    )
     return payload
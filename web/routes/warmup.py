@@ -0,0 +1,156 @@
+"""
+Startup warmup and the /api/ready readiness route.
+
+Without warmup the first requests after boot pay for one-time work: the
+first /api/parse-prompt for the parser indices (and the worker processes
+that hold them), the first /api/slots per language for the localized
+option lists, and every cached payload for its serialization and
+compression. Warmup does that work up front, step by step:
+
+  options   localized option lists and option-page tables, every language
+  payloads  /api/slots, /api/palettes and /api/bootstrap bodies, every language
+  search    the /api/search prefix and n-gram index
+  parser    offload worker processes with their parser indices (or the
+            in-process parser when process workers are disabled)
+
+PROMPT_GEN_WARMUP selects when it runs: "background" (default; the server
+accepts requests at once and /api/ready answers 503 until warmup is done),
+"blocking" (startup waits for it) or "off". /api/ready reports the time
+each step took.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .deps import gen, offload, payload_cache
+
+router = APIRouter()
+
+logger = logging.getLogger("uvicorn.error")
+
+WARMUP_ENV = "PROMPT_GEN_WARMUP"
+WARMUP_MODES = ("background", "blocking", "off")
+
+# Steps that are safe to run in a parent process before it forks workers
+# (no executors or threads are left behind).
+PRELOAD_STEPS = ("options", "payloads", "search")
+
+
+def warm_options() -> None:
+    from .options import option_tables
+    for language in gen.SUPPORTED_LANGUAGES:
+        for slot_name in gen.SLOT_DEFINITIONS:
+            option_tables.get(slot_name, language)
+
+
+def warm_payloads() -> None:
+    from .bootstrap import bootstrap_payload
+    from .prompt import palettes_data
+    from .slots import slots_data
+    for language in gen.SUPPORTED_LANGUAGES:
+        payload_cache.get("slots", language, slots_data)
+        payload_cache.get("palettes", language, palettes_data)
+        bootstrap_payload(language)
+
+
+def warm_search() -> None:
+    from .search import search_index
+    search_index.get()
+
+
+def warm_parser() -> None:
+    offload.start()  # Worker processes build their parsers in the initializer
+    if offload.lanes["process"].executor is None:
+        from .parser import get_parser
+        get_parser()
+
+
+STEPS: Tuple[Tuple[str, Callable[[], None]], ...] = (
+    ("options", warm_options),
+    ("payloads", warm_payloads),
+    ("search", warm_search),
+    ("parser", warm_parser),
+)
+
+
+def warmup_mode() -> str:
+    mode = os.environ.get(WARMUP_ENV, "background").strip().lower()
+    return mode if mode in WARMUP_MODES else "background"
+
+
+class Warmup:
+    """Runs warmup steps once each and records how long they took."""
+
+    def __init__(self, steps: Sequence[Tuple[str, Callable[[], None]]] = STEPS):
+        self.steps = list(steps)
+        self.mode: Optional[str] = None
+        self.timings: Dict[str, float] = {}  # step -> milliseconds
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._finished.is_set()
+
+    def run(self, names: Optional[Sequence[str]] = None) -> None:
+        """Run the named steps (default: all) that have not run yet."""
+        with self._lock:
+            for name, step in self.steps:
+                if (names is not None and name not in names) or name in self.timings:
+                    continue
+                started = time.perf_counter()
+                try:
+                    step()
+                except Exception as exc:  # Warmup is an optimization; the step reruns lazily on demand.
+                    logger.exception("Warmup step %r failed", name)
+                    self.errors[name] = str(exc)
+                self.timings[name] = round((time.perf_counter() - started) * 1000, 3)
+            if names is None:
+                self._finished.set()
+
+    def reset(self) -> None:
+        """Forget completed steps (after a catalog reload)."""
+        with self._lock:
+            self.timings.clear()
+            self.errors.clear()
+            self._finished.clear()
+
+    def start(self, mode: Optional[str] = None) -> None:
+        """Start warmup in mode ("background", "blocking" or "off")."""
+        self.mode = mode or warmup_mode()
+        if self.mode == "off":
+            self._finished.set()
+        elif self.mode == "blocking":
+            self.run()
+        else:
+            threading.Thread(target=self.run, name="warmup", daemon=True).start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "steps": dict(self.timings),
+            "pending": [name for name, _ in self.steps if name not in self.timings] if self.mode != "off" else [],
+            "errors": dict(self.errors),
+            "total_ms": round(sum(self.timings.values()), 3),
+        }
+
+
+warmup = Warmup()
+
+
+@router.get("/ready")
+async def get_ready():
+    """Readiness: 200 once startup warmup has finished, 503 before; with per-step timings."""
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
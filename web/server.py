@@ -1,44 +1,98 @@
 """
 FastAPI server for Random Character Prompt Generator.
-Mounts static files and includes all API route modules.
+Serves static assets and includes all API route modules.
 """
 
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from starlette.middleware import Middleware
-from starlette.middleware.base import BaseHTTPMiddleware
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse, JSONResponse
 from pathlib import Path
 
-from .routes import slots, prompt, configs, parser
+from .assets import (
+    NO_STORE_CACHE_CONTROL,
+    AssetMiddleware,
+    AssetPipeline,
+    NoCacheStaticFiles,
+    dev_assets_enabled,
+)
+from .compression import CompressionMiddleware
+from .routes import slots, prompt, configs, parser, batch, bootstrap, options, search, session, warmup
+from .routes.admission import AdmissionRejected, cost_class
+from .routes.bootstrap import inline_bootstrap, request_language
+from .routes.deps import offload
+from .routes.offload import RETRY_AFTER_SECONDS, PoolBusy
+from .routes.payloads import payload_response
 
 STATIC_DIR = Path(__file__).parent / "static"
 
-app = FastAPI(title="Character Prompt Generator")
+DEV_ASSETS = dev_assets_enabled()
+
+# Embed the /api/bootstrap body in index.html (PROMPT_GEN_INLINE_BOOTSTRAP=0 to disable).
+INLINE_BOOTSTRAP = os.environ.get("PROMPT_GEN_INLINE_BOOTSTRAP", "1").strip() != "0"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build parser workers, option tables and payloads before the first
+    # request needs them (PROMPT_GEN_WARMUP; progress at /api/ready).
+    warmup.warmup.start()
+    yield
+    offload.shutdown()
+
+
+app = FastAPI(title="Character Prompt Generator", lifespan=lifespan)
+
 
+@app.exception_handler(PoolBusy)
+async def pool_busy_handler(request: Request, exc: PoolBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
 
-class NoCacheStaticMiddleware(BaseHTTPMiddleware):
-    """Disable caching for static JS/CSS during development."""
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        if request.url.path.startswith("/static/"):
-            response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
-        return response
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-app.add_middleware(NoCacheStaticMiddleware)
+if DEV_ASSETS:
+    # Serve files from disk and disable caching so edits show up on reload.
+    assets = None
+    app.mount("/static", NoCacheStaticFiles(directory=str(STATIC_DIR)), name="static")
+else:
+    # Fingerprinted, precompressed, immutable-cached assets served from memory.
+    assets = AssetPipeline(STATIC_DIR).build()
+    app.add_middleware(AssetMiddleware, pipeline=assets)
 
-# Mount static assets
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# Negotiated gzip/br/zstd for dynamic responses; precompressed payloads pass through.
+app.add_middleware(CompressionMiddleware)
 
-# Include route modules
-app.include_router(slots.router, prefix="/api")
-app.include_router(prompt.router, prefix="/api")
-app.include_router(configs.router, prefix="/api")
-app.include_router(parser.router, prefix="/api")
+# Include route modules, each with its cost class (see routes/admission.py)
+app.include_router(slots.router, prefix="/api", dependencies=[cost_class("moderate")])
+app.include_router(prompt.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(configs.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(parser.router, prefix="/api", dependencies=[cost_class("heavy")])
+app.include_router(batch.router, prefix="/api", dependencies=[cost_class("heavy")])
+app.include_router(bootstrap.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(options.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(search.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(warmup.router, prefix="/api", dependencies=[cost_class("cheap")])
+app.include_router(session.router)  # WebSocket channel at /ws
 
 
 @app.get("/")
-async def index():
+async def index(request: Request):
     """Serve the main HTML page."""
-    return FileResponse(str(STATIC_DIR / "index.html"))
+    if assets is None:
+        return FileResponse(str(STATIC_DIR / "index.html"), headers={"Cache-Control": NO_STORE_CACHE_CONTROL})
+    page = assets.index
+    if INLINE_BOOTSTRAP:
+        page = inline_bootstrap(page, request_language(request))
+    return payload_response(request, page, media_type="text/html; charset=utf-8")
@@ -18,11 +18,39 @@ async function get(url) {
   return res.json();
 }
 
+/** Fetch slots, palettes, config names and UI strings for a locale in one call. */
+export function fetchBootstrap(lang) {
+  return get(`/api/bootstrap?lang=${encodeURIComponent(lang)}`);
+}
+
 /** Fetch slot definitions + section layout. */
 export function fetchSlots() {
   return get("/api/slots");
 }
 
+/** Fetch one page of a slot's options; pass the returned next_cursor to continue. */
+export function fetchSlotOptions(slotName, { lang = "en", cursor = null, limit = 100, group = null, fields = null } = {}) {
+  const params = new URLSearchParams({ lang, limit: String(limit) });
+  if (cursor) params.set("cursor", cursor);
+  if (group) params.set("group", group);
+  if (fields) params.set("fields", fields);
+  return get(`/api/slots/${encodeURIComponent(slotName)}/options?${params}`);
+}
+
+/** Fetch a section's layout with the first page of options for each slot. */
+export function fetchSection(sectionId, { lang = "en", limit = 100, fields = null } = {}) {
+  const params = new URLSearchParams({ lang, limit: String(limit) });
+  if (fields) params.set("fields", fields);
+  return get(`/api/sections/${encodeURIComponent(sectionId)}?${params}`);
+}
+
+/** Typeahead search over option names, aliases and translations; slot limits it to one slot. */
+export function searchOptions(q, { lang = "en", slot = null, limit = 20 } = {}) {
+  const params = new URLSearchParams({ q, lang, limit: String(limit) });
+  if (slot) params.set("slot", slot);
+  return get(`/api/search?${params}`);
+}
+
 /** Fetch palette list + individual colors. */
 export function fetchPalettes() {
   return get("/api/palettes");
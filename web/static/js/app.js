@@ -19,6 +19,7 @@ import { wirePromptPrefixPreset, generateAndDisplay } from "./prompt.js";
 import {
   SUPPORTED_LOCALES,
   getPromptLocale,
+  getSavedUiLocale,
   getUiLocale,
   initI18n,
   onPromptLocaleChange,
@@ -291,15 +292,27 @@ function wireHistoryEvents() {
   });
 }
 
+/** Bootstrap data inlined into index.html by the server, or fetched in one call. */
+async function loadBootstrap() {
+  const inlined = document.getElementById("bootstrap-data");
+  if (inlined) {
+    try {
+      return JSON.parse(inlined.textContent);
+    } catch (err) {
+      console.warn("Ignoring malformed inline bootstrap data", err);
+    }
+  }
+  return api.fetchBootstrap(getSavedUiLocale());
+}
+
 async function init() {
-  await initI18n();
+  const boot = await loadBootstrap();
+  await initI18n(boot);
   state.uiLocale = getUiLocale();
   state.promptLocale = getPromptLocale();
 
-  const [slotsData, palettesData] = await Promise.all([
-    api.fetchSlots(),
-    api.fetchPalettes(),
-  ]);
+  const slotsData = boot.slots;
+  const palettesData = boot.palettes;
 
   state.sections = slotsData.sections;
   state.lowerBodyCoversLegsById = slotsData.lower_body_covers_legs_by_id || {};
@@ -321,7 +334,7 @@ async function init() {
   wireShortcutEvents();
   refreshLocalizedDynamicUi();
   renderHistoryList();
-  await refreshConfigList();
+  await refreshConfigList(boot.configs);
 }
 
 init();
@@ -611,11 +611,11 @@ export function wireSaveLoadEvents() {
     generateAndDisplay();
   });
 
-  document.getElementById("btn-refresh-configs").addEventListener("click", refreshConfigList);
+  document.getElementById("btn-refresh-configs").addEventListener("click", () => refreshConfigList());
 }
 
-async function refreshConfigList() {
-  const data = await api.fetchConfigs();
+async function refreshConfigList(names) {
+  const data = names ? { configs: names } : await api.fetchConfigs();
   const select = document.getElementById("config-select");
   select.innerHTML = "";
 
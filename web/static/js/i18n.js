@@ -5,6 +5,8 @@
 export const SUPPORTED_LOCALES = ["en", "zh"];
 const DEFAULT_LOCALE = "en";
 const UI_STORAGE_KEY = "ui_locale";
+// Also sent as a cookie so the server can inline the right bootstrap data.
+const UI_LOCALE_COOKIE = "ui_locale";
 const PROMPT_STORAGE_KEY = "prompt_locale";
 
 let currentUiLocale = DEFAULT_LOCALE;
@@ -15,10 +17,17 @@ const uiLocaleListeners = [];
 const promptLocaleListeners = [];
 
 async function loadUiStrings(locale) {
-  const res = await fetch(`/static/i18n/${locale}.json`);
+  // Fingerprinted URL from the asset map inlined into index.html, if present.
+  const assets = window.__ASSETS__ || {};
+  const res = await fetch(assets[`i18n/${locale}.json`] || `/static/i18n/${locale}.json`);
   uiStrings = await res.json();
 }
 
+function rememberUiLocale(locale) {
+  localStorage.setItem(UI_STORAGE_KEY, locale);
+  document.cookie = `${UI_LOCALE_COOKIE}=${locale}; path=/; max-age=31536000; samesite=lax`;
+}
+
 function normalizeLocale(code) {
   const raw = (code || DEFAULT_LOCALE).toLowerCase();
   if (raw.startsWith("zh")) return "zh";
@@ -48,7 +57,7 @@ export async function setUiLocale(code) {
   const locale = normalizeLocale(code);
   if (!SUPPORTED_LOCALES.includes(locale)) return;
   currentUiLocale = locale;
-  localStorage.setItem(UI_STORAGE_KEY, locale);
+  rememberUiLocale(locale);
   await loadUiStrings(locale);
   for (const fn of uiLocaleListeners) fn(locale);
 }
@@ -69,13 +78,27 @@ export function onPromptLocaleChange(fn) {
   promptLocaleListeners.push(fn);
 }
 
-/** Initialize locale settings and UI bundle. */
-export async function initI18n() {
+/** Read the saved UI locale without loading its strings. */
+export function getSavedUiLocale() {
+  const savedUi = localStorage.getItem(UI_STORAGE_KEY);
+  return SUPPORTED_LOCALES.includes(savedUi) ? savedUi : DEFAULT_LOCALE;
+}
+
+/**
+ * Initialize locale settings and UI bundle.
+ * preloaded: optional bootstrap data; its ui_strings are used when its lang matches.
+ */
+export async function initI18n(preloaded) {
   const savedUi = localStorage.getItem(UI_STORAGE_KEY);
   const savedPrompt = localStorage.getItem(PROMPT_STORAGE_KEY);
 
   currentUiLocale = SUPPORTED_LOCALES.includes(savedUi) ? savedUi : DEFAULT_LOCALE;
   currentPromptLocale = SUPPORTED_LOCALES.includes(savedPrompt) ? savedPrompt : currentUiLocale;
 
-  await loadUiStrings(currentUiLocale);
+  rememberUiLocale(currentUiLocale);
+  if (preloaded && preloaded.lang === currentUiLocale && preloaded.ui_strings) {
+    uiStrings = preloaded.ui_strings;
+  } else {
+    await loadUiStrings(currentUiLocale);
+  }
 }